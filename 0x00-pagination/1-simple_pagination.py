@@ -6,11 +6,32 @@ Server Pagination
 This script provides a Server class to paginate a dataset of popular baby names
 from a CSV file. It includes a function to calculate the start and end indices
 for pagination.
+
+With `streaming=True` the Server reads pages straight from the CSV file
+instead of loading the whole dataset, only going as far as the end of the
+requested page.
+
+Pages can be filtered and sorted with `where` and `order_by`, which are
+answered from secondary indexes built once per dataset.
+
+`reload()` loads a new version of the dataset and swaps it in atomically; see
+`DatasetWatcher` to do so whenever `DATA_FILE` changes. The new version is
+loaded before the lock requests use is taken, so they are only held up by the
+swap itself, and the old version is left open for the requests and walks
+still reading it. A streaming Server that has not loaded the dataset only
+tracks the version of the file it streams, and reloading it just restarts the
+stream.
 """
 
 import csv
+import gc
 import math
-from typing import List, Tuple
+import threading
+from collections import deque
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+file_version = __import__('dataset_files').file_version
 
 
 def index_range(page: int, page_size: int) -> Tuple[int, int]:
@@ -31,14 +52,90 @@ def index_range(page: int, page_size: int) -> Tuple[int, int]:
     return (start_index, end_index)
 
 
+class RowStream:
+    """
+    Forward-only reader over the data rows of a CSV file.
+
+    The reader stays open between calls, so consecutive forward pages only
+    read the rows they return. Moving backwards reopens the file.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the stream.
+
+        Args:
+            path (str): Path to the CSV file.
+        """
+        self.path = path
+        self.__file = None
+        self.__reader = None
+        self.__position = 0
+
+    def __rewind(self) -> None:
+        """
+        Reopen the file and position the reader on the first data row.
+        """
+        self.close()
+        self.__file = open(self.path, newline='')
+        self.__reader = csv.reader(self.__file)
+        next(self.__reader, None)  # Skip the header
+        self.__position = 0
+
+    def rows(self, start: int, end: int) -> List[List]:
+        """
+        Read the rows between two positions.
+
+        Args:
+            start (int): Index of the first row (inclusive).
+            end (int): Index of the last row (exclusive).
+
+        Returns:
+            List[List]: The rows in range, fewer if the file ends first.
+        """
+        if self.__reader is None or start < self.__position:
+            self.__rewind()
+        deque(islice(self.__reader, start - self.__position), maxlen=0)
+        self.__position = start
+        rows = list(islice(self.__reader, end - start))
+        self.__position += len(rows)
+        return rows
+
+    def close(self) -> None:
+        """
+        Close the underlying file.
+        """
+        if self.__file is not None:
+            self.__file.close()
+        self.__file = None
+        self.__reader = None
+
+
 class Server:
     """
     Server class to paginate a database of popular baby names.
     """
     DATA_FILE = "Popular_Baby_Names.csv"
 
-    def __init__(self):
-        self.__dataset = None
+    def __init__(self, loader: Callable[[str], Sequence] = None,
+                 streaming: bool = False):
+        """
+        Initialize the server.
+
+        Args:
+            loader (Callable[[str], Sequence], optional): Builds the dataset
+                from `DATA_FILE` instead of reading it with `csv.reader`,
+                e.g. `MmapDataset`. Defaults to None.
+            streaming (bool, optional): Serve `get_page` by streaming the
+                CSV file instead of loading the dataset. Defaults to False.
+        """
+        self.__loader = loader
+        self.__snapshot = None
+        self.__index = None
+        self.__lock = threading.Lock()
+        self.__reload_lock = threading.Lock()
+        self.__stream = RowStream(self.DATA_FILE) if streaming else None
+        self.__stream_version = None
 
     def dataset(self) -> List[List]:
         """
@@ -49,15 +146,114 @@ class Server:
         Returns:
             List[List]: The cached dataset, excluding the header.
         """
-        if self.__dataset is None:
-            with open(self.DATA_FILE) as f:
-                reader = csv.reader(f)
-                dataset = [row for row in reader]
-            self.__dataset = dataset[1:]  # Skip the header
+        if self.__snapshot is None:
+            with self.__lock:
+                if self.__snapshot is None:
+                    self.__snapshot = self.__load()
+
+        return self.__snapshot[1]
+
+    def __load(self) -> Tuple[str, Sequence]:
+        """
+        Read `DATA_FILE` and tag it with its version.
+
+        Returns:
+            Tuple[str, Sequence]: The version and the dataset.
+        """
+        version = file_version(self.DATA_FILE)
+        if self.__loader is not None:
+            return version, self.__loader(self.DATA_FILE)
+        with open(self.DATA_FILE) as f:
+            reader = csv.reader(f)
+            dataset = [row for row in reader]
+        return version, dataset[1:]  # Skip the header
+
+    def dataset_version(self) -> str:
+        """
+        Version of the cached dataset.
+
+        A streaming Server that has not loaded the dataset reports the
+        version of the file it streams, without loading it.
+
+        Returns:
+            str: The version token of `DATA_FILE` when it was loaded.
+        """
+        if self.__snapshot is None and self.__stream is not None:
+            with self.__lock:
+                if self.__stream_version is None:
+                    self.__stream_version = file_version(self.DATA_FILE)
+                return self.__stream_version
+        self.dataset()
+        return self.__snapshot[0]
+
+    def reload(self) -> str:
+        """
+        Load `DATA_FILE` again and swap the new dataset in.
+
+        The new dataset is fully loaded, without holding the lock requests
+        take, before it replaces the old one, so concurrent requests see
+        either version but never a partial one. The old dataset is left
+        open for the readers still on it. A streaming Server that has not
+        loaded the dataset only restarts its stream.
+
+        Returns:
+            str: The version of the new dataset.
+        """
+        with self.__reload_lock:
+            if self.__snapshot is None and self.__stream is not None:
+                version = file_version(self.DATA_FILE)
+                with self.__lock:
+                    self.__stream.close()
+                    self.__stream_version = version
+                return version
+
+            snapshot = self.__load()
+            with self.__lock:
+                self.__snapshot = snapshot
+                self.__index = None
+                if self.__stream is not None:
+                    self.__stream.close()
+                    self.__stream_version = snapshot[0]
+        return snapshot[0]
+
+    def warm_up(self, freeze: bool = True) -> None:
+        """
+        Load the dataset ahead of the first request.
+
+        Call it at import time, or in the master process before forking
+        workers, so the parse happens once. With `freeze`, the loaded
+        objects are moved out of the garbage collector's reach with
+        `gc.freeze()`, so collections in the workers do not write to (and
+        un-share) the copy-on-write pages holding them.
+
+        Args:
+            freeze (bool, optional): Freeze the garbage collector's tracked
+                objects after loading. Defaults to True.
+        """
+        self.secondary_index()
+        if freeze:
+            gc.freeze()
+
+    def secondary_index(self) -> "SecondaryIndex":
+        """
+        Cached secondary indexes over the dataset.
+
+        Returns:
+            SecondaryIndex: The indexes used by filtered and sorted pages.
+        """
+        SecondaryIndex = __import__('6-secondary_index').SecondaryIndex
+        data_set = self.dataset()
+        index = self.__index
+        if index is None or index.dataset is not data_set:
+            with self.__lock:
+                index = self.__index
+                if index is None or index.dataset is not data_set:
+                    index = self.__index = SecondaryIndex(data_set)
 
-        return self.__dataset
+        return index
 
-    def get_page(self, page: int = 1, page_size: int = 10) -> List[List]:
+    def get_page(self, page: int = 1, page_size: int = 10,
+                 where: Dict = None, order_by: str = None) -> List[List]:
         """
         Get a page of the dataset.
 
@@ -65,6 +261,11 @@ class Server:
             page (int, optional): The page number to retrieve. Defaults to 1.
             page_size (int, optional): The number of items per page.
                 Defaults to 10.
+            where (Dict, optional): Equality filters such as
+                `{"year": 2016, "gender": "FEMALE"}`, or a name prefix with
+                `{"name__prefix": "Ol"}`. Defaults to None.
+            order_by (str, optional): Column to sort by, e.g. `"count"` or
+                `"-count"` for descending order. Defaults to file order.
 
         Returns:
             List[List]: A list of rows for the specified page.
@@ -73,6 +274,105 @@ class Server:
         assert (type(page_size) == int) and (page_size > 0)
 
         start_index, end_index = index_range(page, page_size)
+        if where or order_by is not None:
+            rows_at = __import__('10-page_view').rows_at
+            index = self.secondary_index()
+            positions = index.page(start_index, end_index, where, order_by)
+            return rows_at(index.dataset, positions)
+        if self.__stream is not None:
+            with self.__lock:
+                return self.__stream.rows(start_index, end_index)
         data_set = self.dataset()
 
         return data_set[start_index:end_index]
+
+    def count(self, where: Dict = None, approximate: bool = False) -> int:
+        """
+        Count the rows matching filters without scanning the dataset.
+
+        Args:
+            where (Dict, optional): Filters, as for `get_page`.
+                Defaults to None (every row).
+            approximate (bool, optional): Allow an estimate when several
+                filters are combined. Defaults to False.
+
+        Returns:
+            int: The (estimated) number of matching rows.
+        """
+        return self.secondary_index().count(where, approximate)
+
+    def get_pages(self, pages: Iterable[int],
+                  page_size: int = 10) -> List[Sequence]:
+        """
+        Get several pages of the dataset at once.
+
+        All pages come from the same dataset version and are returned as
+        `PageView`s instead of copied lists. In streaming mode they are read
+        from the file in one forward pass, with their own stream, and
+        returned as lists.
+
+        Args:
+            pages (Iterable[int]): The page numbers to retrieve.
+            page_size (int, optional): The number of items per page.
+                Defaults to 10.
+
+        Returns:
+            List[Sequence]: The rows of each page, in the order requested.
+        """
+        assert (type(page_size) == int) and (page_size > 0)
+        ranges = []
+        for page in pages:
+            assert (type(page) == int) and (page > 0)
+            ranges.append(index_range(page, page_size))
+
+        if self.__stream is not None:
+            stream = RowStream(self.DATA_FILE)
+            try:
+                rows = {bounds: stream.rows(*bounds)
+                        for bounds in sorted(set(ranges))}
+            finally:
+                stream.close()
+            return [rows[bounds] for bounds in ranges]
+
+        PageView = __import__('10-page_view').PageView
+        data_set = self.dataset()
+        return [PageView(data_set, *bounds) for bounds in ranges]
+
+    def iter_pages(self, page_size: int = 10,
+                   start: int = 1) -> Iterator[Sequence]:
+        """
+        Walk the dataset page by page, up to the last non-empty page.
+
+        In streaming mode the walk reads the file sequentially with its own
+        stream and yields lists; otherwise it stays on the dataset version it
+        started with and yields `PageView`s.
+
+        Args:
+            page_size (int, optional): The number of items per page.
+                Defaults to 10.
+            start (int, optional): The first page number. Defaults to 1.
+
+        Yields:
+            Sequence: The rows of each page.
+        """
+        assert (type(page_size) == int) and (page_size > 0)
+        assert (type(start) == int) and (start > 0)
+
+        start_index, _ = index_range(start, page_size)
+        if self.__stream is not None:
+            stream = RowStream(self.DATA_FILE)
+            try:
+                rows = stream.rows(start_index, start_index + page_size)
+                while rows:
+                    yield rows
+                    start_index += page_size
+                    rows = stream.rows(start_index, start_index + page_size)
+            finally:
+                stream.close()
+            return
+
+        PageView = __import__('10-page_view').PageView
+        data_set = self.dataset()
+        while start_index < len(data_set):
+            yield PageView(data_set, start_index, start_index + page_size)
+            start_index += page_size
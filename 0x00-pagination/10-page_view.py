@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+"""
+Page View
+
+This script provides a PageView, a read-only window onto a range of rows of a
+dataset. Batch pagination returns views instead of slicing, so no per-page
+list is built unless the caller asks for one.
+"""
+
+from collections.abc import Sequence
+from typing import Iterable, Iterator, List, Union
+
+
+def rows_at(dataset: Sequence, positions: Iterable[int]) -> List[List]:
+    """
+    Get the rows at some positions, in one batch when the dataset can read
+    several at once (`take`), e.g. a ShardedDataset with worker processes.
+
+    Args:
+        dataset (Sequence): The rows.
+        positions (Iterable[int]): The positions to read, in any order.
+
+    Returns:
+        List[List]: The rows, in the order of `positions`.
+    """
+    take = getattr(dataset, "take", None)
+    if take is not None:
+        return take(positions)
+    return [dataset[i] for i in positions]
+
+
+class PageView(Sequence):
+    """
+    Read-only view of the rows `start:end` of a dataset.
+    """
+
+    def __init__(self, dataset: Sequence, start: int, end: int):
+        """
+        Initialize the view, clamped to the dataset.
+
+        Args:
+            dataset (Sequence): The rows to view.
+            start (int): Index of the first row (inclusive).
+            end (int): Index of the last row (exclusive).
+        """
+        self.dataset = dataset
+        self.start = min(start, len(dataset))
+        self.end = max(min(end, len(dataset)), self.start)
+
+    def __len__(self) -> int:
+        """
+        Number of rows in the view.
+        """
+        return self.end - self.start
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[List, List[List]]:
+        """
+        Get a row, or a list of rows, relative to the start of the view.
+        """
+        if isinstance(key, slice):
+            positions = range(*key.indices(len(self)))
+            if positions.step == 1:
+                return self.dataset[self.start + positions.start:
+                                    self.start + positions.stop]
+            return rows_at(self.dataset,
+                           [self.start + i for i in positions])
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("page index out of range")
+        return self.dataset[self.start + key]
+
+    def __iter__(self) -> Iterator[List]:
+        """
+        Iterate over the rows without copying them into a list.
+        """
+        return map(self.dataset.__getitem__, range(self.start, self.end))
+
+    def __repr__(self) -> str:
+        """
+        Show the viewed range.
+        """
+        return "PageView({}:{})".format(self.start, self.end)
+
+    def tolist(self) -> List[List]:
+        """
+        Copy the rows into a list.
+
+        Returns:
+            List[List]: The rows in the view.
+        """
+        return list(self.dataset[self.start:self.end])
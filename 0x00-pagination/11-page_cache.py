@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+"""
+Page Cache
+
+This script provides a bounded, thread-safe LRU cache for encoded page
+responses, so the pages most clients ask for are served without slicing or
+serializing them again.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class PageCache:
+    """
+    Least-recently-used cache of encoded responses.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int, optional): How many responses to keep.
+                Defaults to 256.
+        """
+        assert (type(max_entries) == int) and (max_entries > 0)
+        self.max_entries = max_entries
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """
+        Number of cached responses.
+        """
+        return len(self.__entries)
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """
+        Get a cached response and mark it as recently used.
+
+        Args:
+            key (Hashable): The response key.
+
+        Returns:
+            Optional[bytes]: The encoded response, or None on a miss.
+        """
+        with self.__lock:
+            body = self.__entries.get(key)
+            if body is not None:
+                self.__entries.move_to_end(key)
+            return body
+
+    def put(self, key: Hashable, body: bytes) -> None:
+        """
+        Cache a response, evicting the least recently used one if full.
+
+        Args:
+            key (Hashable): The response key.
+            body (bytes): The encoded response.
+        """
+        with self.__lock:
+            self.__entries[key] = body
+            self.__entries.move_to_end(key)
+            if len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Drop every cached response.
+        """
+        with self.__lock:
+            self.__entries.clear()
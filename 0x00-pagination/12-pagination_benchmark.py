@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+
+"""
+Pagination Benchmark
+
+This script measures the pagination Servers on synthetic, baby-names-shaped
+CSV files. For every dataset size, dataset backend and deletion density it
+reports the cold-load time, the peak RSS and the p50/p99 latency of
+`index_range`, `get_page` on the first, middle and last pages, `get_hyper`,
+and a `get_hyper_index` walk over a dataset with deleted rows. Each
+measurement runs in a fresh process so peak RSS is not shared between runs,
+and starts without the persisted mmap offset index so every cold load builds
+it. Peak RSS is read right after the cold load, so it counts one copy of the
+dataset and none of the indexes built afterwards. Loading again once the
+index is persisted, after the first dataset has been dropped, is reported as
+the warm-load time.
+
+Usage:
+    ./12-pagination_benchmark.py run --rows 10000 100000 -o before.json
+    ./12-pagination_benchmark.py run --rows 10000 100000 -o after.json
+    ./12-pagination_benchmark.py compare before.json after.json
+"""
+
+import argparse
+import csv
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from queue import Empty
+from typing import Callable, Dict, List
+
+BACKENDS = ("list", "mmap", "typed", "stream")
+GENDERS = ("FEMALE", "MALE")
+ETHNICITIES = ("ASIAN AND PACIFIC ISLANDER", "BLACK NON HISPANIC",
+               "HISPANIC", "WHITE NON HISPANIC")
+HEADER = ("Year of Birth", "Gender", "Ethnicity", "Child's First Name",
+          "Count", "Rank")
+
+
+def generate(path: str, rows: int, seed: int = 0) -> None:
+    """
+    Write a synthetic popular baby names CSV file.
+
+    Args:
+        path (str): Where to write the file.
+        rows (int): Number of data rows.
+        seed (int, optional): Random seed. Defaults to 0.
+    """
+    rng = random.Random(seed)
+    names = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz")
+                     for _ in range(rng.randint(3, 9))).title()
+             for _ in range(2000)]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for _ in range(rows):
+            writer.writerow((rng.randint(2011, 2016), rng.choice(GENDERS),
+                             rng.choice(ETHNICITIES), rng.choice(names),
+                             rng.randint(10, 300), rng.randint(1, 100)))
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """
+    Summarize latency samples.
+
+    Args:
+        samples (List[float]): Latencies in seconds.
+
+    Returns:
+        Dict[str, float]: The p50 and p99 latencies in microseconds.
+    """
+    ordered = sorted(samples)
+
+    def pick(fraction):
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    return {"p50_us": pick(0.50) * 1e6, "p99_us": pick(0.99) * 1e6}
+
+
+def timed(func: Callable, samples: int) -> Dict[str, float]:
+    """
+    Call a function repeatedly and summarize its latency.
+
+    Args:
+        func (Callable): The function to call with no arguments.
+        samples (int): How many calls to time.
+
+    Returns:
+        Dict[str, float]: The p50 and p99 latencies in microseconds.
+    """
+    latencies = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    return percentiles(latencies)
+
+
+def server_class(module: str, path: str):
+    """
+    Get a pagination Server class reading a given file.
+    """
+    base = __import__(module).Server
+    return type("BenchServer", (base,), {"DATA_FILE": path})
+
+
+def loader_for(backend: str):
+    """
+    Get the dataset loader of a backend.
+    """
+    if backend == "mmap":
+        return __import__('4-mmap_dataset').MmapDataset
+    if backend == "typed":
+        return __import__('7-typed_dataset').TypedDataset
+    return None
+
+
+def measure(path: str, rows: int, backend: str, density: float,
+            samples: int, queue) -> None:
+    """
+    Benchmark one configuration and put the result on a queue.
+
+    Runs in its own process.
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    index_range = __import__('0-simple_helper_function').index_range
+    page_size = 10
+    last_page = max(rows // page_size, 1)
+    middle_page = max(last_page // 2, 1)
+    loader = loader_for(backend)
+    result = {"rows": rows, "backend": backend, "deletion_density": density,
+              "page_size": page_size, "latency": {}}
+    latency = result["latency"]
+
+    latency["index_range"] = timed(
+        lambda: index_range(middle_page, page_size), samples)
+
+    # A previous run persisted the offset index; cold loads must rebuild it
+    try:
+        os.remove(path + __import__('4-mmap_dataset').INDEX_SUFFIX)
+    except FileNotFoundError:
+        pass
+
+    if backend == "stream":
+        pages = server_class('1-simple_pagination', path)(streaming=True)
+        start = time.perf_counter()
+        pages.get_page(1, page_size)
+        result["cold_load_s"] = time.perf_counter() - start
+    else:
+        pages = server_class('2-hypermedia_pagination', path)(loader)
+        start = time.perf_counter()
+        pages.dataset()
+        result["cold_load_s"] = time.perf_counter() - start
+    result["peak_rss_kb"] = resource.getrusage(
+        resource.RUSAGE_SELF).ru_maxrss
+
+    if backend != "stream":
+        latency["get_hyper_middle"] = timed(
+            lambda: pages.get_hyper(middle_page, page_size), samples)
+
+    for name, page in (("first", 1), ("middle", middle_page),
+                       ("last", last_page)):
+        latency["get_page_" + name] = timed(
+            lambda: pages.get_page(page, page_size), samples)
+
+    if backend != "stream":
+        _, data_set = pages.snapshot()
+        deleted = server_class('3-hypermedia_del_pagination', path)(
+            lambda _: data_set)
+        deleted.warm_up(freeze=False)
+        rng = random.Random(rows)
+        for i in rng.sample(range(rows), int(rows * density)):
+            deleted.delete(i)
+        walk = {"index": 1}
+
+        def step():
+            page = deleted.get_hyper_index(walk["index"], page_size)
+            walk["index"] = page["next_index"]
+            if walk["index"] >= rows:
+                walk["index"] = 1
+
+        latency["get_hyper_index_walk"] = timed(step, samples)
+
+        close_dataset = __import__('dataset_files').close_dataset
+        del deleted, data_set
+        close_dataset(pages.dataset())
+        del pages
+        gc.collect()
+        warm = server_class('2-hypermedia_pagination', path)(loader)
+        start = time.perf_counter()
+        warm.dataset()
+        result["warm_load_s"] = time.perf_counter() - start
+        close_dataset(warm.dataset())
+
+    queue.put(result)
+
+
+def collect(process: multiprocessing.Process, queue,
+            timeout: float) -> Dict:
+    """
+    Wait for the result of a measuring process.
+
+    The queue is polled, so a process that dies before putting its result,
+    e.g. killed for running out of memory, is noticed instead of waited on
+    forever.
+
+    Args:
+        process (multiprocessing.Process): The started process.
+        queue (multiprocessing.Queue): Where it puts its result.
+        timeout (float): Seconds to wait before terminating it.
+
+    Returns:
+        Dict: The result.
+
+    Raises:
+        RuntimeError: If the process exited without a result or timed out.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return queue.get(timeout=1)
+        except Empty:
+            pass
+        if not process.is_alive():
+            try:
+                # Put just before it exited
+                return queue.get(timeout=1)
+            except Empty:
+                raise RuntimeError("exited with code {} without a result"
+                                   .format(process.exitcode)) from None
+        if time.monotonic() >= deadline:
+            process.terminate()
+            raise RuntimeError("timed out after {}s".format(timeout))
+
+
+def run(args: argparse.Namespace) -> None:
+    """
+    Benchmark every configuration and write the results.
+
+    A configuration whose process fails or times out is reported on stderr
+    and in the `failures` of the results, and the others still run; the
+    exit status is then 1.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = []
+    failures = []
+    with tempfile.TemporaryDirectory(dir=args.data_dir) as data_dir:
+        for rows in args.rows:
+            path = os.path.join(data_dir, "names_{}.csv".format(rows))
+            generate(path, rows, args.seed)
+            for backend in args.backends:
+                densities = args.densities if backend != "stream" else [0.0]
+                for density in densities:
+                    queue = context.Queue()
+                    process = context.Process(target=measure, args=(
+                        path, rows, backend, density, args.samples, queue))
+                    process.start()
+                    try:
+                        result = collect(process, queue, args.timeout)
+                    except RuntimeError as e:
+                        process.join()
+                        failures.append({"rows": rows, "backend": backend,
+                                         "deletion_density": density,
+                                         "exitcode": process.exitcode,
+                                         "error": str(e)})
+                        print("{rows:>11} {backend:<6} deleted={density:.2f} "
+                              "FAILED: {error}".format(
+                                  rows=rows, backend=backend, density=density,
+                                  error=e), file=sys.stderr)
+                        continue
+                    process.join()
+                    results.append(result)
+                    print("{rows:>11} {backend:<6} deleted={density:.2f} "
+                          "load={load:.3f}s rss={rss}KB".format(
+                              rows=rows, backend=backend, density=density,
+                              load=result["cold_load_s"],
+                              rss=result["peak_rss_kb"]), file=sys.stderr)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "samples": args.samples,
+        },
+        "results": results,
+        "failures": failures,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    if failures:
+        sys.exit(1)
+
+
+def flatten(result: Dict) -> Dict[str, float]:
+    """
+    Flatten the metrics of one result into `name: value` pairs.
+    """
+    metrics = {"cold_load_s": result["cold_load_s"],
+               "peak_rss_kb": result["peak_rss_kb"]}
+    if "warm_load_s" in result:
+        metrics["warm_load_s"] = result["warm_load_s"]
+    for operation, stats in result["latency"].items():
+        for stat, value in stats.items():
+            metrics["{}.{}".format(operation, stat)] = value
+    return metrics
+
+
+def compare(args: argparse.Namespace) -> None:
+    """
+    Print the ratio of every metric between two result files.
+    """
+    def load(path):
+        with open(path) as f:
+            return {(r["rows"], r["backend"], r["deletion_density"]): r
+                    for r in json.load(f)["results"]}
+
+    before, after = load(args.before), load(args.after)
+    for key in sorted(before.keys() & after.keys()):
+        print("rows={} backend={} deleted={:.2f}".format(*key))
+        old, new = flatten(before[key]), flatten(after[key])
+        for metric in sorted(old.keys() & new.keys()):
+            ratio = new[metric] / old[metric] if old[metric] else float("nan")
+            print("  {:<34} {:>14.2f} {:>14.2f} {:>7.2f}x".format(
+                metric, old[metric], new[metric], ratio))
+
+
+def main() -> None:
+    """
+    Parse the command line and run the requested command.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmark")
+    run_parser.add_argument("--rows", type=int, nargs="+",
+                            default=[10 ** 4, 10 ** 5, 10 ** 6])
+    run_parser.add_argument("--backends", nargs="+", choices=BACKENDS,
+                            default=list(BACKENDS))
+    run_parser.add_argument("--densities", type=float, nargs="+",
+                            default=[0.0, 0.5, 0.9],
+                            help="fractions of rows deleted for the "
+                                 "get_hyper_index walk")
+    run_parser.add_argument("--samples", type=int, default=1000)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--timeout", type=float, default=3600,
+                            help="seconds a configuration may run")
+    run_parser.add_argument("--data-dir", default=None,
+                            help="where to write the generated CSV files")
+    run_parser.add_argument("-o", "--output", default="benchmark.json")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare",
+                                         help="compare two result files")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
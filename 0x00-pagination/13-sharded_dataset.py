@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+
+"""
+Sharded Dataset
+
+This script splits a CSV file into N partition files described by a small JSON
+manifest, and provides a ShardedDataset that presents the partitions as one
+sequence of rows. Global row ranges are mapped onto shard-local ranges and
+pages that cross a shard boundary are stitched together, so any pagination
+Server works unchanged with `DATA_FILE` pointing at the manifest:
+
+    write_shards("Popular_Baby_Names.csv", 8)
+    server = Server(loader=ShardedDataset)
+    server.DATA_FILE = "Popular_Baby_Names.manifest.json"
+
+With `processes=True` every shard is owned by its own worker process, so
+shards load in parallel and their memory is spread across processes. Slices
+and iteration read whole shard ranges per round trip, and `take` reads any
+set of positions with one round trip per shard. A single `dataset[i]` still
+costs a round trip, so worker processes suit scans and batched reads
+(`rows_at`), not row-at-a-time access.
+
+The workers are shut down by `close()`, or once the dataset is garbage
+collected, so a dataset a Server replaced is released when its last reader
+drops it.
+"""
+
+import csv
+import json
+import os
+import weakref
+from bisect import bisect_right
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Union
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+# Shards loaded by a worker process, keyed by partition file
+_LOADED: Dict[str, Sequence] = {}
+
+
+def read_rows(path: str) -> List[List]:
+    """
+    Read the data rows of a CSV file, the way `Server.dataset()` does.
+
+    Args:
+        path (str): Path to the CSV file.
+
+    Returns:
+        List[List]: The rows, excluding the header.
+    """
+    with open(path) as f:
+        reader = csv.reader(f)
+        dataset = [row for row in reader]
+    return dataset[1:]  # Skip the header
+
+
+def write_shards(path: str, shards: int, out_dir: str = None) -> str:
+    """
+    Split a CSV file into partition files and write their manifest.
+
+    Every partition keeps the header and holds a contiguous run of rows.
+
+    Args:
+        path (str): Path to the CSV file.
+        shards (int): Number of partitions.
+        out_dir (str, optional): Where to write the partitions and the
+            manifest. Defaults to the directory of `path`.
+
+    Returns:
+        str: Path to the manifest.
+    """
+    assert (type(shards) == int) and (shards > 0)
+    out_dir = out_dir or os.path.dirname(os.path.abspath(path))
+    stem = os.path.splitext(os.path.basename(path))[0]
+
+    with open(path, 'rb') as f:
+        total = sum(1 for _ in f) - 1
+    per_shard = max(-(-total // shards), 1)
+
+    entries = []
+    with open(path, 'rb') as source:
+        header = source.readline()
+        for shard in range(shards):
+            name = "{}.part{}.csv".format(stem, shard)
+            rows = 0
+            with open(os.path.join(out_dir, name), 'wb') as part:
+                part.write(header)
+                for line in source:
+                    part.write(line)
+                    rows += 1
+                    if rows == per_shard:
+                        break
+            entries.append({"file": name, "rows": rows})
+
+    manifest = os.path.join(out_dir, stem + MANIFEST_SUFFIX)
+    with open(manifest, 'w') as f:
+        json.dump({"source": os.path.basename(path), "shards": entries}, f,
+                  indent=2)
+    return manifest
+
+
+def _take(path: str, loader: Callable, positions: List[int],
+          loaded: Dict[str, Sequence] = _LOADED) -> List:
+    """
+    Read the rows at some positions of a shard, loading it on first use.
+    """
+    if path not in loaded:
+        loaded[path] = loader(path)
+    rows = loaded[path]
+    return [rows[i] for i in positions]
+
+
+def _release(workers: List[ProcessPoolExecutor],
+             loaded: Dict[str, Sequence]) -> None:
+    """
+    Shut down the worker processes and close the loaded shards of a
+    dataset.
+    """
+    for worker in workers:
+        worker.shutdown()
+    workers.clear()
+    for shard in loaded.values():
+        close = getattr(shard, "close", None)
+        if close is not None:
+            close()
+    loaded.clear()
+
+
+def _read(path: str, loader: Callable, start: int, stop: int,
+          loaded: Dict[str, Sequence] = _LOADED, step: int = 1) -> List:
+    """
+    Read the rows `start:stop:step` of a shard, loading it on first use.
+    """
+    if path not in loaded:
+        loaded[path] = loader(path)
+    return loaded[path][start:stop:step]
+
+
+class ShardedDataset(Sequence):
+    """
+    Read-only sequence of rows spread over the partitions of a manifest.
+    """
+
+    def __init__(self, manifest: str, loader: Callable = read_rows,
+                 processes: bool = False):
+        """
+        Read the manifest.
+
+        Args:
+            manifest (str): Path to a manifest written by `write_shards`.
+            loader (Callable, optional): Loads one partition file, e.g.
+                `MmapDataset`. Must be picklable when `processes` is set.
+                Defaults to `read_rows`.
+            processes (bool, optional): Serve every shard from its own
+                worker process. Defaults to False.
+        """
+        self.__closed = False
+        with open(manifest) as f:
+            entries = json.load(f)["shards"]
+        base = os.path.dirname(os.path.abspath(manifest))
+        self.paths = [os.path.join(base, entry["file"]) for entry in entries]
+        self.counts = [entry["rows"] for entry in entries]
+        self.__starts = [0] + list(accumulate(self.counts))
+        self.__loader = loader
+        self.__loaded = {}
+        self.__workers = None
+        if processes:
+            self.__workers = [ProcessPoolExecutor(max_workers=1)
+                              for _ in self.paths]
+        self.__release = weakref.finalize(self, _release,
+                                          self.__workers or [],
+                                          self.__loaded)
+        self.load()
+
+    def __check(self) -> None:
+        """
+        Refuse reads once the dataset is closed.
+        """
+        if self.__closed:
+            raise ValueError("operation on a closed ShardedDataset")
+
+    def load(self) -> None:
+        """
+        Load every shard, in parallel when using worker processes.
+        """
+        self.__check()
+        if self.__workers is None:
+            for path in self.paths:
+                _read(path, self.__loader, 0, 0, self.__loaded)
+            return
+        futures = [worker.submit(_read, path, self.__loader, 0, 0)
+                   for worker, path in zip(self.__workers, self.paths)]
+        for future in futures:
+            future.result()
+
+    def __len__(self) -> int:
+        """
+        Number of rows over all shards.
+        """
+        return self.__starts[-1]
+
+    def locate(self, start: int, stop: int) -> List[Tuple[int, int, int]]:
+        """
+        Map a global row range onto shard-local ranges.
+
+        Args:
+            start (int): Index of the first row (inclusive).
+            stop (int): Index of the last row (exclusive).
+
+        Returns:
+            List[Tuple[int, int, int]]: `(shard, local_start, local_stop)`
+            for every shard the range touches, in order.
+        """
+        ranges = []
+        shard = bisect_right(self.__starts, start) - 1
+        while start < stop and shard < len(self.paths):
+            offset = self.__starts[shard]
+            local_stop = min(stop, self.__starts[shard + 1]) - offset
+            if start - offset < local_stop:
+                ranges.append((shard, start - offset, local_stop))
+            start = offset + local_stop
+            shard += 1
+        return ranges
+
+    def __fetch(self, start: int, stop: int, step: int = 1) -> List:
+        """
+        Read every `step`-th row of a global range, stitching shards
+        together with one read per shard.
+        """
+        self.__check()
+        ranges = []
+        for shard, low, high in self.locate(start, stop):
+            # First row of the shard that falls on the step
+            low += (start - self.__starts[shard] - low) % step
+            if low < high:
+                ranges.append((shard, low, high))
+        if self.__workers is None:
+            parts = [_read(self.paths[shard], self.__loader, low, high,
+                           self.__loaded, step)
+                     for shard, low, high in ranges]
+        else:
+            futures = [self.__workers[shard].submit(
+                _read, self.paths[shard], self.__loader, low, high,
+                step=step)
+                for shard, low, high in ranges]
+            parts = [future.result() for future in futures]
+        return [row for part in parts for row in part]
+
+    def __iter__(self) -> Iterator[List]:
+        """
+        Iterate over the rows a whole shard at a time, reading the next
+        shard while the current one is consumed.
+        """
+        self.__check()
+        if self.__workers is None:
+            for path, count in zip(self.paths, self.counts):
+                yield from _read(path, self.__loader, 0, count,
+                                 self.__loaded)
+            return
+        pending = None
+        for shard in range(len(self.paths) + 1):
+            current = pending
+            pending = None
+            if shard < len(self.paths):
+                pending = self.__workers[shard].submit(
+                    _read, self.paths[shard], self.__loader, 0,
+                    self.counts[shard])
+            if current is not None:
+                yield from current.result()
+
+    def take(self, positions: Iterable[int]) -> List[List]:
+        """
+        Get the rows at some positions with one read per shard.
+
+        Args:
+            positions (Iterable[int]): Global row positions, in any order.
+
+        Returns:
+            List[List]: The rows, in the order of `positions`.
+
+        Raises:
+            IndexError: If a position is out of range.
+        """
+        self.__check()
+        positions = list(positions)
+        wanted = {}
+        for slot, position in enumerate(positions):
+            if position < 0:
+                position += len(self)
+            if not 0 <= position < len(self):
+                raise IndexError("dataset index out of range")
+            shard = bisect_right(self.__starts, position) - 1
+            slots, local = wanted.setdefault(shard, ([], []))
+            slots.append(slot)
+            local.append(position - self.__starts[shard])
+
+        rows = [None] * len(positions)
+        if self.__workers is None:
+            parts = [(slots, _take(self.paths[shard], self.__loader, local,
+                                   self.__loaded))
+                     for shard, (slots, local) in wanted.items()]
+        else:
+            futures = [(slots, self.__workers[shard].submit(
+                _take, self.paths[shard], self.__loader, local))
+                for shard, (slots, local) in wanted.items()]
+            parts = [(slots, future.result()) for slots, future in futures]
+        for slots, part in parts:
+            for slot, row in zip(slots, part):
+                rows[slot] = row
+        return rows
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[List, List[List]]:
+        """
+        Get a single row or a slice of rows.
+
+        Args:
+            key (int | slice): Global row position or slice of positions.
+
+        Returns:
+            List | List[List]: The row, or a list of rows.
+        """
+        if isinstance(key, slice):
+            positions = range(*key.indices(len(self)))
+            if not positions:
+                return []
+            if positions.step < 0:
+                return self.__fetch(positions[-1], positions[0] + 1,
+                                    -positions.step)[::-1]
+            return self.__fetch(positions.start, positions.stop,
+                                positions.step)
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("dataset index out of range")
+        return self.__fetch(key, key + 1)[0]
+
+    def close(self) -> None:
+        """
+        Shut down the worker processes and drop the loaded shards. Reading
+        from a closed dataset raises ValueError.
+        """
+        self.__closed = True
+        self.__workers = None
+        self.__release()
@@ -6,11 +6,46 @@ Server Pagination
 This script provides a Server class to paginate a dataset of popular baby names
 from a CSV file. It includes a function to calculate the start and end indices
 for pagination.
+
+Besides page numbers, the Server supports opaque keyset cursors. Cursor
+pages walk the rows in file order, like `get_page`, and a cursor holds the
+position of the next row together with the key of the last row served and
+the dataset version. On the version it was issued for, a cursor resumes at
+its position in O(page_size) without counting the dataset. After a reload
+the row before that position is checked against the key: if it still
+matches the walk resumes there, otherwise the key is looked for outward
+from the old position, so rows inserted or deleted elsewhere do not make the
+walk skip or repeat rows.
+
+`reload()` loads a new version of the dataset and swaps it in atomically;
+responses report the version they were served from. The replaced dataset is
+not closed: requests in flight, `PageView`s and `iter_pages` walks may still
+read it, and it is released once the last of them drops it.
+
+`get_hyper_json` returns `get_hyper` encoded as JSON, optionally through a
+`PageCache` keyed on the dataset version, page and page size, and
+`get_hyper_encoded` returns it in the binary columnar page encoding.
 """
 
+import base64
+import binascii
 import csv
+import gc
+import json
 import math
-from typing import List, Tuple, Dict
+import threading
+from typing import (Callable, Dict, Iterable, Iterator, List, Optional,
+                    Sequence, Tuple)
+
+file_version = __import__('dataset_files').file_version
+PageView = __import__('10-page_view').PageView
+PageCache = __import__('11-page_cache').PageCache
+ColumnarBlock = __import__('14-page_encoding').ColumnarBlock
+COLUMNS = __import__('6-secondary_index').COLUMNS
+NUMERIC_COLUMNS = __import__('6-secondary_index').NUMERIC_COLUMNS
+
+_NUMERIC_FIELDS = tuple(column in NUMERIC_COLUMNS for column in COLUMNS)
+CURSOR_BLOCK = 256  # Rows read at a time when a cursor looks for its key
 
 
 def index_range(page: int, page_size: int) -> Tuple[int, int]:
@@ -31,14 +66,94 @@ def index_range(page: int, page_size: int) -> Tuple[int, int]:
     return (start_index, end_index)
 
 
+def row_key(row: Sequence) -> Tuple:
+    """
+    Get the key that identifies rows for cursor pagination.
+
+    Args:
+        row (Sequence): A row of the dataset.
+
+    Returns:
+        Tuple: Every column of the row, numeric columns as integers.
+    """
+    return tuple(int(cell) if numeric else str(cell)
+                 for cell, numeric in zip(row, _NUMERIC_FIELDS))
+
+
+def encode_cursor(version: str, index: int, key: Sequence,
+                  occurrence: int = 0) -> str:
+    """
+    Encode the position of a cursor and the last row it served into an
+    opaque cursor.
+
+    Args:
+        version (str): The dataset version the position belongs to.
+        index (int): The position of the next row to return.
+        key (Sequence): The `row_key` of the last row served.
+        occurrence (int, optional): How many rows with the same key come
+            right before it. Defaults to 0.
+
+    Returns:
+        str: A URL-safe cursor.
+    """
+    raw = json.dumps([version, index, list(key), occurrence]).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int, Tuple, int]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor to decode.
+
+    Returns:
+        Tuple[str, int, Tuple, int]: The dataset version, the position of
+        the next row, and the key and occurrence of the last row served.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        version, index, key, occurrence = json.loads(raw)
+        valid = (isinstance(version, str) and type(index) == int and
+                 type(occurrence) == int and isinstance(key, list) and
+                 len(key) == len(_NUMERIC_FIELDS) and
+                 all(type(cell) == (int if numeric else str)
+                     for cell, numeric in zip(key, _NUMERIC_FIELDS)))
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        valid = False
+    if not valid or index < 0 or occurrence < 0:
+        raise ValueError("invalid cursor: {!r}".format(cursor))
+    return version, index, tuple(key), occurrence
+
+
 class Server:
     """
     Server class to paginate a database of popular baby names.
     """
     DATA_FILE = "Popular_Baby_Names.csv"
 
-    def __init__(self):
-        self.__dataset = None
+    def __init__(self, loader: Callable[[str], Sequence] = None,
+                 page_cache: PageCache = None):
+        """
+        Initialize the server.
+
+        Args:
+            loader (Callable[[str], Sequence], optional): Builds the dataset
+                from `DATA_FILE` instead of reading it with `csv.reader`,
+                e.g. `MmapDataset`. Defaults to None.
+            page_cache (PageCache, optional): Cache for `get_hyper_json`
+                responses. Defaults to None (no caching).
+        """
+        self.__loader = loader
+        self.__page_cache = page_cache
+        self.__block = None
+        self.__snapshot = None
+        self.__lock = threading.Lock()
+        self.__reload_lock = threading.Lock()
 
     def dataset(self) -> List[List]:
         """
@@ -49,13 +164,112 @@ class Server:
         Returns:
             List[List]: The cached dataset, excluding the header.
         """
-        if self.__dataset is None:
-            with open(self.DATA_FILE) as f:
-                reader = csv.reader(f)
-                dataset = [row for row in reader]
-            self.__dataset = dataset[1:]  # Skip the header
+        return self.snapshot()[1]
+
+    def load_snapshot(self) -> Tuple[str, Sequence]:
+        """
+        Read `DATA_FILE` and tag it with its version, without swapping it
+        in.
+
+        Returns:
+            Tuple[str, Sequence]: The version and the dataset.
+        """
+        version = file_version(self.DATA_FILE)
+        if self.__loader is not None:
+            return version, self.__loader(self.DATA_FILE)
+        with open(self.DATA_FILE) as f:
+            reader = csv.reader(f)
+            dataset = [row for row in reader]
+        return version, dataset[1:]  # Skip the header
+
+    def snapshot(self) -> Tuple[str, Sequence]:
+        """
+        Cached dataset together with its version.
+
+        Read both at once so a concurrent `reload()` cannot pair the
+        version of one dataset with the rows of another.
+
+        Returns:
+            Tuple[str, Sequence]: The version and the dataset.
+        """
+        if self.__snapshot is None:
+            with self.__lock:
+                if self.__snapshot is None:
+                    self.__snapshot = self.load_snapshot()
+
+        return self.__snapshot
+
+    def dataset_version(self) -> str:
+        """
+        Version of the cached dataset.
+
+        Returns:
+            str: The version token of `DATA_FILE` when it was loaded.
+        """
+        return self.snapshot()[0]
+
+    def reload(self) -> str:
+        """
+        Load `DATA_FILE` again and swap the new dataset in.
+
+        The new dataset is fully loaded, without holding the lock requests
+        take, before it replaces the old one, so concurrent requests see
+        either version but never a partial one. The old dataset is left
+        open for the readers still on it.
+
+        Returns:
+            str: The version of the new dataset.
+        """
+        with self.__reload_lock:
+            version, data_set = self.load_snapshot()
+            self.__swap((version, data_set))
+        return version
+
+    def swap(self, version: str, data_set: Sequence) -> Optional[Sequence]:
+        """
+        Swap in a dataset loaded with `load_snapshot()`.
+
+        The replaced dataset is returned open: readers may still be on it,
+        and it is released once the last of them drops it.
+
+        Args:
+            version (str): The version of the dataset.
+            data_set (Sequence): The dataset.
+
+        Returns:
+            Optional[Sequence]: The replaced dataset, if one was loaded.
+        """
+        return self.__swap((version, data_set))
+
+    def __swap(self, snapshot: Tuple[str, Sequence]) -> Optional[Sequence]:
+        """
+        Publish a snapshot and return the replaced dataset, dropping the
+        cached block of the old one.
+        """
+        with self.__lock:
+            old, self.__snapshot = self.__snapshot, snapshot
+            self.__block = None
+            if self.__page_cache is not None:
+                self.__page_cache.clear()
+        return old[1] if old is not None else None
 
-        return self.__dataset
+    def warm_up(self, freeze: bool = True) -> None:
+        """
+        Load the dataset ahead of the first request.
+
+        Call it at import time, or in the master process before forking
+        workers, so the parse happens once. With `freeze`, the loaded
+        objects are moved out of the garbage collector's reach with
+        `gc.freeze()`, so collections in the workers do not write to (and
+        un-share) the copy-on-write pages holding them.
+
+        Args:
+            freeze (bool, optional): Freeze the garbage collector's tracked
+                objects after loading. Defaults to True.
+        """
+        self.dataset()
+        if freeze:
+            gc.freeze()
 
     def get_page(self, page: int = 1, page_size: int = 10) -> List[List]:
         """
@@ -77,7 +291,8 @@ class Server:
 
         return data_set[start_index:end_index]
 
-    def get_hyper(self, page: int = 1, page_size: int = 10) -> Dict:
+    def get_hyper(self, page: int = 1, page_size: int = 10,
+                  version: str = None) -> Dict:
         """
         Get hypermedia pagination details for a page of the dataset.
 
@@ -85,12 +300,121 @@ class Server:
             page (int, optional): The page number to retrieve. Defaults to 1.
             page_size (int, optional): The number of items per page.
                 Defaults to 10.
+            version (str, optional): The `version` of the previous page,
+                to detect that the dataset was reloaded in between.
+                Defaults to None.
 
         Returns:
             Dict[str, object]: A dictionary containing pagination details.
         """
-        data = self.get_page(page, page_size)
-        total_pages = math.ceil(len(self.dataset()) / page_size)
+        assert (type(page) == int) and (page > 0)
+        assert (type(page_size) == int) and (page_size > 0)
+
+        current, data_set = self.snapshot()
+        start_index, end_index = index_range(page, page_size)
+        data = data_set[start_index:end_index]
+        total_pages = math.ceil(len(data_set) / page_size)
+        return self.__hyper(data, page, total_pages, current, version)
+
+    def get_hyper_json(self, page: int = 1, page_size: int = 10) -> bytes:
+        """
+        Get `get_hyper` for a page, encoded as UTF-8 JSON.
+
+        With a page cache, the encoded response is cached per dataset
+        version, so hot pages cost a single lookup.
+
+        Args:
+            page (int, optional): The page number to retrieve. Defaults to 1.
+            page_size (int, optional): The number of items per page.
+                Defaults to 10.
+
+        Returns:
+            bytes: The encoded hypermedia dictionary.
+        """
+        assert (type(page) == int) and (page > 0)
+        assert (type(page_size) == int) and (page_size > 0)
+
+        current, data_set = self.snapshot()
+        key = (current, page, page_size)
+        if self.__page_cache is not None:
+            body = self.__page_cache.get(key)
+            if body is not None:
+                return body
+
+        start_index, end_index = index_range(page, page_size)
+        data = data_set[start_index:end_index]
+        total_pages = math.ceil(len(data_set) / page_size)
+        hyper = self.__hyper(data, page, total_pages, current, None)
+        body = json.dumps(hyper).encode()
+        if self.__page_cache is not None:
+            self.__page_cache.put(key, body)
+        return body
+
+    def columnar_block(self) -> ColumnarBlock:
+        """
+        Cached binary encoding of the whole dataset.
+
+        Returns:
+            ColumnarBlock: The encoded columns pages are sliced from.
+        """
+        return self.__columnar()[1]
+
+    def __columnar(self) -> Tuple[str, ColumnarBlock]:
+        """
+        Cached block of the current snapshot, with the version it encodes.
+
+        The block is encoded without holding the lock, so other requests
+        and reloads are not held up by it, and is only published if its
+        snapshot is still the current one. Concurrent first requests may
+        each encode it.
+        """
+        snapshot = self.snapshot()
+        current, data_set = snapshot
+        cached = self.__block
+        if cached is None or cached[1].dataset is not data_set:
+            block = ColumnarBlock(data_set)
+            with self.__lock:
+                cached = self.__block
+                if cached is None or cached[1].dataset is not data_set:
+                    cached = (current, block)
+                    if self.__snapshot is snapshot:
+                        self.__block = cached
+
+        return cached
+
+    def get_hyper_encoded(self, page: int = 1, page_size: int = 10) -> bytes:
+        """
+        Get a page and its hypermedia details in the binary page encoding.
+
+        The rows are zero-copy slices of a block encoded once per dataset
+        version, and the other `get_hyper` fields are carried as metadata;
+        decode it with `decode_page`.
+
+        Args:
+            page (int, optional): The page number to retrieve. Defaults to 1.
+            page_size (int, optional): The number of items per page.
+                Defaults to 10.
+
+        Returns:
+            bytes: The encoded page.
+        """
+        assert (type(page) == int) and (page > 0)
+        assert (type(page_size) == int) and (page_size > 0)
+
+        current, block = self.__columnar()
+        start_index, end_index = index_range(page, page_size)
+        total_pages = math.ceil(block.rows / page_size)
+        meta = self.__hyper(PageView(block.dataset, start_index, end_index),
+                            page, total_pages, current, None)
+        del meta["data"]
+        return block.page(start_index, end_index, meta)
+
+    @staticmethod
+    def __hyper(data: Sequence, page: int, total_pages: int, current: str,
+                version: Optional[str]) -> Dict:
+        """
+        Build the hypermedia dictionary of a page.
+        """
         next_page = (page + 1) if page < total_pages else None
         prev_page = (page - 1) if page > 1 else None
         page_size = len(data)
@@ -101,5 +425,187 @@ class Server:
             "next_page": next_page,
             "prev_page": prev_page,
             "total_pages": total_pages,
+            "version": current,
+            "version_changed": version is not None and version != current,
         }
         return my_dict
+
+    def get_pages(self, pages: Iterable[int], page_size: int = 10,
+                  version: str = None) -> List[Dict]:
+        """
+        Get hypermedia pagination details for several pages at once.
+
+        All pages are served from the same dataset version, validation and
+        `total_pages` are computed once, and `data` is a `PageView` rather
+        than a copied list.
+
+        Args:
+            pages (Iterable[int]): The page numbers to retrieve.
+            page_size (int, optional): The number of items per page.
+                Defaults to 10.
+            version (str, optional): The `version` of a previous page.
+                Defaults to None.
+
+        Returns:
+            List[Dict]: One dictionary per page, as returned by `get_hyper`.
+        """
+        assert (type(page_size) == int) and (page_size > 0)
+
+        current, data_set = self.snapshot()
+        total_pages = math.ceil(len(data_set) / page_size)
+        results = []
+        for page in pages:
+            assert (type(page) == int) and (page > 0)
+            start_index, end_index = index_range(page, page_size)
+            data = PageView(data_set, start_index, end_index)
+            results.append(
+                self.__hyper(data, page, total_pages, current, version))
+        return results
+
+    def iter_pages(self, page_size: int = 10,
+                   start: int = 1) -> Iterator[Dict]:
+        """
+        Walk the dataset page by page.
+
+        The walk stays on the dataset version it started with, even if the
+        dataset is reloaded meanwhile, and `data` is a `PageView`.
+
+        Args:
+            page_size (int, optional): The number of items per page.
+                Defaults to 10.
+            start (int, optional): The first page number. Defaults to 1.
+
+        Yields:
+            Dict: The hypermedia dictionary of each page, up to the last.
+        """
+        assert (type(page_size) == int) and (page_size > 0)
+        assert (type(start) == int) and (start > 0)
+
+        current, data_set = self.snapshot()
+        total_pages = math.ceil(len(data_set) / page_size)
+        for page in range(start, total_pages + 1):
+            start_index, end_index = index_range(page, page_size)
+            data = PageView(data_set, start_index, end_index)
+            yield self.__hyper(data, page, total_pages, current, None)
+
+    @staticmethod
+    def __run(data_set: Sequence, start: int, key: Tuple,
+              step: int) -> int:
+        """
+        Count the rows with a key next to a position, going forward from
+        `start` with `step` 1 or backward from `start - 1` with `step` -1.
+
+        Rows are read in blocks that grow from a single row, so the usual
+        run of one row costs one read.
+        """
+        run, size = 0, 1
+        while True:
+            if step > 0:
+                block = data_set[start + run:start + run + size]
+            else:
+                block = data_set[max(start - run - size, 0):start - run]
+                block = block[::-1]
+            for row in block:
+                if row_key(row) != key:
+                    return run
+                run += 1
+            if len(block) < size:
+                return run
+            size = min(size * 2, CURSOR_BLOCK)
+
+    @classmethod
+    def __seek(cls, data_set: Sequence, index: int, key: Tuple,
+               occurrence: int) -> int:
+        """
+        Position of the row after the last one a cursor served.
+
+        The row before `index` and the `occurrence` rows before it are
+        checked first. If they no longer have the cursor's key, rows are
+        scanned outward from `index`, a block at a time, and the walk
+        resumes after the matching row of the nearest run with the key; if
+        the key is gone, it resumes at `index`.
+        """
+        size = len(data_set)
+        if occurrence < index <= size:
+            anchor = data_set[index - occurrence - 1:index]
+            if all(row_key(row) == key for row in anchor):
+                return index
+
+        index = min(index, size)
+        after, before = index, index
+        while after < size or before > 0:
+            found = None
+            block = data_set[after:after + CURSOR_BLOCK]
+            for offset, row in enumerate(block):
+                if row_key(row) == key:
+                    found = after + offset
+                    break
+            after += CURSOR_BLOCK
+            if found is None:
+                low = max(before - CURSOR_BLOCK, 0)
+                block = data_set[low:before]
+                for offset in range(len(block) - 1, -1, -1):
+                    if row_key(block[offset]) == key:
+                        found = low + offset
+                        break
+                before = low
+            if found is not None:
+                first = found - cls.__run(data_set, found, key, -1)
+                last = found + cls.__run(data_set, found + 1, key, 1)
+                return min(first + occurrence, last) + 1
+        return index
+
+    def get_cursor_page(self, cursor: Optional[str] = None,
+                        page_size: int = 10) -> Dict:
+        """
+        Get a page of the dataset, in file order, starting at a cursor.
+
+        The cursor works like `next_index` in deletion-resilient pagination:
+        it holds the position of the next row, so resuming costs
+        O(page_size), no total count is computed, and the pages are the
+        rows `get_page` returns. If the dataset was reloaded since the
+        cursor was issued, `version_changed` is set and the row before that
+        position is checked against the key of the last row served; if it
+        changed, the walk resumes right after the row with that key nearest
+        to the old position, so rows inserted and deleted elsewhere shift
+        nothing. Finding a row that moved costs a scan as far as it moved.
+
+        Args:
+            cursor (str, optional): A `next_cursor` from a previous page, or
+                None for the first page. Defaults to None.
+            page_size (int, optional): The number of items per page.
+                Defaults to 10.
+
+        Returns:
+            Dict[str, object]: A dictionary containing the page, its
+            `next_cursor` (None on the last page), the dataset `version` and
+            whether the version changed since the cursor was issued.
+        """
+        assert (type(page_size) == int) and (page_size > 0)
+
+        version, data_set = self.snapshot()
+        cursor_version, start_index = version, 0
+        if cursor is not None:
+            cursor_version, start_index, key, occurrence = \
+                decode_cursor(cursor)
+            if cursor_version != version:
+                start_index = self.__seek(data_set, start_index, key,
+                                          occurrence)
+
+        data = data_set[start_index:start_index + page_size]
+        end_index = start_index + len(data)
+        next_cursor = None
+        if data and end_index < len(data_set):
+            key = row_key(data[-1])
+            occurrence = self.__run(data, len(data) - 1, key, -1)
+            if occurrence == len(data) - 1:
+                occurrence += self.__run(data_set, start_index, key, -1)
+            next_cursor = encode_cursor(version, end_index, key, occurrence)
+        return {
+            "cursor": cursor,
+            "page_size": len(data),
+            "data": data,
+            "next_cursor": next_cursor,
+            "version": version,
+            "version_changed": cursor_version != version,
+        }
@@ -1,45 +1,352 @@
 #!/usr/bin/env python3
 """
 Deletion-resilient hypermedia pagination
+
+`reload()` swaps in a new version of the dataset atomically; responses report
+the version they were served from. The replaced dataset is left open for the
+requests and read-ahead still on it, and released once they drop it.
+
+Live-row totals are kept up to date on every delete/undelete, so responses
+include `total_pages` and `count()` answers without scanning. Other filters
+are counted over the matches of a SecondaryIndex, and the result is kept
+until the next delete/undelete.
+
+With `prefetch`, a client that asks for the `next_index` it was just given is
+treated as walking the dataset: the following pages are read ahead in the
+background into a small buffer, so its next requests are served from memory.
+Buffered pages are tagged with the `LiveIndex` mutation count they were read
+at, and are only served while no row has been deleted or restored since,
+whichever way the deletion was made.
 """
 
 import csv
+import gc
 import math
-from typing import List, Dict
+import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import (Callable, List, Dict, Mapping, Optional, Sequence,
+                    Tuple)
+
+file_version = __import__('dataset_files').file_version
+LiveIndex = __import__('5-live_index').LiveIndex
+COLUMNS = __import__('6-secondary_index').COLUMNS
+NUMERIC_COLUMNS = __import__('6-secondary_index').NUMERIC_COLUMNS
+PREFIX_SUFFIX = __import__('6-secondary_index').PREFIX_SUFFIX
+SecondaryIndex = __import__('6-secondary_index').SecondaryIndex
+column_position = __import__('6-secondary_index').column_position
+row_matcher = __import__('6-secondary_index').row_matcher
+rows_at = __import__('10-page_view').rows_at
 
 
 class Server:
     """Server class to paginate a database of popular baby names.
     """
     DATA_FILE = "Popular_Baby_Names.csv"
+    MAX_COUNTED = 64  # Filtered counts kept between deletes
 
-    def __init__(self):
-        self.__dataset = None
-        self.__indexed_dataset = None
+    def __init__(self, loader: Callable[[str], Sequence] = None,
+                 count_columns: Sequence[str] = (), prefetch: int = 0,
+                 prefetch_buffer: int = 64):
+        """Initialize the server, optionally with a custom dataset loader
+        such as `MmapDataset`, and with the columns (e.g. `"year"`,
+        `"gender"`) whose per-value live counts should be maintained
 
-    def dataset(self) -> List[List]:
-        """Cached dataset
+        `prefetch` is how many pages to read ahead of a sequential
+        `get_hyper_index` walk (0 disables it); at most `prefetch_buffer`
+        read-ahead pages are kept.
+        """
+        assert (type(prefetch) == int) and (prefetch >= 0)
+        assert (type(prefetch_buffer) == int) and (prefetch_buffer > 0)
+        self.__loader = loader
+        self.__count_fields = [column_position(c) for c in count_columns]
+        self.__snapshot = None
+        self.__index = None
+        self.__counted = None
+        self.__lock = threading.Lock()
+        self.__reload_lock = threading.Lock()
+        self.__prefetch = prefetch
+        self.__buffer_size = prefetch_buffer
+        self.__buffer = OrderedDict()
+        self.__expected = OrderedDict()
+        self.__pending = set()
+        self.__buffer_lock = threading.Lock()
+        self.__generation = 0
+        self.__executor = None
+
+    def __load(self) -> Tuple[str, LiveIndex]:
+        """Read `DATA_FILE`, index it and tag it with its version
         """
-        if self.__dataset is None:
+        version = file_version(self.DATA_FILE)
+        if self.__loader is not None:
+            dataset = self.__loader(self.DATA_FILE)
+        else:
             with open(self.DATA_FILE) as f:
                 reader = csv.reader(f)
-                dataset = [row for row in reader]
-            self.__dataset = dataset[1:]
+                dataset = [row for row in reader][1:]
+        return self.__indexed(version, dataset)
 
-        return self.__dataset
+    def __indexed(self, version: str, dataset: Sequence
+                  ) -> Tuple[str, LiveIndex]:
+        """Index a loaded dataset for deletion-resilient pagination
+        """
+        return version, LiveIndex(dataset, self.__count_fields)
+
+    def snapshot(self) -> Tuple[str, LiveIndex]:
+        """Cached version and indexed dataset, read together
+        """
+        if self.__snapshot is None:
+            with self.__lock:
+                if self.__snapshot is None:
+                    self.__snapshot = self.__load()
+        return self.__snapshot
+
+    def dataset(self) -> List[List]:
+        """Cached dataset
+        """
+        return self.snapshot()[1].dataset
 
-    def indexed_dataset(self) -> Dict[int, List]:
+    def dataset_version(self) -> str:
+        """Version token of `DATA_FILE` when the dataset was loaded
+        """
+        return self.snapshot()[0]
+
+    def reload(self) -> str:
+        """Load `DATA_FILE` again and swap it in once fully indexed
+
+        The new version is loaded without holding the lock requests take,
+        and the old dataset is left open for the readers still on it.
+        Deletions made on the previous version are dropped with it. Returns
+        the new version.
+        """
+        with self.__reload_lock:
+            snapshot = self.__load()
+            self.__swap(snapshot)
+        return snapshot[0]
+
+    def swap(self, version: str, dataset: Sequence) -> Optional[Sequence]:
+        """Index an already loaded dataset and swap it in, e.g. one shared
+        with another Server
+
+        Deletions made on the previous version are dropped with it. The
+        replaced dataset is returned open, or None if none was loaded.
+        """
+        with self.__reload_lock:
+            return self.__swap(self.__indexed(version, dataset))
+
+    def __swap(self, snapshot: Tuple[str, LiveIndex]) -> Optional[Sequence]:
+        """Publish an indexed snapshot and return the replaced dataset,
+        dropping the indexes and counts of the old one
+        """
+        with self.__lock:
+            old, self.__snapshot = self.__snapshot, snapshot
+            self.__index = None
+            self.__counted = None
+            self.__invalidate()
+        return old[1].dataset if old is not None else None
+
+    def warm_up(self, freeze: bool = True) -> None:
+        """Load and index the dataset ahead of the first request
+
+        Call it at import time, or before forking workers, so the parse
+        happens once. With `freeze`, `gc.freeze()` keeps the collector from
+        touching the loaded objects so forked workers share them
+        copy-on-write.
+        """
+        self.snapshot()
+        if freeze:
+            gc.freeze()
+
+    def indexed_dataset(self) -> Mapping[int, List]:
         """Dataset indexed by sorting position, starting at 0
+
+        Deleting a key marks that row as deleted.
         """
-        if self.__indexed_dataset is None:
-            dataset = self.dataset()
-            truncated_dataset = dataset[:1000]
-            self.__indexed_dataset = {
-                i: dataset[i] for i in range(len(dataset))
-            }
-        return self.__indexed_dataset
+        return self.snapshot()[1]
 
-    def get_hyper_index(self, index: int = None, page_size: int = 10) -> Dict:
+    def secondary_index(self) -> SecondaryIndex:
+        """Cached secondary indexes over the dataset, deleted rows included
+        """
+        data_set = self.dataset()
+        index = self.__index
+        if index is None or index.dataset is not data_set:
+            with self.__lock:
+                index = self.__index
+                if index is None or index.dataset is not data_set:
+                    index = self.__index = SecondaryIndex(data_set)
+
+        return index
+
+    def delete(self, index: int) -> bool:
+        """Delete the row at a position in O(log n)
+
+        Returns True if the row was live.
+        """
+        indexed_data = self.indexed_dataset()
+        with self.__lock:
+            self.__invalidate()
+            return indexed_data.delete(index)
+
+    def undelete(self, index: int) -> bool:
+        """Restore a deleted row in O(log n)
+
+        Returns True if the row was deleted.
+        """
+        indexed_data = self.indexed_dataset()
+        with self.__lock:
+            self.__invalidate()
+            return indexed_data.undelete(index)
+
+    def __invalidate(self) -> None:
+        """Drop the read-ahead pages, which may include changed rows
+        """
+        with self.__buffer_lock:
+            self.__generation += 1
+            self.__buffer.clear()
+
+    def close(self) -> None:
+        """Stop the read-ahead thread, if it was started
+        """
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+
+    @staticmethod
+    def __read(indexed_data: LiveIndex, index: int,
+               page_size: int) -> Tuple[List[List], int]:
+        """Rows of the page starting at a position, and the next position
+        """
+        dataset = indexed_data.dataset
+        positions, next_index = indexed_data.page(index, page_size)
+        return rows_at(dataset, positions), next_index
+
+    def __buffered(self, key: Tuple, indexed_data: LiveIndex,
+                   pop: bool = False) -> Optional[Tuple[List[List], int]]:
+        """Buffered page and next position for a key, if still current
+
+        A page read before the latest delete or undelete is dropped.
+        Call with the buffer lock held.
+        """
+        entry = self.__buffer.get(key)
+        if entry is None:
+            return None
+        source, mutations, data, next_index = entry
+        if source is not indexed_data or \
+                mutations != indexed_data.mutations:
+            del self.__buffer[key]
+            return None
+        if pop:
+            del self.__buffer[key]
+        return data, next_index
+
+    def __read_ahead(self, current: str, indexed_data: LiveIndex,
+                     index: int, page_size: int, generation: int) -> None:
+        """Read the `prefetch` pages from a position into the buffer
+        """
+        start = (current, index, page_size)
+        try:
+            for _ in range(self.__prefetch):
+                if not 1 <= index <= len(indexed_data.dataset):
+                    return
+                key = (current, index, page_size)
+                with self.__buffer_lock:
+                    buffered = self.__buffered(key, indexed_data)
+                    if buffered is not None:
+                        index = buffered[1]
+                        continue
+                # Read before the page, so a concurrent change is noticed
+                mutations = indexed_data.mutations
+                data, next_index = self.__read(indexed_data, index,
+                                               page_size)
+                with self.__buffer_lock:
+                    if generation != self.__generation:
+                        return
+                    self.__buffer[key] = (indexed_data, mutations, data,
+                                          next_index)
+                    while len(self.__buffer) > self.__buffer_size:
+                        self.__buffer.popitem(last=False)
+                index = next_index
+        finally:
+            with self.__buffer_lock:
+                self.__pending.discard(start)
+
+    def __schedule(self, current: str, indexed_data: LiveIndex, index: int,
+                   page_size: int) -> None:
+        """Start reading ahead from a position unless already under way
+        """
+        key = (current, index, page_size)
+        with self.__buffer_lock:
+            if key in self.__pending or \
+                    self.__buffered(key, indexed_data) is not None:
+                return
+            self.__pending.add(key)
+            generation = self.__generation
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="prefetch")
+        self.__executor.submit(self.__read_ahead, current, indexed_data,
+                               index, page_size, generation)
+
+    def count(self, where: Dict = None, approximate: bool = False,
+              sample_size: int = 1000) -> int:
+        """Count the live rows matching equality or prefix filters
+
+        The total, and a single equality filter on one of `count_columns`,
+        are answered in O(1) from counts kept up to date on delete/undelete.
+        Other filters count the live rows among the matches of the secondary
+        index, and the count is cached until the next delete/undelete; with
+        `approximate` they are estimated from `sample_size` live rows drawn
+        at random.
+        """
+        indexed_data = self.indexed_dataset()
+        if not where:
+            return len(indexed_data)
+        if len(where) == 1:
+            (column, value), = where.items()
+            if column in COLUMNS:
+                counted = indexed_data.count(column_position(column), value)
+                if counted is not None:
+                    return counted
+
+        matches = row_matcher(where)
+        dataset = indexed_data.dataset
+        if approximate:
+            sample = indexed_data.sample(sample_size, random.Random(0))
+            hits = sum(1 for row in rows_at(dataset, sample)
+                       if matches(row))
+            return round(len(indexed_data) * hits / (len(sample) or 1))
+
+        query = tuple(sorted((column, str(value))
+                             for column, value in where.items()))
+        mutations = indexed_data.mutations
+        cached = self.__counted
+        if cached is not None and cached[0] is indexed_data and \
+                cached[1] == mutations and query in cached[2]:
+            return cached[2][query]
+
+        if any(column[:-len(PREFIX_SUFFIX)] in NUMERIC_COLUMNS
+               for column in where if column.endswith(PREFIX_SUFFIX)):
+            # Numeric columns have no prefix index
+            counted = sum(1 for i, row in enumerate(dataset)
+                          if i in indexed_data and matches(row))
+        else:
+            index = self.secondary_index()
+            counted = indexed_data.count_live(index.positions(where))
+        with self.__lock:
+            if indexed_data.mutations == mutations:
+                cached = self.__counted
+                if cached is None or cached[0] is not indexed_data or \
+                        cached[1] != mutations:
+                    cached = self.__counted = (indexed_data, mutations,
+                                               OrderedDict())
+                cached[2][query] = counted
+                if len(cached[2]) > self.MAX_COUNTED:
+                    cached[2].popitem(last=False)
+        return counted
+
+    def get_hyper_index(self, index: int = None, page_size: int = 10,
+                        version: str = None) -> Dict:
         """
     Retrieve a deletion-resilient page of the dataset.
 
@@ -56,6 +363,9 @@ class Server:
         page_size (int, optional): The number of items to include in
                                 the returned
                                    page. Defaults to 10.
+        version (str, optional): The `version` of the previous page, to
+                                 detect that the dataset was reloaded in
+                                 between. Defaults to None.
 
     Returns:
         Dict: A dictionary containing:
@@ -63,27 +373,44 @@ class Server:
             - 'data' (List[List]): The actual page of the dataset.
             - 'page_size' (int): The current page size.
             - 'next_index' (int): The next index to query with.
+            - 'total_pages' (int): The number of pages of live rows.
+            - 'version' (str): The version of the dataset served.
+            - 'version_changed' (bool): Whether `version` differs from the
+              one passed in.
 
     Raises:
         AssertionError: If the provided index is out of the valid range.
     """
-        assert 1 <= index <= len(self.dataset())
-        # if self.__indexed_dataset is None:
-        #     dataset = self.dataset()
-        # next_index = index + page_size
-        # data = (self.dataset())[index: next_index]
-        indexed_data = self.indexed_dataset()
+        current, indexed_data = self.snapshot()
+        dataset = indexed_data.dataset
+        assert 1 <= index <= len(dataset)
 
-        data = []
-        next_index = index
-        while len(data) < page_size and next_index < len(self.dataset()):
-            if next_index in indexed_data:
-                data.append(indexed_data[next_index])
-            next_index += 1
+        if not self.__prefetch:
+            data, next_index = self.__read(indexed_data, index, page_size)
+        else:
+            key = (current, index, page_size)
+            with self.__buffer_lock:
+                buffered = self.__buffered(key, indexed_data, pop=True)
+                sequential = self.__expected.pop(key, None) is not None
+            if buffered is not None:
+                data, next_index = buffered
+            else:
+                data, next_index = self.__read(indexed_data, index,
+                                               page_size)
+            with self.__buffer_lock:
+                self.__expected[(current, next_index, page_size)] = True
+                while len(self.__expected) > self.__buffer_size:
+                    self.__expected.popitem(last=False)
+            if sequential:
+                self.__schedule(current, indexed_data, next_index,
+                                page_size)
         my_dict = {
             'index': index,
             'data': data,
             'page_size': page_size,
-            'next_index': next_index
+            'next_index': next_index,
+            'total_pages': math.ceil(len(indexed_data) / page_size),
+            'version': current,
+            'version_changed': version is not None and version != current,
         }
         return my_dict
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+
+"""
+Memory-mapped Dataset
+
+This script provides a read-only, memory-mapped view of a CSV file that can be
+used as a drop-in replacement for the list of rows returned by
+`Server.dataset()`. Only a line-offset index is built up front; rows are
+decoded on demand, so a page costs O(page_size) no matter how large the file
+is, and forked workers share the mapped pages instead of copying them.
+
+The offset index is persisted next to the CSV (`<DATA_FILE>.idx`) so later
+processes map it directly instead of rescanning the file.
+
+A mapped CSV must only be updated by writing a new file and renaming it over
+the old one (`os.replace`), as `write_index` does for the index: truncating
+or rewriting it in place while it is mapped can kill the process with
+SIGBUS when a row past the new end of the file is read.
+"""
+
+import csv
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import Sequence
+from typing import List, Optional, Union
+
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"PGIDX001"
+# magic, CSV size, CSV mtime (ns), row count, fingerprint of head and tail
+INDEX_HEADER = struct.Struct("=8sQQQ16s")
+FINGERPRINT_BLOCK = 64 * 1024
+
+
+def build_offsets(path: str) -> array:
+    """
+    Build the byte offsets of every data row in a CSV file.
+
+    The header line is skipped. The returned array holds one start offset per
+    row followed by a final sentinel equal to the end of the last row, so row
+    `i` spans `offsets[i]:offsets[i + 1]`.
+
+    Args:
+        path (str): Path to the CSV file.
+
+    Returns:
+        array: An array of unsigned 64-bit byte offsets.
+    """
+    offsets = array('Q')
+    with open(path, 'rb') as f:
+        position = len(f.readline())  # Skip the header
+        offsets.append(position)
+        for line in f:
+            position += len(line)
+            offsets.append(position)
+    return offsets
+
+
+def fingerprint(path: str) -> bytes:
+    """
+    Hash the first and last blocks of a file.
+
+    Combined with its size and mtime this catches rewritten files without
+    having to read all of them.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        bytes: A 16-byte digest.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        digest.update(f.read(FINGERPRINT_BLOCK))
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(size - FINGERPRINT_BLOCK, 0))
+        digest.update(f.read(FINGERPRINT_BLOCK))
+    return digest.digest()
+
+
+def index_header(path: str, rows: int) -> bytes:
+    """
+    Build the index header describing the current state of a CSV file.
+
+    Args:
+        path (str): Path to the CSV file.
+        rows (int): Number of data rows in the file.
+
+    Returns:
+        bytes: The packed header.
+    """
+    stat = os.stat(path)
+    return INDEX_HEADER.pack(INDEX_MAGIC, stat.st_size, stat.st_mtime_ns,
+                             rows, fingerprint(path))
+
+
+def write_index(path: str, offsets: array) -> None:
+    """
+    Persist row offsets next to a CSV file.
+
+    The index is written to a temporary file and renamed into place, so
+    readers never see a partial index.
+
+    Args:
+        path (str): Path to the CSV file.
+        offsets (array): Offsets returned by `build_offsets`.
+    """
+    target = path + INDEX_SUFFIX
+    temp = "{}.{}.tmp".format(target, os.getpid())
+    with open(temp, 'wb') as f:
+        f.write(index_header(path, len(offsets) - 1))
+        f.write(offsets.tobytes())
+    os.replace(temp, target)
+
+
+def load_index(path: str) -> Optional[memoryview]:
+    """
+    Map the persisted row offsets of a CSV file, if they are up to date.
+
+    Args:
+        path (str): Path to the CSV file.
+
+    Returns:
+        Optional[memoryview]: The offsets as a read-only view of unsigned
+        64-bit integers, or None if the index is missing or stale.
+    """
+    try:
+        with open(path + INDEX_SUFFIX, 'rb') as f:
+            header = f.read(INDEX_HEADER.size)
+            if len(header) != INDEX_HEADER.size:
+                return None
+            rows = INDEX_HEADER.unpack(header)[3]
+            if header != index_header(path, rows):
+                return None
+            index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    offsets = None
+    try:
+        if len(index_map) == INDEX_HEADER.size + (rows + 1) * 8:
+            offsets = memoryview(index_map)[INDEX_HEADER.size:].cast('Q')
+        return offsets
+    finally:
+        if offsets is None:
+            index_map.close()
+
+
+class MmapDataset(Sequence):
+    """
+    Read-only sequence of CSV rows backed by a memory map of the file.
+
+    Rows must not contain quoted line breaks, since every physical line is
+    treated as one row. Replace the file by renaming a new one over it,
+    never by rewriting it in place (see the module docstring).
+    """
+
+    def __init__(self, path: str, persist_index: bool = True):
+        """
+        Map the file and index its rows.
+
+        Args:
+            path (str): Path to the CSV file.
+            persist_index (bool, optional): Reuse the on-disk offset index,
+                writing it when missing or stale. Defaults to True.
+        """
+        self.path = path
+        self.__closed = False
+        self.__offsets = load_index(path) if persist_index else None
+        if self.__offsets is None:
+            self.__offsets = build_offsets(path)
+            if persist_index:
+                try:
+                    write_index(path, self.__offsets)
+                except OSError:
+                    pass  # Read-only location, keep the in-memory index
+        self.__map = None
+        if self.__offsets[-1] > 0:
+            with open(path, 'rb') as f:
+                self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __check(self) -> None:
+        """
+        Refuse reads once the dataset is closed.
+        """
+        if self.__closed:
+            raise ValueError("dataset is closed")
+
+    def __len__(self) -> int:
+        """
+        Number of data rows, excluding the header.
+        """
+        self.__check()
+        return len(self.__offsets) - 1
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[List, List[List]]:
+        """
+        Decode a single row or a slice of rows.
+
+        Args:
+            key (int | slice): Row position or slice of row positions.
+
+        Returns:
+            List | List[List]: The decoded row, or a list of decoded rows.
+
+        Raises:
+            ValueError: If the dataset is closed.
+        """
+        self.__check()
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            if start >= stop:
+                return []
+            return self.__decode(start, stop)
+
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("dataset index out of range")
+        return self.__decode(key, key + 1)[0]
+
+    def __decode(self, start: int, stop: int) -> List[List]:
+        """
+        Decode the contiguous rows `start:stop` in a single pass.
+
+        Lines are split on line feeds only, as `build_offsets` does, so
+        the other characters `str.splitlines` breaks on stay in their field.
+        """
+        chunk = self.__map[self.__offsets[start]:self.__offsets[stop]]
+        lines = chunk.decode('utf-8').split('\n')
+        if chunk.endswith(b'\n'):
+            lines.pop()
+        return list(csv.reader(
+            line[:-1] if line.endswith('\r') else line for line in lines))
+
+    def close(self) -> None:
+        """
+        Release the memory maps. Reading from a closed dataset raises
+        ValueError.
+        """
+        self.__closed = True
+        if isinstance(self.__offsets, memoryview):
+            self.__offsets.release()
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+
+"""
+Deletion-aware Row Index
+
+This script provides a LiveIndex, a read-only mapping from row position to row
+that supports deleting and restoring rows. Deleted rows are tracked with a
+tombstone bitmap and a Fenwick tree of live rows, so rank/select queries and
+delete/undelete are O(log n), and a page of live rows starting at any
+position is found with one select and a forward scan of the bitmap, long
+runs of deleted rows being jumped with select instead of scanned.
+
+Live-row counts are maintained incrementally, globally and optionally per
+value of selected columns, so totals never require a scan.
+"""
+
+import random
+from array import array
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from typing import Iterator, List, Optional, Tuple
+
+
+class LiveIndex(Mapping):
+    """
+    Mapping of row position to row over the live rows of a dataset.
+
+    `del index[i]` deletes row `i`, matching the behaviour of the plain dict
+    it replaces.
+
+    Attributes:
+        SKIP (int): The longest run of deleted rows `page` scans over
+            before jumping it with select.
+    """
+    SKIP = 4096
+
+    def __init__(self, dataset: Sequence, count_fields: Sequence[int] = ()):
+        """
+        Index every row of the dataset as live.
+
+        Args:
+            dataset (Sequence): The rows to index.
+            count_fields (Sequence[int], optional): Positions of the columns
+                to keep per-value live counts for. Defaults to none.
+        """
+        self.__dataset = dataset
+        size = len(dataset)
+        self.__count_fields = tuple(count_fields)
+        self.__counts = Counter()
+        if self.__count_fields:
+            for row in dataset:
+                for field in self.__count_fields:
+                    self.__counts[(field, str(row[field]))] += 1
+        self.__alive = bytearray(b'\x01') * size
+        self.__live = size
+        self.__mutations = 0
+
+        # Fenwick tree over the alive flags, 1-based, built in O(n)
+        self.__tree = array('q', [0]) * (size + 1)
+        for i in range(1, size + 1):
+            self.__tree[i] += 1
+            parent = i + (i & -i)
+            if parent <= size:
+                self.__tree[parent] += self.__tree[i]
+        self.__top = 1 << (size.bit_length() - 1) if size else 0
+
+    @property
+    def dataset(self) -> Sequence:
+        """
+        The indexed rows, deleted ones included.
+        """
+        return self.__dataset
+
+    @property
+    def mutations(self) -> int:
+        """
+        Number of deletes and undeletes applied so far, to tell whether
+        something derived from the live rows is stale.
+        """
+        return self.__mutations
+
+    def __len__(self) -> int:
+        """
+        Number of live rows.
+        """
+        return self.__live
+
+    def __contains__(self, position: object) -> bool:
+        """
+        Whether a position holds a live row.
+        """
+        return (isinstance(position, int) and
+                0 <= position < len(self.__alive) and
+                self.__alive[position] == 1)
+
+    def __getitem__(self, position: int) -> List:
+        """
+        Get the live row at a position.
+
+        Raises:
+            KeyError: If the position is out of range or deleted.
+        """
+        if position not in self:
+            raise KeyError(position)
+        return self.__dataset[position]
+
+    def __delitem__(self, position: int) -> None:
+        """
+        Delete the live row at a position.
+
+        Raises:
+            KeyError: If the position is out of range or already deleted.
+        """
+        if not self.delete(position):
+            raise KeyError(position)
+
+    def __iter__(self) -> Iterator[int]:
+        """
+        Iterate over live positions in order.
+        """
+        position = self.__alive.find(1)
+        while position != -1:
+            yield position
+            position = self.__alive.find(1, position + 1)
+
+    def __update(self, position: int, delta: int) -> None:
+        """
+        Add `delta` to the Fenwick tree at a 0-based position.
+        """
+        i = position + 1
+        while i < len(self.__tree):
+            self.__tree[i] += delta
+            i += i & -i
+        self.__live += delta
+        self.__mutations += 1
+        if self.__count_fields:
+            row = self.__dataset[position]
+            for field in self.__count_fields:
+                self.__counts[(field, str(row[field]))] += delta
+
+    def delete(self, position: int) -> bool:
+        """
+        Mark a row as deleted in O(log n).
+
+        Args:
+            position (int): The row position.
+
+        Returns:
+            bool: True if the row was live, False otherwise.
+        """
+        if position not in self:
+            return False
+        self.__alive[position] = 0
+        self.__update(position, -1)
+        return True
+
+    def undelete(self, position: int) -> bool:
+        """
+        Restore a deleted row in O(log n).
+
+        Args:
+            position (int): The row position.
+
+        Returns:
+            bool: True if the row was deleted, False otherwise.
+        """
+        if not 0 <= position < len(self.__alive) or self.__alive[position]:
+            return False
+        self.__alive[position] = 1
+        self.__update(position, 1)
+        return True
+
+    def count(self, field: int, value: object) -> Optional[int]:
+        """
+        Count the live rows with a given value in O(1).
+
+        Args:
+            field (int): Position of the column.
+            value (object): The value, compared as a string.
+
+        Returns:
+            Optional[int]: The number of live rows, or None if the column
+            is not one of the counted fields.
+        """
+        if field not in self.__count_fields:
+            return None
+        return self.__counts[(field, str(value))]
+
+    def count_live(self, positions: Sequence) -> int:
+        """
+        Count how many of some positions hold live rows, in O(len).
+
+        Args:
+            positions (Sequence): Row positions in range, e.g. the matches
+                of a secondary index.
+
+        Returns:
+            int: The number of live rows among them.
+        """
+        if self.__live == len(self.__alive):
+            return len(positions)
+        alive = self.__alive
+        return sum(alive[position] for position in positions)
+
+    def sample(self, size: int, rng: random.Random = None) -> List[int]:
+        """
+        Draw live positions uniformly at random, with replacement.
+
+        Args:
+            size (int): How many positions to draw.
+            rng (random.Random, optional): Source of randomness.
+                Defaults to the `random` module.
+
+        Returns:
+            List[int]: The sampled positions, empty if no row is live.
+        """
+        if not self.__live:
+            return []
+        rng = rng or random
+        return [self.select(rng.randrange(self.__live)) for _ in range(size)]
+
+    def rank(self, position: int) -> int:
+        """
+        Count the live rows before a position.
+
+        Args:
+            position (int): The row position, clamped to the dataset.
+
+        Returns:
+            int: The number of live rows in `[0, position)`.
+        """
+        i = min(max(position, 0), len(self.__alive))
+        total = 0
+        while i > 0:
+            total += self.__tree[i]
+            i -= i & -i
+        return total
+
+    def select(self, rank: int) -> Optional[int]:
+        """
+        Find the position of the live row with a given rank.
+
+        Args:
+            rank (int): The 0-based rank among live rows.
+
+        Returns:
+            Optional[int]: The row position, or None if there are not that
+            many live rows.
+        """
+        if not 0 <= rank < self.__live:
+            return None
+        position = 0
+        remaining = rank + 1
+        step = self.__top
+        while step:
+            nxt = position + step
+            if nxt < len(self.__tree) and self.__tree[nxt] < remaining:
+                position = nxt
+                remaining -= self.__tree[nxt]
+            step >>= 1
+        return position
+
+    def page(self, index: int, page_size: int) -> Tuple[List[int], int]:
+        """
+        Find the next `page_size` live rows starting at a position.
+
+        One select finds the first row; the next ones are found by scanning
+        the tombstone bitmap forward with `bytearray.find`, which skips
+        deleted rows a machine word at a time (memchr). A run of deleted
+        rows longer than `SKIP` is jumped over with select instead, so a
+        page costs O(log n + page_size + d / w) with `d` the deleted rows
+        crossed and `w` the word size, and never more than
+        O(page_size * (log n + SKIP / w)) however long the runs are.
+
+        Args:
+            index (int): The position to start from.
+            page_size (int): The number of live rows wanted.
+
+        Returns:
+            Tuple[List[int], int]: The live positions found and the position
+            to resume from.
+        """
+        positions = []
+        alive = self.__alive
+        rank = self.rank(index)
+        position = self.select(rank)
+        while position is not None and len(positions) < page_size:
+            positions.append(position)
+            rank += 1
+            start = position + 1
+            position = alive.find(1, start, start + self.SKIP)
+            if position == -1:
+                position = self.select(rank)
+        if len(positions) < page_size:
+            return positions, len(alive)
+        return positions, positions[-1] + 1
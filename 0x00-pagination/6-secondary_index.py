@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+
+"""
+Secondary Indexes
+
+This script provides secondary indexes over the popular baby names columns so
+pages can be filtered and sorted without scanning the dataset:
+
+- posting lists (ascending row positions) for equality filters,
+- sorted permutations of row positions for `order_by` and prefix filters.
+
+Each index is built once, on first use, and kept for the life of the dataset.
+Queries that combine several conditions are resolved once and cached. Builds
+and the query cache are guarded by a lock, so an index can be shared by the
+threads of a server: concurrent requests wait for one build instead of each
+running their own.
+Result counts come straight from the indexes, or from an independence
+estimate when an approximate count is enough.
+"""
+
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+rows_at = __import__('10-page_view').rows_at
+
+COLUMNS = ("year", "gender", "ethnicity", "name", "count", "rank")
+NUMERIC_COLUMNS = frozenset(("year", "count", "rank"))
+PREFIX_SUFFIX = "__prefix"
+
+
+def column_position(column: str) -> int:
+    """
+    Get the position of a column in a row.
+
+    Args:
+        column (str): One of `COLUMNS`.
+
+    Returns:
+        int: The position of the column.
+
+    Raises:
+        ValueError: If the column is unknown.
+    """
+    if column not in COLUMNS:
+        raise ValueError("unknown column: {!r}".format(column))
+    return COLUMNS.index(column)
+
+
+def row_matcher(where: Dict) -> Callable[[Sequence], bool]:
+    """
+    Build a predicate testing a row against `where` filters.
+
+    Args:
+        where (Dict): Filters in the format accepted by
+            `SecondaryIndex.page`.
+
+    Returns:
+        Callable[[Sequence], bool]: True for the rows matching every filter.
+    """
+    tests = []
+    for column, value in (where or {}).items():
+        prefix = column.endswith(PREFIX_SUFFIX)
+        if prefix:
+            column = column[:-len(PREFIX_SUFFIX)]
+        tests.append((column_position(column), str(value), prefix))
+
+    def matches(row):
+        for field, value, prefix in tests:
+            cell = str(row[field])
+            if not (cell.startswith(value) if prefix else cell == value):
+                return False
+        return True
+
+    return matches
+
+
+class SecondaryIndex:
+    """
+    Lazily built posting lists and sort orders over a dataset.
+    """
+
+    def __init__(self, dataset: Sequence, max_queries: int = 64):
+        """
+        Initialize the index.
+
+        Args:
+            dataset (Sequence): The rows to index.
+            max_queries (int, optional): How many resolved multi-condition
+                queries to keep. Defaults to 64.
+        """
+        self.dataset = dataset
+        self.max_queries = max_queries
+        self.__postings = {}
+        self.__orders = {}
+        self.__queries = OrderedDict()
+        self.__lock = threading.RLock()
+
+    def postings(self, column: str) -> Dict[str, array]:
+        """
+        Get the posting lists of a column.
+
+        Args:
+            column (str): One of `COLUMNS`.
+
+        Returns:
+            Dict[str, array]: Ascending row positions for every value of the
+            column, keyed by the value as a string.
+        """
+        postings = self.__postings.get(column)
+        if postings is not None:
+            return postings
+        field = column_position(column)
+        with self.__lock:
+            if column not in self.__postings:
+                postings = {}
+                for i, row in enumerate(self.dataset):
+                    key = str(row[field])
+                    if key not in postings:
+                        postings[key] = array('L')
+                    postings[key].append(i)
+                self.__postings[column] = postings
+            return self.__postings[column]
+
+    def sort_key(self, column: str) -> Callable[[int], object]:
+        """
+        Get the sort key of a column as a function of row position.
+
+        Args:
+            column (str): One of `COLUMNS`.
+
+        Returns:
+            Callable[[int], object]: Maps a row position to its sort key.
+        """
+        field = column_position(column)
+        cast = int if column in NUMERIC_COLUMNS else str
+        dataset = self.dataset
+
+        def key(position):
+            return cast(dataset[position][field])
+
+        return key
+
+    def order(self, column: str) -> array:
+        """
+        Get the row positions sorted by a column.
+
+        Numeric columns sort as integers. Ties keep file order.
+
+        Args:
+            column (str): One of `COLUMNS`.
+
+        Returns:
+            array: A permutation of row positions.
+        """
+        order = self.__orders.get(column)
+        if order is not None:
+            return order
+        field = column_position(column)
+        cast = int if column in NUMERIC_COLUMNS else str
+        with self.__lock:
+            if column not in self.__orders:
+                # One pass over the rows, not one read per comparison
+                keys = [cast(row[field]) for row in self.dataset]
+                self.__orders[column] = array('L', sorted(
+                    range(len(keys)), key=keys.__getitem__))
+            return self.__orders[column]
+
+    def __prefix_range(self, column: str, prefix: str) -> Tuple[int, int]:
+        """
+        Locate the rows whose column starts with a prefix in `order(column)`.
+        """
+        if column in NUMERIC_COLUMNS:
+            raise ValueError("prefix filter on numeric column: " + column)
+        order = self.order(column)
+        key = self.sort_key(column)
+        low = bisect_left(order, prefix, key=key)
+        high = bisect_left(order, prefix + "\U0010ffff", lo=low, key=key)
+        return low, high
+
+    def __resolve(self, where: Tuple, order_by: Optional[str]) -> Sequence:
+        """
+        Compute the matching row positions in the requested order.
+
+        Single conditions are answered straight from an index; anything else
+        is materialized and cached.
+        """
+        if not where and order_by is None:
+            return range(len(self.dataset))
+        if not where:
+            return self.order(order_by)
+        if len(where) == 1:
+            column, value = where[0]
+            if column.endswith(PREFIX_SUFFIX):
+                column = column[:-len(PREFIX_SUFFIX)]
+                if order_by == column:
+                    low, high = self.__prefix_range(column, value)
+                    return memoryview(self.order(column))[low:high]
+            elif order_by is None:
+                return self.postings(column).get(value, array('L'))
+
+        with self.__lock:
+            query = (where, order_by)
+            positions = self.__queries.get(query)
+            if positions is not None:
+                self.__queries.move_to_end(query)
+                return positions
+            positions = self.__intersect(where, order_by)
+            self.__queries[query] = positions
+            if len(self.__queries) > self.max_queries:
+                self.__queries.popitem(last=False)
+            return positions
+
+    def __intersect(self, where: Tuple, order_by: Optional[str]) -> array:
+        """
+        Intersect the rows matching every condition, in the requested order.
+        """
+        matches = None
+        for column, value in sorted(where, key=self.__selectivity):
+            if column.endswith(PREFIX_SUFFIX):
+                column = column[:-len(PREFIX_SUFFIX)]
+                low, high = self.__prefix_range(column, value)
+                found = self.order(column)[low:high]
+            else:
+                found = self.postings(column).get(value, ())
+            matches = (set(found) if matches is None
+                       else matches.intersection(found))
+            if not matches:
+                break
+
+        positions = sorted(matches)
+        if order_by is not None:
+            field = column_position(order_by)
+            cast = int if order_by in NUMERIC_COLUMNS else str
+            keys = [cast(row[field])
+                    for row in rows_at(self.dataset, positions)]
+            positions = [positions[i] for i in sorted(
+                range(len(keys)), key=keys.__getitem__)]
+        return array('L', positions)
+
+    def __selectivity(self, condition: Tuple[str, str]) -> int:
+        """
+        Estimate how many rows a condition matches, to intersect the smallest
+        posting lists first.
+        """
+        column, value = condition
+        if column.endswith(PREFIX_SUFFIX):
+            return len(self.dataset)
+        return len(self.postings(column).get(value, ()))
+
+    def positions(self, where: Dict = None) -> Sequence:
+        """
+        Get the positions of every row matching filters, in file order.
+
+        Args:
+            where (Dict, optional): Filters, as for `page`. Defaults to None.
+
+        Returns:
+            Sequence: Ascending row positions.
+        """
+        return self.__resolve(self.__conditions(where), None)
+
+    def count(self, where: Dict = None, approximate: bool = False) -> int:
+        """
+        Count the rows matching filters.
+
+        A single condition is counted from its index in O(1) (O(log n) for a
+        prefix). Several conditions are resolved exactly, unless
+        `approximate` is set, in which case the count is estimated from the
+        selectivity of each condition, assuming they are independent.
+
+        Args:
+            where (Dict, optional): Filters, as for `page`. Defaults to None.
+            approximate (bool, optional): Allow an estimate for several
+                conditions. Defaults to False.
+
+        Returns:
+            int: The (estimated) number of matching rows.
+        """
+        conditions = self.__conditions(where)
+        total = len(self.dataset)
+        if len(conditions) > 1 and approximate:
+            estimate = float(total)
+            for column, value in conditions:
+                estimate *= self.__matched(column, value) / (total or 1)
+            return round(estimate)
+        if len(conditions) == 1:
+            return self.__matched(*conditions[0])
+        return len(self.__resolve(conditions, None))
+
+    def __matched(self, column: str, value: str) -> int:
+        """
+        Count the rows matching a single condition.
+        """
+        if column.endswith(PREFIX_SUFFIX):
+            low, high = self.__prefix_range(column[:-len(PREFIX_SUFFIX)],
+                                            value)
+            return high - low
+        return len(self.postings(column).get(value, ()))
+
+    def __conditions(self, where: Optional[Dict]) -> Tuple:
+        """
+        Validate filters and normalize them into a hashable tuple.
+        """
+        conditions = tuple(sorted(
+            (column, str(value)) for column, value in (where or {}).items()))
+        for column, _ in conditions:
+            if column.endswith(PREFIX_SUFFIX):
+                column = column[:-len(PREFIX_SUFFIX)]
+            column_position(column)
+        return conditions
+
+    def page(self, start: int, end: int, where: Dict = None,
+             order_by: str = None) -> List[int]:
+        """
+        Get the row positions of a page of filtered, sorted rows.
+
+        Args:
+            start (int): Index of the first result (inclusive).
+            end (int): Index of the last result (exclusive).
+            where (Dict, optional): Equality filters as `{column: value}`;
+                `{"<column>__prefix": prefix}` filters on a string prefix.
+                Defaults to None.
+            order_by (str, optional): Column to sort by, prefixed with `-`
+                for descending order. Defaults to file order.
+
+        Returns:
+            List[int]: The row positions in the page.
+        """
+        descending = order_by is not None and order_by.startswith("-")
+        if descending:
+            order_by = order_by[1:]
+        if order_by is not None:
+            column_position(order_by)
+        conditions = self.__conditions(where)
+
+        positions = self.__resolve(conditions, order_by)
+        if not descending:
+            return list(positions[start:end])
+        total = len(positions)
+        low, high = max(total - end, 0), max(total - start, 0)
+        return list(positions[low:high])[::-1]
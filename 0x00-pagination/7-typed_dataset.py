@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+"""
+Typed Dataset
+
+This script provides a typed, columnar alternative to the list of lists of
+strings returned by `Server.dataset()`. Numeric columns are parsed once and
+stored in `array` columns, and the repetitive string columns are dictionary
+encoded, so each value is stored once and rows only hold small integer
+codes. Rows come back as `BabyName` named tuples.
+
+Pass it as the dataset loader of any pagination Server:
+
+    server = Server(loader=TypedDataset)
+"""
+
+import csv
+from array import array
+from collections.abc import Sequence
+from typing import Dict, List, NamedTuple, Union
+
+
+class BabyName(NamedTuple):
+    """
+    A typed row of the popular baby names dataset.
+    """
+    year: int
+    gender: str
+    ethnicity: str
+    name: str
+    count: int
+    rank: int
+
+
+class Dictionary:
+    """
+    Dictionary encoding of a string column.
+
+    Codes start as unsigned bytes and are widened when the number of distinct
+    values outgrows them.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty column.
+        """
+        self.values = []
+        self.codes = array('B')
+        self.__lookup: Dict[str, int] = {}
+
+    def append(self, value: str) -> None:
+        """
+        Append a value to the column.
+
+        Args:
+            value (str): The value to encode.
+        """
+        code = self.__lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            self.__lookup[value] = code
+            self.values.append(value)
+            if code == 1 << (8 * self.codes.itemsize):
+                wider = 'H' if self.codes.typecode == 'B' else 'L'
+                self.codes = array(wider, self.codes)
+        self.codes.append(code)
+
+    def __getitem__(self, position: int) -> str:
+        """
+        Decode the value at a row position.
+        """
+        return self.values[self.codes[position]]
+
+    def __len__(self) -> int:
+        """
+        Number of rows in the column.
+        """
+        return len(self.codes)
+
+
+class TypedDataset(Sequence):
+    """
+    Read-only sequence of `BabyName` rows stored column by column.
+    """
+
+    def __init__(self, path: str):
+        """
+        Read and encode a CSV file.
+
+        Args:
+            path (str): Path to the CSV file.
+        """
+        self.path = path
+        self.__year = array('H')
+        self.__gender = Dictionary()
+        self.__ethnicity = Dictionary()
+        self.__name = Dictionary()
+        self.__count = array('L')
+        self.__rank = array('L')
+
+        with open(path, newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)  # Skip the header
+            for row in reader:
+                if not row:
+                    continue
+                year, gender, ethnicity, name, count, rank = row
+                self.__year.append(int(year))
+                self.__gender.append(gender)
+                self.__ethnicity.append(ethnicity)
+                self.__name.append(name)
+                self.__count.append(int(count))
+                self.__rank.append(int(rank))
+
+    def __len__(self) -> int:
+        """
+        Number of rows.
+        """
+        return len(self.__year)
+
+    def __row(self, i: int) -> BabyName:
+        """
+        Assemble the row at a valid, non-negative position.
+        """
+        return BabyName(self.__year[i], self.__gender[i], self.__ethnicity[i],
+                        self.__name[i], self.__count[i], self.__rank[i])
+
+    def __getitem__(self,
+                    key: Union[int, slice]) -> Union[BabyName, List[BabyName]]:
+        """
+        Get a single row or a slice of rows.
+
+        Args:
+            key (int | slice): Row position or slice of row positions.
+
+        Returns:
+            BabyName | List[BabyName]: The row, or a list of rows.
+        """
+        if isinstance(key, slice):
+            return [self.__row(i) for i in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("dataset index out of range")
+        return self.__row(key)
+
+    def column(self, name: str) -> Sequence:
+        """
+        Get a whole column.
+
+        Args:
+            name (str): One of the `BabyName` field names.
+
+        Returns:
+            Sequence: The column values; string columns are decoded lazily.
+        """
+        columns = dict(zip(BabyName._fields, (
+            self.__year, self.__gender, self.__ethnicity, self.__name,
+            self.__count, self.__rank)))
+        if name not in columns:
+            raise ValueError("unknown column: {!r}".format(name))
+        return columns[name]
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+"""
+Dataset Watcher
+
+This script provides a DatasetWatcher that polls the `DATA_FILE` of a
+pagination Server and reloads it when it changes. The new version is loaded
+on the watcher thread and swapped in by `Server.reload()`, so requests keep
+being served from the previous version until the new one is ready. Errors
+while polling are logged and the watcher keeps polling; a version of the file
+that failed to load is not loaded again until the file changes.
+
+An AsyncServer, whose `reload()` is a coroutine, is reloaded on its event
+loop, given as `loop`; stop such a watcher off that loop (e.g. with
+`run_in_executor`), since a poll in progress waits on it.
+"""
+
+import asyncio
+import logging
+import threading
+
+file_version = __import__('dataset_files').file_version
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetWatcher:
+    """
+    Background poller that keeps a Server on the latest `DATA_FILE`.
+    """
+
+    def __init__(self, server, interval: float = 1.0, retries: int = 3,
+                 loop: asyncio.AbstractEventLoop = None):
+        """
+        Initialize the watcher.
+
+        Args:
+            server: Any pagination Server with `dataset_version()` and
+                `reload()`, or an AsyncServer.
+            interval (float, optional): Seconds between polls.
+                Defaults to 1.0.
+            retries (int, optional): How many times one poll reloads a file
+                that keeps changing while it is loaded. Defaults to 3.
+            loop (asyncio.AbstractEventLoop, optional): The event loop of a
+                server whose `reload()` is a coroutine. Defaults to None.
+
+        Raises:
+            ValueError: If `reload()` is a coroutine and `loop` is missing.
+        """
+        assert (type(retries) == int) and (retries > 0)
+        if asyncio.iscoroutinefunction(server.reload) and loop is None:
+            raise ValueError("an async server needs its event loop")
+        self.server = server
+        self.interval = interval
+        self.retries = retries
+        self.loop = loop
+        self.__failed = None
+        self.__stop = threading.Event()
+        self.__thread = None
+
+    def check(self) -> bool:
+        """
+        Reload the dataset if `DATA_FILE` changed since it was loaded.
+
+        A file that changes again while it is being loaded is reloaded, up
+        to `retries` times, until its version is stable; a file that is
+        still changing after that is picked up again by the next poll. If
+        the file cannot be read or parsed, the error is logged and the
+        current version stays in place; the version that failed is skipped
+        until the file changes again, so a malformed file is not parsed on
+        every poll.
+
+        Returns:
+            bool: True if a new version was swapped in.
+        """
+        try:
+            version = file_version(self.server.DATA_FILE)
+        except OSError:
+            logger.warning("cannot read %s", self.server.DATA_FILE,
+                           exc_info=True)
+            return False
+        if version == self.__failed:
+            return False
+        try:
+            if version == self.server.dataset_version():
+                return False
+            for _ in range(self.retries):
+                if self.__reload() == file_version(self.server.DATA_FILE):
+                    break
+        except (OSError, ValueError):
+            logger.exception("loading %s failed, skipping version %s until "
+                             "it changes", self.server.DATA_FILE, version)
+            self.__failed = version
+            return False
+        self.__failed = None
+        return True
+
+    def __reload(self) -> str:
+        """
+        Reload the server, on its event loop if `reload()` is a coroutine.
+        """
+        if not asyncio.iscoroutinefunction(self.server.reload):
+            return self.server.reload()
+        return asyncio.run_coroutine_threadsafe(
+            self.server.reload(), self.loop).result()
+
+    def __run(self) -> None:
+        """
+        Poll until stopped.
+        """
+        while not self.__stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("reloading %s failed",
+                                 self.server.DATA_FILE)
+
+    def start(self) -> "DatasetWatcher":
+        """
+        Start polling on a daemon thread.
+
+        Returns:
+            DatasetWatcher: The watcher itself.
+        """
+        if self.__thread is None:
+            self.__stop.clear()
+            self.__thread = threading.Thread(target=self.__run, daemon=True)
+            self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop polling and wait for the thread to finish.
+        """
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
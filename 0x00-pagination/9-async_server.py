@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+
+"""
+Async Pagination Server
+
+This script provides an AsyncServer with coroutine versions of `get_page`,
+`get_hyper` and `get_hyper_index`. The dataset is loaded once, in a thread
+pool and under an `asyncio.Lock`, so the event loop never blocks on file I/O
+and concurrent first requests all wait on the same load. A reload indexes the
+new dataset before swapping it in, and leaves the old one open for the
+requests still reading it; it is released once they drop it.
+
+With a custom loader, such as `MmapDataset` or `ShardedDataset`, reading a
+page can fault pages in or fetch rows from other processes, so page reads run
+in the thread pool too; pages of the default in-memory dataset are sliced on
+the event loop.
+"""
+
+import asyncio
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Sequence
+
+HyperServer = __import__('2-hypermedia_pagination').Server
+IndexServer = __import__('3-hypermedia_del_pagination').Server
+
+
+class AsyncServer:
+    """
+    Asyncio counterpart of the pagination Server classes.
+    """
+    DATA_FILE = "Popular_Baby_Names.csv"
+
+    def __init__(self, loader: Callable[[str], Sequence] = None,
+                 executor: Executor = None):
+        """
+        Initialize the server.
+
+        Args:
+            loader (Callable[[str], Sequence], optional): Dataset loader, as
+                for the synchronous Server classes. Defaults to None.
+            executor (Executor, optional): Where to run blocking loads, and
+                page reads when a loader is given. Defaults to the event
+                loop's default executor.
+        """
+        self.__executor = executor
+        self.__offload = loader is not None
+        self.__lock = asyncio.Lock()
+        self.__pages = HyperServer(loader)
+        self.__pages.DATA_FILE = self.DATA_FILE
+        self.__index = None
+
+    async def __run(self, func: Callable, *args):
+        """
+        Run a blocking call in the executor.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, func, *args)
+
+    async def __read(self, func: Callable, *args):
+        """
+        Serve a page read, in the executor unless the dataset is an
+        in-memory list.
+        """
+        if self.__offload:
+            return await self.__run(func, *args)
+        return func(*args)
+
+    async def __build(self, version: str, data_set: Sequence
+                      ) -> IndexServer:
+        """
+        Index a dataset for deletion-resilient pagination.
+        """
+        index = IndexServer()
+        index.DATA_FILE = self.DATA_FILE
+        await self.__run(index.swap, version, data_set)
+        return index
+
+    async def load(self) -> None:
+        """
+        Load the dataset once, however many coroutines ask for it.
+        """
+        if self.__index is not None:
+            return
+        async with self.__lock:
+            if self.__index is None:
+                version, data_set = await self.__run(self.__pages.snapshot)
+                self.__index = await self.__build(version, data_set)
+
+    def dataset_version(self) -> str:
+        """
+        Version of the dataset requests are served from, loading it if
+        needed. Blocks; call it off the event loop, e.g. from a watcher.
+
+        Returns:
+            str: The version token of `DATA_FILE` when it was loaded.
+        """
+        return self.__pages.dataset_version()
+
+    async def reload(self) -> str:
+        """
+        Load a new version of `DATA_FILE` and swap it in.
+
+        The new dataset is loaded and indexed first, then swapped in for
+        every kind of request at once; the old dataset is left open for the
+        requests still reading it.
+
+        Returns:
+            str: The version of the new dataset.
+        """
+        async with self.__lock:
+            version, data_set = await self.__run(self.__pages.load_snapshot)
+            index = await self.__build(version, data_set)
+            self.__pages.swap(version, data_set)
+            old_index, self.__index = self.__index, index
+            if old_index is not None:
+                await self.__run(old_index.close)
+        return version
+
+    async def get_page(self, page: int = 1, page_size: int = 10) -> List[List]:
+        """
+        Get a page of the dataset.
+
+        Args:
+            page (int, optional): The page number to retrieve. Defaults to 1.
+            page_size (int, optional): The number of items per page.
+                Defaults to 10.
+
+        Returns:
+            List[List]: A list of rows for the specified page.
+        """
+        await self.load()
+        return await self.__read(self.__pages.get_page, page, page_size)
+
+    async def get_hyper(self, page: int = 1, page_size: int = 10,
+                        version: str = None) -> Dict:
+        """
+        Get hypermedia pagination details for a page of the dataset.
+
+        Args:
+            page (int, optional): The page number to retrieve. Defaults to 1.
+            page_size (int, optional): The number of items per page.
+                Defaults to 10.
+            version (str, optional): The `version` of the previous page.
+                Defaults to None.
+
+        Returns:
+            Dict[str, object]: A dictionary containing pagination details.
+        """
+        await self.load()
+        return await self.__read(self.__pages.get_hyper, page, page_size,
+                                 version)
+
+    async def get_hyper_index(self, index: int = None, page_size: int = 10,
+                              version: str = None) -> Dict:
+        """
+        Retrieve a deletion-resilient page of the dataset.
+
+        Args:
+            index (int, optional): The start index of the return page.
+                Defaults to None.
+            page_size (int, optional): The number of items per page.
+                Defaults to 10.
+            version (str, optional): The `version` of the previous page.
+                Defaults to None.
+
+        Returns:
+            Dict: The page, its `next_index` and the dataset version.
+        """
+        await self.load()
+        return await self.__read(self.__index.get_hyper_index, index,
+                                 page_size, version)
+
+    async def delete(self, index: int) -> bool:
+        """
+        Delete the row at a position for deletion-resilient pagination.
+
+        Args:
+            index (int): The row position.
+
+        Returns:
+            bool: True if the row was live.
+        """
+        await self.load()
+        return self.__index.delete(index)
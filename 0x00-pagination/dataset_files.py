@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+"""
+Dataset Files
+
+Helpers shared by the pagination Servers to version the data file they load
+and to release a dataset no reader needs any more.
+"""
+
+import os
+from typing import Sequence
+
+
+def file_version(path: str) -> str:
+    """
+    Identify the current version of a file from its size and mtime.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        str: A version token that changes whenever the file is rewritten.
+    """
+    stat = os.stat(path)
+    return "{:x}-{:x}".format(stat.st_size, stat.st_mtime_ns)
+
+
+def close_dataset(data_set: Sequence) -> None:
+    """
+    Release what a dataset holds, e.g. the memory maps of an `MmapDataset`
+    or the worker processes of a `ShardedDataset`.
+
+    The Servers do not close the datasets they replace, since readers may
+    still be on them; call it once nothing reads the dataset, e.g. at
+    shutdown.
+
+    Args:
+        data_set (Sequence): The dataset; plain lists are left alone.
+    """
+    close = getattr(data_set, "close", None)
+    if close is not None:
+        close()
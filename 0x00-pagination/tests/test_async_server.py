@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests for the asyncio pagination server.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+AsyncServer = __import__('9-async_server').AsyncServer
+HyperServer = __import__('2-hypermedia_pagination').Server
+MmapDataset = __import__('4-mmap_dataset').MmapDataset
+
+HEADER = "Year of Birth,Gender,Ethnicity,Child's First Name,Count,Rank"
+
+
+class TestAsyncServer(unittest.TestCase):
+    """
+    Coroutine pages match the synchronous Server's.
+    """
+
+    def setUp(self):
+        """
+        Write a CSV file of 40 rows.
+        """
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "names.csv")
+        self.write(40)
+        self.loads = []
+
+    def tearDown(self):
+        """
+        Remove the file.
+        """
+        self.dir.cleanup()
+
+    def write(self, size):
+        """
+        Write `size` rows to the CSV file.
+        """
+        with open(self.path, "w") as f:
+            f.write(HEADER + "\n")
+            for i in range(size):
+                f.write("2016,FEMALE,ASIAN,Name{},{},1\n".format(i, i))
+
+    def loader(self, path):
+        """
+        Load with MmapDataset, recording the thread it ran in.
+        """
+        self.loads.append(threading.current_thread())
+        return MmapDataset(path)
+
+    def server(self, *args, **kwargs):
+        """
+        Build an AsyncServer reading the CSV file.
+        """
+        return type("TestServer", (AsyncServer,),
+                    {"DATA_FILE": self.path})(*args, **kwargs)
+
+    def test_pages(self):
+        """
+        get_page and get_hyper return what the synchronous Server does.
+        """
+        async def main():
+            server = self.server()
+            return (await server.get_page(2, 7),
+                    await server.get_hyper(3, 7))
+
+        page, hyper = asyncio.run(main())
+        reference = type("Ref", (HyperServer,), {"DATA_FILE": self.path})()
+        self.assertEqual(page, reference.get_page(2, 7))
+        self.assertEqual(hyper, reference.get_hyper(3, 7))
+
+    def test_single_load_off_loop(self):
+        """
+        Concurrent first requests share one load, run in the executor.
+        """
+        async def main():
+            server = self.server(self.loader)
+            return await asyncio.gather(
+                *(server.get_page(page, 5) for page in range(1, 9)))
+
+        pages = asyncio.run(main())
+        self.assertEqual(len(self.loads), 1)
+        self.assertIsNot(self.loads[0], threading.main_thread())
+        self.assertEqual(pages[7][-1][3], "Name39")
+
+    def test_delete_and_reload(self):
+        """
+        Deleted rows are skipped, and a reload swaps in the new file.
+        """
+        async def main():
+            server = self.server()
+            first = await server.get_hyper_index(1, 5)
+            self.assertTrue(await server.delete(2))
+            self.assertFalse(await server.delete(2))
+            after = await server.get_hyper_index(1, 5)
+            self.write(50)
+            os.utime(self.path, ns=(0, 10 ** 18))
+            version = await server.reload()
+            reloaded = await server.get_hyper_index(1, 5, first["version"])
+            last = await server.get_page(10, 5)
+            return first, after, version, reloaded, last
+
+        first, after, version, reloaded, last = asyncio.run(main())
+        self.assertEqual([row[3] for row in after["data"]],
+                         ["Name1", "Name3", "Name4", "Name5", "Name6"])
+        self.assertEqual(after["next_index"], 7)
+        self.assertNotEqual(version, first["version"])
+        self.assertEqual(reloaded["version"], version)
+        self.assertTrue(reloaded["version_changed"])
+        self.assertEqual(len(reloaded["data"]), 5)
+        self.assertEqual(last[-1][3], "Name49")
+
+
+if __name__ == "__main__":
+    unittest.main()
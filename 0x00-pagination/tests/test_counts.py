@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for exact and approximate counts over deleted rows.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+IndexServer = __import__('3-hypermedia_del_pagination').Server
+SimpleServer = __import__('1-simple_pagination').Server
+
+HEADER = "Year of Birth,Gender,Ethnicity,Child's First Name,Count,Rank"
+NAMES = ("Olivia", "Oliver", "Emma", "Ava", "Liam")
+
+
+class TestCounts(unittest.TestCase):
+    """
+    Counts agree with counting the live rows by brute force.
+    """
+
+    def setUp(self):
+        """
+        Write 400 random rows and delete a random quarter of them.
+        """
+        self.dir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.dir.name, "names.csv")
+        rng = random.Random(0)
+        self.rows = [[str(rng.choice((2011, 2016))),
+                      rng.choice(("FEMALE", "MALE")),
+                      rng.choice(("ASIAN", "HISPANIC")),
+                      rng.choice(NAMES), str(rng.randrange(10, 99)), "1"]
+                     for _ in range(400)]
+        with open(path, "w") as f:
+            f.write(HEADER + "\n")
+            for row in self.rows:
+                f.write(",".join(row) + "\n")
+        self.server_class = type("TestServer", (IndexServer,),
+                                 {"DATA_FILE": path})
+        self.server = self.server_class(count_columns=("gender", "year"))
+        self.deleted = set(rng.sample(range(400), 100))
+        for position in self.deleted:
+            self.assertTrue(self.server.delete(position))
+
+    def tearDown(self):
+        """
+        Remove the file.
+        """
+        self.dir.cleanup()
+
+    def expected(self, where):
+        """
+        Count the live rows matching filters by brute force.
+        """
+        columns = ("year", "gender", "ethnicity", "name", "count", "rank")
+        total = 0
+        for position, row in enumerate(self.rows):
+            if position in self.deleted:
+                continue
+            cells = dict(zip(columns, row))
+            if all(cells[column[:-8]].startswith(str(value))
+                   if column.endswith("__prefix")
+                   else cells[column] == str(value)
+                   for column, value in where.items()):
+                total += 1
+        return total
+
+    def test_exact(self):
+        """
+        Totals, counted columns, other columns, prefixes and combinations.
+        """
+        wheres = [{}, {"gender": "MALE"}, {"year": 2016},
+                  {"ethnicity": "ASIAN"}, {"name__prefix": "Oli"},
+                  {"gender": "FEMALE", "ethnicity": "HISPANIC"},
+                  {"count__prefix": "5"}]
+        for where in wheres:
+            self.assertEqual(self.server.count(where), self.expected(where),
+                             where)
+        self.assertEqual(self.server.count(), 300)
+
+    def test_follows_deletes(self):
+        """
+        A cached count is not served after a delete or undelete.
+        """
+        where = {"gender": "FEMALE", "name": "Emma"}
+        before = self.server.count(where)
+        position = next(i for i, row in enumerate(self.rows)
+                        if i not in self.deleted and row[1] == "FEMALE" and
+                        row[3] == "Emma")
+        self.server.delete(position)
+        self.deleted.add(position)
+        self.assertEqual(self.server.count(where), before - 1)
+        self.server.undelete(position)
+        self.deleted.discard(position)
+        self.assertEqual(self.server.count(where), before)
+        self.assertEqual(self.server.count({"gender": "FEMALE"}),
+                         self.expected({"gender": "FEMALE"}))
+
+    def test_approximate(self):
+        """
+        The sampled estimate is close to the exact count.
+        """
+        where = {"gender": "MALE", "ethnicity": "ASIAN"}
+        estimate = self.server.count(where, approximate=True,
+                                     sample_size=2000)
+        self.assertAlmostEqual(estimate, self.expected(where), delta=25)
+
+    def test_simple_server(self):
+        """
+        The simple Server counts matches from its secondary index.
+        """
+        server = type("TestServer", (SimpleServer,),
+                      {"DATA_FILE": self.server_class.DATA_FILE})()
+        self.deleted = set()
+        for where in ({}, {"gender": "MALE"}, {"name__prefix": "A"}):
+            self.assertEqual(server.count(where), self.expected(where))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for cursor pagination resuming across pages and reloads.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+hypermedia = __import__('2-hypermedia_pagination')
+MmapDataset = __import__('4-mmap_dataset').MmapDataset
+close_dataset = __import__('dataset_files').close_dataset
+
+HEADER = "Year of Birth,Gender,Ethnicity,Child's First Name,Count,Rank"
+
+
+def make_row(i):
+    """
+    Build a distinct CSV row.
+    """
+    return "{},FEMALE,ASIAN,Name{},{},{}".format(2011 + i % 6, i, 10 + i,
+                                                 i % 100)
+
+
+class TestCursorPages(unittest.TestCase):
+    """
+    Cursor pages follow file order and resume where they stopped.
+    """
+
+    loader = None
+
+    def setUp(self):
+        """
+        Write a CSV of 50 rows and a Server reading it.
+        """
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "names.csv")
+        self.rows = [make_row(i) for i in range(50)]
+        self.write(self.rows)
+        server_class = type("TestServer", (hypermedia.Server,),
+                            {"DATA_FILE": self.path})
+        self.server = server_class(self.loader)
+
+    def tearDown(self):
+        """
+        Close the dataset and remove the files.
+        """
+        close_dataset(self.server.dataset())
+        self.dir.cleanup()
+
+    def write(self, rows):
+        """
+        Replace the CSV with the given rows, by renaming a new file over it.
+        """
+        temp = self.path + ".new"
+        with open(temp, "w", newline="") as f:
+            f.write("\n".join([HEADER] + rows) + "\n")
+        os.replace(temp, self.path)
+
+    def walk(self, cursor, page_size):
+        """
+        Follow cursors to the end and collect the rows served.
+        """
+        rows = []
+        while True:
+            page = self.server.get_cursor_page(cursor, page_size)
+            rows.extend(page["data"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return rows
+
+    def test_walk_matches_get_page(self):
+        """
+        Walking with cursors serves every row once, in get_page order.
+        """
+        self.assertEqual(self.walk(None, 7),
+                         self.server.get_page(1, 100))
+
+    def test_resume_on_same_version(self):
+        """
+        A cursor resumes at the next row and reports no version change.
+        """
+        first = self.server.get_cursor_page(None, 10)
+        second = self.server.get_cursor_page(first["next_cursor"], 10)
+        self.assertFalse(second["version_changed"])
+        self.assertEqual(second["data"], self.server.get_page(2, 10))
+
+    def test_resume_after_reload(self):
+        """
+        Rows inserted and deleted before the cursor shift nothing.
+        """
+        first = self.server.get_cursor_page(None, 20)
+        changed = [make_row(100 + i) for i in range(5)] + \
+            self.rows[:3] + self.rows[10:]
+        self.write(changed)
+        self.server.reload()
+
+        page = self.server.get_cursor_page(first["next_cursor"], 5)
+        self.assertTrue(page["version_changed"])
+        self.assertEqual(page["data"][0][3], "Name20")
+        rows = self.walk(first["next_cursor"], 5)
+        self.assertEqual([row[3] for row in rows],
+                         ["Name{}".format(i) for i in range(20, 50)])
+
+    def test_resume_inside_duplicate_run(self):
+        """
+        A cursor that stopped inside a run of identical rows resumes after
+        the same number of them.
+        """
+        rows = self.rows[:10] + [self.rows[10]] * 4 + self.rows[11:]
+        self.write(rows)
+        self.server.reload()
+        first = self.server.get_cursor_page(None, 12)
+        self.write([make_row(200)] + rows)
+        self.server.reload()
+
+        rest = self.walk(first["next_cursor"], 4)
+        self.assertEqual(len(rest), len(rows) - 12)
+        self.assertEqual([row[3] for row in rest[:2]], ["Name10"] * 2)
+        self.assertEqual(rest[2][3], "Name11")
+
+    def test_invalid_cursor(self):
+        """
+        A malformed cursor is refused.
+        """
+        with self.assertRaises(ValueError):
+            self.server.get_cursor_page("not-a-cursor")
+
+
+class TestMmapCursorPages(TestCursorPages):
+    """
+    The same walks over a memory-mapped dataset.
+    """
+
+    loader = staticmethod(MmapDataset)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for DatasetWatcher reloading a changed DATA_FILE.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+HyperServer = __import__('2-hypermedia_pagination').Server
+TypedDataset = __import__('7-typed_dataset').TypedDataset
+DatasetWatcher = __import__('8-dataset_watcher').DatasetWatcher
+
+HEADER = "Year of Birth,Gender,Ethnicity,Child's First Name,Count,Rank"
+
+
+class TestCheck(unittest.TestCase):
+    """
+    check() reloads changed files and skips a version that failed.
+    """
+
+    def setUp(self):
+        """
+        Write a CSV file and a Server counting its loads.
+        """
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "names.csv")
+        self.loads = 0
+        self.write(["2016,FEMALE,ASIAN,Olivia,172,1"])
+
+        def loader(path):
+            self.loads += 1
+            return TypedDataset(path)
+
+        server_class = type("TestServer", (HyperServer,),
+                            {"DATA_FILE": self.path})
+        self.server = server_class(loader)
+        self.server.dataset()
+        self.watcher = DatasetWatcher(self.server)
+
+    def tearDown(self):
+        """
+        Remove the files.
+        """
+        self.dir.cleanup()
+
+    def write(self, rows):
+        """
+        Replace the CSV with the given rows, by renaming a new file over it.
+        """
+        temp = self.path + ".new"
+        with open(temp, "w") as f:
+            f.write("\n".join([HEADER] + rows) + "\n")
+        os.replace(temp, self.path)
+
+    def test_unchanged_file_not_reloaded(self):
+        """
+        Polling an unchanged file loads nothing.
+        """
+        self.assertFalse(self.watcher.check())
+        self.assertEqual(self.loads, 1)
+
+    def test_changed_file_reloaded(self):
+        """
+        A new version is swapped in.
+        """
+        self.write(["2016,FEMALE,ASIAN,Olivia,172,1",
+                    "2016,MALE,HISPANIC,Liam,150,2"])
+        self.assertTrue(self.watcher.check())
+        self.assertEqual(len(self.server.dataset()), 2)
+
+    def test_malformed_file_skipped_until_changed(self):
+        """
+        A file that fails to parse is logged, loaded once, and kept out
+        until it changes.
+        """
+        self.write(["2016,FEMALE,ASIAN,Olivia,172,1",
+                    "unknown,MALE,HISPANIC,Liam,150,2"])
+        with self.assertLogs("8-dataset_watcher", "ERROR"):
+            self.assertFalse(self.watcher.check())
+        for _ in range(5):
+            self.assertFalse(self.watcher.check())
+        self.assertEqual(self.loads, 2)
+        self.assertEqual(len(self.server.dataset()), 1)
+
+        self.write(["2016,MALE,HISPANIC,Liam,150,2"] * 3)
+        self.assertTrue(self.watcher.check())
+        self.assertEqual(self.loads, 3)
+        self.assertEqual(len(self.server.dataset()), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
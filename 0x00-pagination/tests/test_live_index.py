@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for LiveIndex rank, select and paging over deleted rows.
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+LiveIndex = __import__('5-live_index').LiveIndex
+
+
+class TestRankSelect(unittest.TestCase):
+    """
+    rank and select agree with a plain list of the live positions.
+    """
+
+    def setUp(self):
+        """
+        Index 200 rows and delete a random half of them.
+        """
+        self.rows = [[str(i)] for i in range(200)]
+        self.index = LiveIndex(self.rows)
+        rng = random.Random(0)
+        self.deleted = set(rng.sample(range(len(self.rows)), 100))
+        for position in self.deleted:
+            self.assertTrue(self.index.delete(position))
+        self.live = [i for i in range(len(self.rows))
+                     if i not in self.deleted]
+
+    def test_select(self):
+        """
+        The live row of every rank is found, and no row past the last.
+        """
+        for rank, position in enumerate(self.live):
+            self.assertEqual(self.index.select(rank), position)
+        self.assertIsNone(self.index.select(len(self.live)))
+        self.assertIsNone(self.index.select(-1))
+
+    def test_rank(self):
+        """
+        rank counts the live rows before a position, and inverts select.
+        """
+        for position in range(len(self.rows) + 1):
+            expected = sum(1 for i in self.live if i < position)
+            self.assertEqual(self.index.rank(position), expected)
+        for rank, position in enumerate(self.live):
+            self.assertEqual(self.index.rank(position), rank)
+
+    def test_undelete(self):
+        """
+        A restored row is selected again at its rank.
+        """
+        position = min(self.deleted)
+        self.assertTrue(self.index.undelete(position))
+        self.assertFalse(self.index.undelete(position))
+        rank = self.index.rank(position)
+        self.assertEqual(self.index.select(rank), position)
+        self.assertEqual(len(self.index), len(self.live) + 1)
+
+
+class TestPage(unittest.TestCase):
+    """
+    Pages skip runs of deleted rows.
+    """
+
+    def test_page_skips_deleted_run(self):
+        """
+        A page starting inside a run of deleted rows begins after it.
+        """
+        index = LiveIndex([[str(i)] for i in range(100)])
+        for position in range(10, 90):
+            index.delete(position)
+        positions, next_index = index.page(5, 10)
+        self.assertEqual(positions, [5, 6, 7, 8, 9, 90, 91, 92, 93, 94])
+        self.assertEqual(next_index, 95)
+        positions, next_index = index.page(20, 10)
+        self.assertEqual(positions, list(range(90, 100)))
+        self.assertEqual(next_index, 100)
+
+    def test_last_page(self):
+        """
+        The last page is short and resumes past the end.
+        """
+        index = LiveIndex([[str(i)] for i in range(12)])
+        del index[11]
+        positions, next_index = index.page(8, 10)
+        self.assertEqual(positions, [8, 9, 10])
+        self.assertEqual(next_index, 12)
+        self.assertNotIn(11, index)
+
+    def test_scan_and_jump(self):
+        """
+        Pages match the live positions whether the gaps between them are
+        scanned or jumped with select.
+        """
+        rng = random.Random(1)
+        rows = [[str(i)] for i in range(3000)]
+        index = LiveIndex(rows)
+        index.SKIP = 16
+        for start in range(0, 3000, 97):
+            for position in range(start, start + rng.randrange(60)):
+                index.delete(position)
+        live = list(index)
+        for start in (0, 5, 150, 1500, 2990):
+            positions, _ = index.page(start, 25)
+            expected = [i for i in live if i >= start][:25]
+            self.assertEqual(positions, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Tests for MmapDataset and its persisted row-offset index.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+mmap_dataset = __import__('4-mmap_dataset')
+MmapDataset = mmap_dataset.MmapDataset
+INDEX_SUFFIX = mmap_dataset.INDEX_SUFFIX
+build_offsets = mmap_dataset.build_offsets
+load_index = mmap_dataset.load_index
+write_index = mmap_dataset.write_index
+
+HEADER = "Year of Birth,Gender,Ethnicity,Child's First Name,Count,Rank\n"
+
+
+class TestPersistedIndex(unittest.TestCase):
+    """
+    The offset index is reused while it matches the CSV, and rejected once
+    it does not.
+    """
+
+    def setUp(self):
+        """
+        Write a small CSV file.
+        """
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "names.csv")
+        self.write(["2016,FEMALE,ASIAN,Olivia,172,1",
+                    "2016,MALE,HISPANIC,Liam,150,2"])
+
+    def tearDown(self):
+        """
+        Remove the files.
+        """
+        self.dir.cleanup()
+
+    def write(self, rows):
+        """
+        Replace the CSV with the given rows, by renaming a new file over it.
+        """
+        temp = self.path + ".new"
+        with open(temp, "w", newline="") as f:
+            f.write(HEADER)
+            for row in rows:
+                f.write(row + "\n")
+        os.replace(temp, self.path)
+
+    def check_index(self):
+        """
+        The persisted index matches a fresh scan of the file.
+        """
+        offsets = load_index(self.path)
+        self.assertIsNotNone(offsets)
+        try:
+            self.assertEqual(list(offsets), list(build_offsets(self.path)))
+        finally:
+            offsets.release()
+
+    def test_index_written_and_reused(self):
+        """
+        Loading a dataset persists its index, and later loads map it.
+        """
+        data = MmapDataset(self.path)
+        data.close()
+        self.assertTrue(os.path.exists(self.path + INDEX_SUFFIX))
+        self.check_index()
+
+    def test_rewritten_csv_rejects_index(self):
+        """
+        An index written for another version of the file is not used.
+        """
+        write_index(self.path, build_offsets(self.path))
+        self.write(["2011,FEMALE,BLACK NON HISPANIC,Madison,{},3".format(i)
+                    for i in range(5)])
+        self.assertIsNone(load_index(self.path))
+
+        data = MmapDataset(self.path)
+        try:
+            self.assertEqual(len(data), 5)
+            self.assertEqual(data[4][3:], ["Madison", "4", "3"])
+        finally:
+            data.close()
+        self.check_index()
+
+    def test_truncated_index_rejected(self):
+        """
+        An index whose offsets are cut short is not used.
+        """
+        write_index(self.path, build_offsets(self.path))
+        index_path = self.path + INDEX_SUFFIX
+        with open(index_path, "r+b") as f:
+            f.truncate(os.path.getsize(index_path) - 8)
+        self.assertIsNone(load_index(self.path))
+
+    def test_garbage_index_rejected(self):
+        """
+        A file that is not an index is not used.
+        """
+        with open(self.path + INDEX_SUFFIX, "wb") as f:
+            f.write(b"not an index")
+        self.assertIsNone(load_index(self.path))
+        data = MmapDataset(self.path)
+        try:
+            self.assertEqual(len(data), 2)
+        finally:
+            data.close()
+
+
+class TestRows(unittest.TestCase):
+    """
+    Rows decode like the offset index splits them.
+    """
+
+    def setUp(self):
+        """
+        Create a directory for the CSV files.
+        """
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "names.csv")
+
+    def tearDown(self):
+        """
+        Remove the files.
+        """
+        self.dir.cleanup()
+
+    def test_only_line_feeds_split_rows(self):
+        """
+        Characters `str.splitlines` breaks on stay inside their field.
+        """
+        names = ["A\x0bB", "C\x0cD", "E\x1cF", "G\x85H", "I J"]
+        with open(self.path, "w", encoding="utf-8", newline="") as f:
+            f.write(HEADER)
+            for count, name in enumerate(names):
+                f.write("2016,FEMALE,ASIAN,{},{},1\r\n".format(name, count))
+        data = MmapDataset(self.path, persist_index=False)
+        try:
+            self.assertEqual(len(data), len(names))
+            self.assertEqual([row[3] for row in data[:]], names)
+            self.assertEqual(data[-1], ["2016", "FEMALE", "ASIAN",
+                                        "I J", "4", "1"])
+        finally:
+            data.close()
+
+    def test_closed_dataset_refuses_reads(self):
+        """
+        Reading a closed dataset raises ValueError.
+        """
+        with open(self.path, "w", newline="") as f:
+            f.write(HEADER + "2016,FEMALE,ASIAN,Olivia,172,1\n")
+        data = MmapDataset(self.path, persist_index=False)
+        data.close()
+        with self.assertRaises(ValueError):
+            data[0]
+        with self.assertRaises(ValueError):
+            len(data)
+
+
+if __name__ == "__main__":
+    unittest.main()
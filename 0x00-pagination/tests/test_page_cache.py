@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for the cache of pre-serialized get_hyper responses.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+PageCache = __import__('11-page_cache').PageCache
+HyperServer = __import__('2-hypermedia_pagination').Server
+
+HEADER = "Year of Birth,Gender,Ethnicity,Child's First Name,Count,Rank"
+
+
+class TestPageCache(unittest.TestCase):
+    """
+    PageCache keeps the most recently used responses.
+    """
+
+    def test_lru(self):
+        """
+        The least recently used response is evicted first.
+        """
+        cache = PageCache(max_entries=2)
+        cache.put("a", b"1")
+        cache.put("b", b"2")
+        self.assertEqual(cache.get("a"), b"1")
+        cache.put("c", b"3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), b"1")
+        self.assertEqual(len(cache), 2)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+class TestHyperJson(unittest.TestCase):
+    """
+    get_hyper_json serves cached bytes until the dataset changes.
+    """
+
+    def setUp(self):
+        """
+        Write a CSV file of 30 rows.
+        """
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "names.csv")
+        self.write(30)
+        self.cache = PageCache(max_entries=4)
+        self.server = type("TestServer", (HyperServer,),
+                           {"DATA_FILE": self.path})(page_cache=self.cache)
+
+    def tearDown(self):
+        """
+        Remove the file.
+        """
+        self.dir.cleanup()
+
+    def write(self, size):
+        """
+        Write `size` rows to the CSV file.
+        """
+        with open(self.path, "w") as f:
+            f.write(HEADER + "\n")
+            for i in range(size):
+                f.write("2016,FEMALE,ASIAN,Name{},{},1\n".format(i, i))
+
+    def test_matches_get_hyper(self):
+        """
+        The bytes decode to get_hyper, and a hit returns the same object.
+        """
+        body = self.server.get_hyper_json(2, 7)
+        self.assertEqual(json.loads(body), self.server.get_hyper(2, 7))
+        self.assertIs(self.server.get_hyper_json(2, 7), body)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_reload_invalidates(self):
+        """
+        A reload drops the cached responses of the old dataset.
+        """
+        before = json.loads(self.server.get_hyper_json(1, 10))
+        self.write(45)
+        os.utime(self.path, ns=(0, 10 ** 18))
+        self.server.reload()
+        self.assertEqual(len(self.cache), 0)
+        after = json.loads(self.server.get_hyper_json(1, 10))
+        self.assertEqual(before["total_pages"], 3)
+        self.assertEqual(after["total_pages"], 5)
+        self.assertNotEqual(before["version"], after["version"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for the binary columnar page encoding.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+encoding = __import__('14-page_encoding')
+ColumnarBlock = encoding.ColumnarBlock
+encode_page = encoding.encode_page
+decode_page = encoding.decode_page
+HyperServer = __import__('2-hypermedia_pagination').Server
+TypedDataset = __import__('7-typed_dataset').TypedDataset
+
+HEADER = "Year of Birth,Gender,Ethnicity,Child's First Name,Count,Rank"
+
+
+class TestEncoding(unittest.TestCase):
+    """
+    Pages decode to the rows they were encoded from.
+    """
+
+    def test_round_trip(self):
+        """
+        Integer and text columns, with non-ASCII text.
+        """
+        rows = [[2016, "FEMALE", "Zoë", 12], [2011, "MALE", "Łukasz", -3]]
+        meta, decoded = decode_page(encode_page(rows, {"page": 1}))
+        self.assertEqual(meta, {"page": 1})
+        self.assertEqual(decoded, rows)
+
+    def test_mixed_column_is_text(self):
+        """
+        A column that stops being all integers is stored as text, the
+        integers before the change included.
+        """
+        rows = [[1, "a"], [2, "b"], ["three", "c"]]
+        block = ColumnarBlock(rows)
+        self.assertEqual([kind for kind, _ in block.columns],
+                         [encoding.STR_COLUMN, encoding.STR_COLUMN])
+        self.assertEqual(decode_page(block.page(0, 3))[1],
+                         [["1", "a"], ["2", "b"], ["three", "c"]])
+
+    def test_ragged_rows(self):
+        """
+        Missing cells decode as empty text.
+        """
+        rows = [["a"], ["b", "x"], ["c"]]
+        self.assertEqual(decode_page(encode_page(rows))[1],
+                         [["a", ""], ["b", "x"], ["c", ""]])
+
+    def test_block_pages(self):
+        """
+        Pages sliced from a block match the rows, and are clamped to it.
+        """
+        rows = [[i, "name{}".format(i)] for i in range(25)]
+        block = ColumnarBlock(rows)
+        for start, end in ((0, 10), (7, 19), (20, 40), (30, 40)):
+            self.assertEqual(decode_page(block.page(start, end))[1],
+                             rows[start:end])
+
+    def test_not_a_page(self):
+        """
+        Anything else is refused.
+        """
+        with self.assertRaises(ValueError):
+            decode_page(b"JSON{}")
+
+
+class TestHyperEncoded(unittest.TestCase):
+    """
+    get_hyper_encoded carries what get_hyper returns.
+    """
+
+    def setUp(self):
+        """
+        Write a CSV file of 33 rows.
+        """
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "names.csv")
+        with open(self.path, "w") as f:
+            f.write(HEADER + "\n")
+            for i in range(33):
+                f.write("2016,FEMALE,ASIAN,Name{},{},1\n".format(i, i))
+
+    def tearDown(self):
+        """
+        Remove the file.
+        """
+        self.dir.cleanup()
+
+    def test_matches_get_hyper(self):
+        """
+        Text rows and typed rows, on full and short pages.
+        """
+        for loader in (None, TypedDataset):
+            server = type("TestServer", (HyperServer,),
+                          {"DATA_FILE": self.path})(loader)
+            for page in (1, 4, 5):
+                meta, rows = decode_page(server.get_hyper_encoded(page, 10))
+                hyper = server.get_hyper(page, 10)
+                data = hyper.pop("data")
+                self.assertEqual(rows, [list(row) for row in data])
+                self.assertEqual(meta, hyper)
+
+    def test_version_follows_reload(self):
+        """
+        Pages encoded after a reload carry the new version.
+        """
+        server = type("TestServer", (HyperServer,),
+                      {"DATA_FILE": self.path})()
+        server.get_hyper_encoded(1, 10)
+        os.utime(self.path, ns=(0, 10 ** 18))
+        version = server.reload()
+        meta, _ = decode_page(server.get_hyper_encoded(1, 10))
+        self.assertEqual(meta["version"], version)
+
+
+if __name__ == "__main__":
+    unittest.main()
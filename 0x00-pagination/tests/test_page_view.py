@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for PageView and batch pagination.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+PageView = __import__('10-page_view').PageView
+SimpleServer = __import__('1-simple_pagination').Server
+
+HEADER = "Year of Birth,Gender,Ethnicity,Child's First Name,Count,Rank"
+
+
+class TestPageView(unittest.TestCase):
+    """
+    A PageView behaves like the list of the rows it views.
+    """
+
+    def test_slices_match_list(self):
+        """
+        Every slice, including negative steps, matches the same slice of a
+        list.
+        """
+        rows = [[i] for i in range(20)]
+        bounds = [None, -25, -3, -1, 0, 1, 2, 4, 5, 25]
+        for start, end in ((0, 5), (3, 9), (15, 30), (0, 0)):
+            view = PageView(rows, start, end)
+            expected = rows[start:end]
+            self.assertEqual(list(view), expected)
+            for i in bounds:
+                for j in bounds:
+                    for step in (None, 1, 2, -1, -2):
+                        self.assertEqual(view[i:j:step], expected[i:j:step],
+                                         (start, end, i, j, step))
+
+    def test_reversed_from_first_row(self):
+        """
+        A view starting at row 0 reverses to all its rows.
+        """
+        rows = [[i] for i in range(10)]
+        self.assertEqual(PageView(rows, 0, 5)[::-1],
+                         [[4], [3], [2], [1], [0]])
+
+    def test_index(self):
+        """
+        Indexes are relative to the view and bounded by it.
+        """
+        view = PageView([[i] for i in range(10)], 4, 7)
+        self.assertEqual(view[0], [4])
+        self.assertEqual(view[-1], [6])
+        with self.assertRaises(IndexError):
+            view[3]
+
+
+class TestStreamingPages(unittest.TestCase):
+    """
+    A streaming Server reads batches of pages from the file.
+    """
+
+    def setUp(self):
+        """
+        Write a CSV file of 50 rows.
+        """
+        self.dir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.dir.name, "names.csv")
+        with open(path, "w") as f:
+            f.write(HEADER + "\n")
+            for i in range(50):
+                f.write("2016,FEMALE,ASIAN,Name{},{},1\n".format(i, i))
+        self.server_class = type("TestServer", (SimpleServer,),
+                                 {"DATA_FILE": path})
+
+    def tearDown(self):
+        """
+        Remove the file.
+        """
+        self.dir.cleanup()
+
+    def test_matches_loaded_pages(self):
+        """
+        Pages come back in the order asked for, like a loaded Server's.
+        """
+        pages = [3, 1, 7, 3, 20]
+        streamed = self.server_class(streaming=True).get_pages(pages, 7)
+        loaded = self.server_class().get_pages(pages, 7)
+        self.assertEqual(streamed, [view.tolist() for view in loaded])
+        self.assertEqual(streamed[-1], [])
+
+    def test_does_not_load(self):
+        """
+        Streaming pages never loads the whole dataset.
+        """
+        def refuse(self):
+            raise AssertionError("dataset loaded")
+
+        server_class = type("NoLoad", (self.server_class,),
+                            {"dataset": refuse})
+        pages = server_class(streaming=True).get_pages([2], 5)
+        self.assertEqual(pages[0][0][3], "Name5")
+
+
+if __name__ == "__main__":
+    unittest.main()
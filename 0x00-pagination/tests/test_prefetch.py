@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for the read-ahead of sequential get_hyper_index walks.
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+IndexServer = __import__('3-hypermedia_del_pagination').Server
+
+HEADER = "Year of Birth,Gender,Ethnicity,Child's First Name,Count,Rank"
+
+
+class TestPrefetch(unittest.TestCase):
+    """
+    A walk with read-ahead returns the pages a walk without it does.
+    """
+
+    def setUp(self):
+        """
+        Write a CSV file of 100 rows.
+        """
+        self.dir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.dir.name, "names.csv")
+        with open(path, "w") as f:
+            f.write(HEADER + "\n")
+            for i in range(100):
+                f.write("2016,FEMALE,ASIAN,Name{},{},1\n".format(i, i))
+        self.server_class = type("TestServer", (IndexServer,),
+                                 {"DATA_FILE": path})
+
+    def tearDown(self):
+        """
+        Remove the file.
+        """
+        self.dir.cleanup()
+
+    def walk(self, server, page_size=7):
+        """
+        Walk every page with get_hyper_index.
+        """
+        pages = []
+        index = 1
+        while index < 100:
+            page = server.get_hyper_index(index, page_size)
+            pages.append(page["data"])
+            index = page["next_index"]
+        return pages
+
+    def test_same_pages(self):
+        """
+        Walks with and without read-ahead agree, over deleted rows too.
+        """
+        plain = self.server_class()
+        ahead = self.server_class(prefetch=3, prefetch_buffer=4)
+        try:
+            for position in (3, 20, 21, 22, 50):
+                plain.delete(position)
+                ahead.delete(position)
+            self.assertEqual(self.walk(ahead), self.walk(plain))
+            self.assertEqual(self.walk(ahead, 5), self.walk(plain, 5))
+        finally:
+            ahead.close()
+
+    def test_delete_drops_buffered_pages(self):
+        """
+        A page read ahead before a delete is not served after it.
+        """
+        server = self.server_class(prefetch=2)
+        try:
+            first = server.get_hyper_index(1, 10)
+            second = server.get_hyper_index(first["next_index"], 10)
+            time.sleep(0.2)  # Let the read-ahead fill the buffer
+            server.delete(second["next_index"] + 1)
+            third = server.get_hyper_index(second["next_index"], 10)
+        finally:
+            server.close()
+        names = [row[3] for row in third["data"]]
+        self.assertEqual(names[:3], ["Name21", "Name23", "Name24"])
+        self.assertEqual(third["next_index"], 32)
+
+
+if __name__ == "__main__":
+    unittest.main()
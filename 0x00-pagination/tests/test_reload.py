@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for reloading a dataset while requests are reading it.
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import weakref
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+SimpleServer = __import__('1-simple_pagination').Server
+HyperServer = __import__('2-hypermedia_pagination').Server
+IndexServer = __import__('3-hypermedia_del_pagination').Server
+MmapDataset = __import__('4-mmap_dataset').MmapDataset
+write_shards = __import__('13-sharded_dataset').write_shards
+ShardedDataset = __import__('13-sharded_dataset').ShardedDataset
+
+HEADER = "Year of Birth,Gender,Ethnicity,Child's First Name,Count,Rank"
+
+
+class TestReloadDuringReads(unittest.TestCase):
+    """
+    Readers on a replaced dataset finish on it, and it is released once
+    they are done.
+    """
+
+    def setUp(self):
+        """
+        Write a CSV file of 300 rows.
+        """
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "names.csv")
+        with open(self.path, "w") as f:
+            f.write(HEADER + "\n")
+            for i in range(300):
+                f.write("2016,FEMALE,ASIAN,Name{},{},1\n".format(i, i))
+
+    def tearDown(self):
+        """
+        Remove the files.
+        """
+        self.dir.cleanup()
+
+    def server(self, base, *args, **kwargs):
+        """
+        Build a Server of a given class reading the CSV file.
+        """
+        server_class = type("TestServer", (base,), {"DATA_FILE": self.path})
+        return server_class(*args, **kwargs)
+
+    def hammer(self, server, read):
+        """
+        Read from 4 threads while reloading, and return the errors raised.
+        """
+        errors = []
+        stop = threading.Event()
+
+        def reader():
+            while not stop.is_set():
+                try:
+                    read(server)
+                except Exception as error:
+                    errors.append(error)
+                    return
+
+        threads = [threading.Thread(target=reader) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for _ in range(30):
+            server.reload()
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def test_get_hyper(self):
+        """
+        get_hyper never sees a closed memory map.
+        """
+        server = self.server(HyperServer, MmapDataset)
+
+        def read(server):
+            for page in (1, 15, 30):
+                self.assertEqual(len(server.get_hyper(page, 10)["data"]), 10)
+
+        self.assertEqual(self.hammer(server, read), [])
+
+    def test_get_hyper_index(self):
+        """
+        get_hyper_index, with read-ahead, never sees a closed memory map.
+        """
+        server = self.server(IndexServer, MmapDataset, prefetch=2)
+
+        def read(server):
+            index = 1
+            for _ in range(5):
+                page = server.get_hyper_index(index, 10)
+                self.assertEqual(len(page["data"]), 10)
+                index = page["next_index"]
+
+        try:
+            self.assertEqual(self.hammer(server, read), [])
+        finally:
+            server.close()
+
+    def test_iter_pages_stays_on_its_version(self):
+        """
+        A walk started before a reload reads its whole version.
+        """
+        server = self.server(HyperServer, MmapDataset)
+        pages = server.iter_pages(50)
+        first = next(pages)
+        server.reload()
+        rest = list(pages)
+        self.assertEqual(len(rest), 5)
+        for page in rest:
+            self.assertEqual(page["version"], first["version"])
+        self.assertEqual(rest[-1]["data"][-1][3], "Name299")
+
+    def test_get_pages_views_survive_reload(self):
+        """
+        PageViews returned before a reload stay readable.
+        """
+        server = self.server(SimpleServer, MmapDataset)
+        views = server.get_pages([1, 2], 5)
+        server.reload()
+        self.assertEqual(views[1][0][3], "Name5")
+
+    def test_replaced_dataset_released(self):
+        """
+        A replaced dataset is collected once no reader holds it.
+        """
+        manifest = write_shards(self.path, 3)
+        server_class = type("TestServer", (HyperServer,),
+                            {"DATA_FILE": manifest})
+        server = server_class(ShardedDataset)
+        old = weakref.ref(server.dataset())
+        view = server.get_pages([1], 5)[0]["data"]
+        server.reload()
+        gc.collect()
+        self.assertIsNotNone(old())
+        self.assertEqual(view[0][3], "Name0")
+        del view
+        gc.collect()
+        self.assertIsNone(old())
+
+
+if __name__ == "__main__":
+    unittest.main()
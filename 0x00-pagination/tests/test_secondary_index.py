@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Tests for filtered and sorted pages backed by secondary indexes.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+index_module = __import__('6-secondary_index')
+SecondaryIndex = index_module.SecondaryIndex
+row_matcher = index_module.row_matcher
+column_position = index_module.column_position
+SimpleServer = __import__('1-simple_pagination').Server
+
+HEADER = "Year of Birth,Gender,Ethnicity,Child's First Name,Count,Rank"
+NAMES = ("Olivia", "Oliver", "Emma", "Ava", "Liam", "Noah", "Olga")
+
+
+def make_rows(size, seed=0):
+    """
+    Build random baby names rows, as strings like the CSV reader's.
+    """
+    rng = random.Random(seed)
+    return [[str(rng.choice((2011, 2012, 2016))),
+             rng.choice(("FEMALE", "MALE")),
+             rng.choice(("ASIAN", "HISPANIC")),
+             rng.choice(NAMES),
+             str(rng.randrange(10, 300)),
+             str(rng.randrange(1, 50))] for _ in range(size)]
+
+
+class TestSecondaryIndex(unittest.TestCase):
+    """
+    Pages agree with filtering and sorting the rows by brute force.
+    """
+
+    def setUp(self):
+        """
+        Index 500 random rows.
+        """
+        self.rows = make_rows(500)
+        self.index = SecondaryIndex(self.rows)
+
+    def expected(self, where, order_by):
+        """
+        Filter and sort the rows by brute force.
+        """
+        matches = row_matcher(where)
+        positions = [i for i, row in enumerate(self.rows) if matches(row)]
+        if order_by is None:
+            return positions
+        column = order_by.lstrip("-")
+        key = self.index.sort_key(column)
+        positions.sort(key=key)
+        if order_by.startswith("-"):
+            positions.reverse()
+        return positions
+
+    def test_pages_match_brute_force(self):
+        """
+        Filters, prefixes and orders, alone and combined.
+        """
+        wheres = [None, {"gender": "FEMALE"}, {"year": 2016},
+                  {"year": 2012, "ethnicity": "ASIAN"},
+                  {"name__prefix": "Ol"},
+                  {"name__prefix": "Ol", "gender": "MALE"},
+                  {"name": "Nobody"}]
+        for where in wheres:
+            for order_by in (None, "count", "-count", "name", "-rank"):
+                expected = self.expected(where, order_by)
+                for start in (0, 7, len(expected) - 3, len(expected) + 5):
+                    start = max(start, 0)
+                    self.assertEqual(
+                        self.index.page(start, start + 10, where, order_by),
+                        expected[start:start + 10], (where, order_by, start))
+
+    def test_count(self):
+        """
+        Counts are exact, and the estimate is close for independent
+        columns.
+        """
+        for where in (None, {"gender": "MALE"}, {"name__prefix": "Ol"},
+                      {"gender": "MALE", "year": 2011}):
+            self.assertEqual(self.index.count(where),
+                             len(self.expected(where, None)))
+        where = {"gender": "MALE", "ethnicity": "ASIAN"}
+        estimate = self.index.count(where, approximate=True)
+        self.assertAlmostEqual(estimate, self.index.count(where),
+                               delta=len(self.rows) * 0.05)
+
+    def test_numeric_order(self):
+        """
+        Numeric columns sort as integers, not strings.
+        """
+        counts = [int(self.rows[i][4]) for i in self.index.order("count")]
+        self.assertEqual(counts, sorted(counts))
+
+    def test_unknown_column(self):
+        """
+        Unknown columns are refused in filters and orders.
+        """
+        with self.assertRaises(ValueError):
+            self.index.page(0, 10, {"colour": "red"})
+        with self.assertRaises(ValueError):
+            self.index.page(0, 10, order_by="-colour")
+        with self.assertRaises(ValueError):
+            column_position("colour")
+
+    def test_concurrent_builds(self):
+        """
+        Threads asking for the same index share a single build.
+        """
+        orders = []
+        barrier = threading.Barrier(8)
+
+        def build():
+            barrier.wait()
+            orders.append(self.index.order("name"))
+
+        threads = [threading.Thread(target=build) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(orders), 8)
+        for order in orders:
+            self.assertIs(order, orders[0])
+
+
+class TestServerFilters(unittest.TestCase):
+    """
+    get_page filters and sorts through the Server's secondary index.
+    """
+
+    def setUp(self):
+        """
+        Write the rows to a CSV file.
+        """
+        self.dir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.dir.name, "names.csv")
+        self.rows = make_rows(120, seed=1)
+        with open(path, "w") as f:
+            f.write(HEADER + "\n")
+            for row in self.rows:
+                f.write(",".join(row) + "\n")
+        self.server = type("TestServer", (SimpleServer,),
+                           {"DATA_FILE": path})()
+
+    def tearDown(self):
+        """
+        Remove the file.
+        """
+        self.dir.cleanup()
+
+    def test_filtered_page(self):
+        """
+        Pages hold the matching rows, in file order.
+        """
+        matching = [row for row in self.rows if row[1] == "FEMALE"]
+        self.assertEqual(self.server.get_page(2, 5, {"gender": "FEMALE"}),
+                         matching[5:10])
+        self.assertEqual(self.server.count({"gender": "FEMALE"}),
+                         len(matching))
+
+    def test_sorted_page(self):
+        """
+        Pages sorted in descending order of a numeric column.
+        """
+        page = self.server.get_page(1, 10, order_by="-count")
+        counts = [int(row[4]) for row in page]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        self.assertEqual(counts[0], max(int(row[4]) for row in self.rows))
+
+    def test_index_rebuilt_on_reload(self):
+        """
+        The index follows the dataset across a reload.
+        """
+        index = self.server.secondary_index()
+        self.server.reload()
+        self.assertIsNot(self.server.secondary_index(), index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tests for pagination over partitioned data files.
+"""
+
+import csv
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+sharded = __import__('13-sharded_dataset')
+ShardedDataset = sharded.ShardedDataset
+write_shards = sharded.write_shards
+MmapDataset = __import__('4-mmap_dataset').MmapDataset
+SimpleServer = __import__('1-simple_pagination').Server
+
+HEADER = "Year of Birth,Gender,Ethnicity,Child's First Name,Count,Rank"
+
+
+class TestShardedDataset(unittest.TestCase):
+    """
+    A ShardedDataset reads like the unsplit file.
+    """
+
+    def setUp(self):
+        """
+        Split a CSV file of 103 rows into 4 shards.
+        """
+        self.dir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.dir.name, "names.csv")
+        with open(path, "w") as f:
+            f.write(HEADER + "\n")
+            for i in range(103):
+                f.write("2016,FEMALE,ASIAN,Name{},{},1\n".format(i, i))
+        with open(path, newline='') as f:
+            self.rows = list(csv.reader(f))[1:]
+        self.manifest = write_shards(path, 4)
+
+    def tearDown(self):
+        """
+        Remove the files.
+        """
+        self.dir.cleanup()
+
+    def check(self, data_set):
+        """
+        Compare a dataset with the rows of the unsplit file.
+        """
+        self.assertEqual(len(data_set), len(self.rows))
+        self.assertEqual(list(data_set), self.rows)
+        self.assertEqual(data_set[-1], self.rows[-1])
+        for key in (slice(20, 60), slice(0, 103, 7), slice(90, 10, -3),
+                    slice(None, None, -1), slice(200, 300)):
+            self.assertEqual(data_set[key], self.rows[key], key)
+        positions = [102, 0, 26, 25, 51, 26]
+        self.assertEqual(data_set.take(positions),
+                         [self.rows[i] for i in positions])
+        with self.assertRaises(IndexError):
+            data_set[103]
+        with self.assertRaises(IndexError):
+            data_set.take([0, 103])
+
+    def test_in_process(self):
+        """
+        Shards loaded in this process.
+        """
+        data_set = ShardedDataset(self.manifest)
+        self.assertEqual(data_set.counts, [26, 26, 26, 25])
+        self.check(data_set)
+        data_set.close()
+
+    def test_worker_processes(self):
+        """
+        Shards served by worker processes, loaded with MmapDataset.
+        """
+        data_set = ShardedDataset(self.manifest, MmapDataset, processes=True)
+        try:
+            self.check(data_set)
+        finally:
+            data_set.close()
+
+    def test_locate(self):
+        """
+        Global ranges map onto the shards they cross.
+        """
+        data_set = ShardedDataset(self.manifest)
+        self.assertEqual(data_set.locate(20, 60),
+                         [(0, 20, 26), (1, 0, 26), (2, 0, 8)])
+        self.assertEqual(data_set.locate(100, 200), [(3, 22, 25)])
+        self.assertEqual(data_set.locate(5, 5), [])
+
+    def test_closed(self):
+        """
+        Reads after close are refused.
+        """
+        data_set = ShardedDataset(self.manifest)
+        data_set.close()
+        with self.assertRaises(ValueError):
+            data_set[0]
+        with self.assertRaises(ValueError):
+            data_set.take([0])
+
+    def test_server(self):
+        """
+        A Server pages the manifest like the unsplit file.
+        """
+        server = type("TestServer", (SimpleServer,),
+                      {"DATA_FILE": self.manifest})(ShardedDataset)
+        self.assertEqual(server.get_page(3, 10), self.rows[20:30])
+        self.assertEqual(server.get_page(11, 10), self.rows[100:])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for thread-safe, single-flight dataset initialization.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+SimpleServer = __import__('1-simple_pagination').Server
+HyperServer = __import__('2-hypermedia_pagination').Server
+IndexServer = __import__('3-hypermedia_del_pagination').Server
+MmapDataset = __import__('4-mmap_dataset').MmapDataset
+
+HEADER = "Year of Birth,Gender,Ethnicity,Child's First Name,Count,Rank"
+THREADS = 16
+
+
+class TestSingleFlight(unittest.TestCase):
+    """
+    Concurrent first requests wait for a single load.
+    """
+
+    def setUp(self):
+        """
+        Write a CSV file of 50 rows.
+        """
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "names.csv")
+        with open(self.path, "w") as f:
+            f.write(HEADER + "\n")
+            for i in range(50):
+                f.write("2016,FEMALE,ASIAN,Name{},{},1\n".format(i, i))
+        self.loads = 0
+        self.fail = False
+
+    def tearDown(self):
+        """
+        Remove the file.
+        """
+        self.dir.cleanup()
+
+    def loader(self, path):
+        """
+        A slow loader that counts its calls, and fails when told to.
+        """
+        self.loads += 1
+        time.sleep(0.05)
+        if self.fail:
+            raise OSError("disk on fire")
+        return MmapDataset(path)
+
+    def race(self, request):
+        """
+        Run a request from many threads at once and return the results.
+        """
+        barrier = threading.Barrier(THREADS)
+        results = [None] * THREADS
+
+        def worker(slot):
+            barrier.wait()
+            results[slot] = request()
+
+        threads = [threading.Thread(target=worker, args=(slot,))
+                   for slot in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_every_server_loads_once(self):
+        """
+        Each Server class loads its dataset once for all the threads.
+        """
+        for base in (SimpleServer, HyperServer, IndexServer):
+            self.loads = 0
+            server = type("TestServer", (base,),
+                          {"DATA_FILE": self.path})(self.loader)
+            datasets = self.race(server.dataset)
+            self.assertEqual(self.loads, 1, base.__module__)
+            for data_set in datasets:
+                self.assertIs(data_set, datasets[0])
+
+    def test_index_built_once(self):
+        """
+        The deletion index is built once for all the threads.
+        """
+        server = type("TestServer", (IndexServer,),
+                      {"DATA_FILE": self.path})(self.loader)
+        indexes = self.race(server.indexed_dataset)
+        self.assertEqual(self.loads, 1)
+        for index in indexes:
+            self.assertIs(index, indexes[0])
+
+    def test_failed_load_retried(self):
+        """
+        A failed load is not cached: the next request loads again.
+        """
+        server = type("TestServer", (SimpleServer,),
+                      {"DATA_FILE": self.path})(self.loader)
+        self.fail = True
+        with self.assertRaises(OSError):
+            server.dataset()
+        self.fail = False
+        self.assertEqual(server.get_page(5, 10)[-1][3], "Name49")
+        self.assertEqual(self.loads, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming mode of the simple pagination Server.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+simple = __import__('1-simple_pagination')
+SimpleServer = simple.Server
+RowStream = simple.RowStream
+
+HEADER = "Year of Birth,Gender,Ethnicity,Child's First Name,Count,Rank"
+
+
+def refuse(self):
+    """
+    Stand-in for `Server.dataset` that fails the test.
+    """
+    raise AssertionError("dataset loaded")
+
+
+class TestStreaming(unittest.TestCase):
+    """
+    A streaming Server serves pages without loading the dataset.
+    """
+
+    def setUp(self):
+        """
+        Write a CSV file of 45 rows.
+        """
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "names.csv")
+        self.write(45)
+        self.loaded = type("Loaded", (SimpleServer,), {"DATA_FILE": self.path})
+        self.streaming = type("Streaming", (self.loaded,),
+                              {"dataset": refuse})
+
+    def tearDown(self):
+        """
+        Remove the file.
+        """
+        self.dir.cleanup()
+
+    def write(self, size):
+        """
+        Write `size` rows to the CSV file.
+        """
+        with open(self.path, "w") as f:
+            f.write(HEADER + "\n")
+            for i in range(size):
+                f.write("2016,FEMALE,ASIAN,Name{},{},1\n".format(i, i))
+
+    def test_pages_match_loaded(self):
+        """
+        Forward, backward and past-the-end pages match a loaded Server's.
+        """
+        server = self.streaming(streaming=True)
+        loaded = self.loaded()
+        for page in (1, 2, 5, 3, 1, 9, 5, 6):
+            self.assertEqual(server.get_page(page, 8),
+                             loaded.get_page(page, 8), page)
+
+    def test_iter_pages(self):
+        """
+        iter_pages reads the whole file in order, short last page included.
+        """
+        pages = list(self.streaming(streaming=True).iter_pages(10, start=2))
+        self.assertEqual([len(page) for page in pages], [10, 10, 10, 5])
+        self.assertEqual(pages[0][0][3], "Name10")
+        self.assertEqual(pages[-1][-1][3], "Name44")
+
+    def test_reload_restarts_stream(self):
+        """
+        After a reload the stream reads the new file, and the version
+        changes without loading the dataset.
+        """
+        server = self.streaming(streaming=True)
+        version = server.dataset_version()
+        self.assertEqual(len(server.get_page(5, 10)), 5)
+        self.write(60)
+        os.utime(self.path, ns=(0, 10 ** 18))
+        self.assertNotEqual(server.reload(), version)
+        self.assertEqual(len(server.get_page(5, 10)), 10)
+        self.assertEqual(server.get_page(6, 10)[-1][3], "Name59")
+
+    def test_row_stream(self):
+        """
+        RowStream returns what is left at the end of the file.
+        """
+        stream = RowStream(self.path)
+        try:
+            self.assertEqual(stream.rows(40, 50)[0][3], "Name40")
+            self.assertEqual(stream.rows(50, 60), [])
+            self.assertEqual(stream.rows(0, 1)[0][3], "Name0")
+        finally:
+            stream.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for the typed, columnar dataset.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+typed = __import__('7-typed_dataset')
+TypedDataset = typed.TypedDataset
+BabyName = typed.BabyName
+Dictionary = typed.Dictionary
+SimpleServer = __import__('1-simple_pagination').Server
+
+HEADER = "Year of Birth,Gender,Ethnicity,Child's First Name,Count,Rank"
+
+
+class TestTypedDataset(unittest.TestCase):
+    """
+    Rows are parsed into BabyName tuples of the right types.
+    """
+
+    def setUp(self):
+        """
+        Write a CSV file with a blank line and quoted fields.
+        """
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "names.csv")
+        with open(self.path, "w") as f:
+            f.write(HEADER + "\n")
+            f.write("2016,FEMALE,ASIAN AND PACIFIC ISLANDER,Olivia,172,1\n")
+            f.write("\n")
+            f.write('2011,MALE,"HISPANIC, OTHER",Liam,99,2\n')
+            f.write("2012,FEMALE,ASIAN AND PACIFIC ISLANDER,Chloe,112,3\n")
+        self.dataset = TypedDataset(self.path)
+
+    def tearDown(self):
+        """
+        Remove the file.
+        """
+        self.dir.cleanup()
+
+    def test_coercion(self):
+        """
+        Numeric columns are ints, string columns are str.
+        """
+        row = self.dataset[0]
+        self.assertIsInstance(row, BabyName)
+        self.assertEqual(row, BabyName(2016, "FEMALE",
+                                       "ASIAN AND PACIFIC ISLANDER",
+                                       "Olivia", 172, 1))
+        self.assertIsInstance(row.year, int)
+        self.assertEqual(self.dataset[1].ethnicity, "HISPANIC, OTHER")
+
+    def test_sequence(self):
+        """
+        Blank lines are skipped; indexes and slices behave like a list.
+        """
+        self.assertEqual(len(self.dataset), 3)
+        self.assertEqual(self.dataset[-1].name, "Chloe")
+        self.assertEqual([row.rank for row in self.dataset[::-1]], [3, 2, 1])
+        self.assertEqual(self.dataset[5:], [])
+        with self.assertRaises(IndexError):
+            self.dataset[3]
+
+    def test_columns(self):
+        """
+        Whole columns are available, and unknown ones refused.
+        """
+        self.assertEqual(list(self.dataset.column("count")), [172, 99, 112])
+        self.assertEqual(list(self.dataset.column("gender")),
+                         ["FEMALE", "MALE", "FEMALE"])
+        with self.assertRaises(ValueError):
+            self.dataset.column("colour")
+
+    def test_server_loader(self):
+        """
+        A Server built with the loader pages BabyName rows.
+        """
+        server = type("TestServer", (SimpleServer,),
+                      {"DATA_FILE": self.path})(loader=TypedDataset)
+        page = server.get_page(1, 2)
+        self.assertEqual([row.name for row in page], ["Olivia", "Liam"])
+        self.assertEqual(server.get_page(1, 1, order_by="count")[0].count, 99)
+
+
+class TestDictionary(unittest.TestCase):
+    """
+    Dictionary encoding stores each value once.
+    """
+
+    def test_widens_codes(self):
+        """
+        Codes widen from bytes when a column has more than 256 values.
+        """
+        column = Dictionary()
+        for i in range(300):
+            column.append("v{}".format(i % 290))
+        self.assertEqual(column.codes.typecode, 'H')
+        self.assertEqual(len(column.values), 290)
+        self.assertEqual(column[295], "v5")
+        self.assertEqual(len(column), 300)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,36 +4,106 @@ This module implements a basic caching system.
 """
 
 from base_caching import BaseCaching
+from bulk_ops import BulkMixin
+from read_through import ReadThroughMixin
+from shared_storage import locked
+from timing_wheel import ExpiryMixin
 
 
-class BasicCache(BaseCaching):
+class BasicCache(ReadThroughMixin, BulkMixin, ExpiryMixin, BaseCaching):
     """
     BasicCache class that inherits from BaseCaching and provides a basic cache
     implementation.
 
+    Items are never discarded, except on a shared storage, whose capacity is
+    fixed: a new key put into a full storage discards the first added item.
+
     Attributes:
         cache_data (dict): The dictionary where cached data is stored.
     """
-    def __init__(self):
+    def __init__(self, storage=None, default_ttl=None):
         """
         Initialize the cache.
+
+        Args:
+            storage (SharedOrderedDict, optional): Mapping to keep the items
+            in, e.g. one shared with other processes.
+            default_ttl (float, optional): Seconds an item lives when put
+            without a `ttl`. Defaults to never expiring.
         """
         super().__init__()
+        if storage is not None:
+            self.cache_data = storage
+        self._init_expiry(default_ttl, shared=storage is not None)
 
-    def put(self, key, item):
+    def put(self, key, item, ttl=None):
         """
         Add an item to the cache.
 
         Args:
             key (str): The key under which the item should be stored.
             item (any): The item to be stored in the cache.
+            ttl (float, optional): Seconds until the item expires. Defaults
+            to `default_ttl`.
+
+        Returns:
+            None
+        """
+        self._check_ttl(ttl)
+        with locked(self.cache_data):
+            self._sweep(key)
+            if key is None or item is None:
+                return
+            self._fit(key)
+            self.cache_data[key] = item
+            self._expire_after(key, ttl)
+
+    def put_many(self, mapping, ttl=None):
+        """
+        Add several items at once.
+
+        Args:
+            mapping (dict): The items to be stored, by key.
+            ttl (float, optional): Seconds until the items expire. Defaults
+            to `default_ttl`.
 
         Returns:
             None
         """
-        if key is None or item is None:
-            return
-        self.cache_data[key] = item
+        self._check_ttl(ttl)
+        with locked(self.cache_data):
+            self._sweep_many(mapping)
+            for key, item in mapping.items():
+                if key is None or item is None:
+                    continue
+                self._fit(key)
+                self.cache_data[key] = item
+                self._expire_after(key, ttl)
+
+    def _fit(self, key):
+        """
+        Discard the first added item if a new key does not fit in the
+        storage. A plain dictionary is never full.
+
+        Args:
+            key (str): The key about to be put.
+        """
+        capacity = getattr(self.cache_data, "capacity", None)
+        if capacity is not None and key not in self.cache_data and \
+                len(self.cache_data) >= capacity:
+            discarded, _ = self.cache_data.popitem(False)
+            self.timers.cancel(discarded)
+            print(f"DISCARD: {discarded}")
+
+    def _remove(self, key):
+        """
+        Remove an item.
+
+        Args:
+            key (str): The key of the item.
+        """
+        del self.cache_data[key]
+        self.timers.cancel(key)
 
     def get(self, key):
         """
@@ -45,6 +115,8 @@ class BasicCache(BaseCaching):
         Returns:
             any: The item stored in the cache, or None if the key is not found.
         """
-        if key is None or key not in self.cache_data:
-            return None
-        return self.cache_data[key]
+        with locked(self.cache_data):
+            self._sweep(key)
+            if key is None or key not in self.cache_data:
+                return None
+            return self.cache_data[key]
@@ -5,10 +5,15 @@ the First In, First Out (FIFO) algorithm.
 """
 
 from base_caching import BaseCaching
+from bulk_ops import BulkMixin
 from collections import OrderedDict
+from cache_budget import CacheBudget
+from read_through import ReadThroughMixin
+from shared_storage import locked
+from timing_wheel import ExpiryMixin
 
 
-class FIFOCache(BaseCaching):
+class FIFOCache(ReadThroughMixin, BulkMixin, ExpiryMixin, BaseCaching):
     """
     FIFOCache class implements a caching system with FIFO eviction policy.
 
@@ -16,35 +21,91 @@ class FIFOCache(BaseCaching):
         BaseCaching (class): Base class with cache system interface.
     """
 
-    def __init__(self):
+    def __init__(self, storage=None, capacity=None, max_bytes=None,
+                 weigher=None, default_ttl=None):
         """
         Initialize the cache.
 
+        Args:
+            storage (SharedOrderedDict, optional): Ordered mapping to keep the
+            items in, e.g. one shared with other processes.
+            capacity (int, optional): The maximum number of items, at most
+            what `storage` holds. Defaults to the capacity of `storage`, or
+            `MAX_ITEMS`.
+            max_bytes (int, optional): The maximum total weight of the items.
+            weigher (callable, optional): Weight of a `(key, item)` pair.
+            Defaults to `sys.getsizeof` of the item.
+            default_ttl (float, optional): Seconds an item lives when put
+            without a `ttl`. Defaults to never expiring.
+
         Attributes:
             cache_data (OrderedDict): Dictionary to store the cache items while
             maintaining their insertion order.
+            budget (CacheBudget): The size limits of the cache.
         """
         super().__init__()
-        self.cache_data = OrderedDict()
+        self.cache_data = OrderedDict() if storage is None else storage
+        self.budget = CacheBudget(capacity, max_bytes, weigher, storage,
+                                  default=self.MAX_ITEMS)
+        self._init_expiry(default_ttl, shared=storage is not None)
 
-    def put(self, key, item):
+    def put(self, key, item, ttl=None):
         """
-        Add an item to the cache. If the cache exceeds its maximum size,
-        remove the first added item.
+        Add an item to the cache. If the cache would exceed its budget,
+        remove the first added items first.
 
         Args:
             key (str): The key under which the item should be stored.
             item (any): The item to be stored in the cache.
+            ttl (float, optional): Seconds until the item expires. Defaults
+            to `default_ttl`.
 
         Returns:
             None
         """
-        if key is None or item is None:
-            return
-        if len(self.cache_data) >= BaseCaching.MAX_ITEMS:
-            discard = self.cache_data.popitem(False)
-            print(f"DISCARD: {discard[0]}")
-        self.cache_data[key] = item
+        self._check_ttl(ttl)
+        with locked(self.cache_data):
+            self._sweep(key)
+            if key is None or item is None:
+                return
+            weight = self.budget.weigh(key, item)
+            if not self.budget.admits(weight):
+                if key in self.cache_data:
+                    self._remove(key)
+                return
+            if key not in self.cache_data:
+                while self.cache_data and self.budget.exceeded(
+                        len(self.cache_data) + 1, weight):
+                    self._evict()
+            self.cache_data[key] = item
+            self.budget.charge(key, weight)
+            while self.budget.exceeded(len(self.cache_data)):
+                self._evict()
+            self._expire_after(key, ttl)
+
+    def _evict(self):
+        """
+        Discard the first added item.
+
+        Returns:
+            str: The key of the discarded item.
+        """
+        key, _ = self.cache_data.popitem(False)
+        self.budget.release(key)
+        self.timers.cancel(key)
+        print(f"DISCARD: {key}")
+        return key
+
+    def _remove(self, key):
+        """
+        Remove an item without reporting it as discarded.
+
+        Args:
+            key (str): The key of the item.
+        """
+        del self.cache_data[key]
+        self.budget.release(key)
+        self.timers.cancel(key)
 
     def get(self, key):
         """
@@ -57,6 +118,8 @@ class FIFOCache(BaseCaching):
             any: The value associated with the key, or None if the key is not
             found.
         """
-        if key is None:
-            return None
-        return self.cache_data.get(key)
+        with locked(self.cache_data):
+            self._sweep(key)
+            if key is None:
+                return None
+            return self.cache_data.get(key)
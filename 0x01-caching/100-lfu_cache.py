@@ -2,72 +2,275 @@
 """
 LFUCache module implements a caching system using
 the Least Frequently Used (LFU) algorithm.
+
+Keys are kept in frequency buckets, a doubly linked list of nodes in
+increasing frequency order. Each bucket holds its keys from least to most
+recently used, so the key to evict is always the first key of the first
+bucket, and `put` and `get` run in O(1).
 """
 
-from collections import OrderedDict, defaultdict
+from collections import OrderedDict
 from base_caching import BaseCaching
+from bulk_ops import BulkMixin
+from cache_budget import CacheBudget
+from read_through import ReadThroughMixin
+from shared_storage import locked
+from timing_wheel import ExpiryMixin
+
+
+class FrequencyNode:
+    """
+    FrequencyNode is a bucket of the keys used the same number of times.
+
+    Attributes:
+        freq (int): The number of uses of the keys in the bucket.
+        keys (OrderedDict): The keys, least recently used first.
+        prev (FrequencyNode): The bucket with the next lower frequency.
+        next (FrequencyNode): The bucket with the next higher frequency.
+    """
+    __slots__ = ("freq", "keys", "prev", "next")
+
+    def __init__(self, freq, prev=None, next=None):
+        """
+        Initialize an empty bucket.
+        """
+        self.freq = freq
+        self.keys = OrderedDict()
+        self.prev = prev
+        self.next = next
+
+    def insert_after(self, freq):
+        """
+        Link a new empty bucket right after this one.
+
+        Args:
+            freq (int): The frequency of the new bucket.
+
+        Returns:
+            FrequencyNode: The new bucket.
+        """
+        node = FrequencyNode(freq, self, self.next)
+        if self.next is not None:
+            self.next.prev = node
+        self.next = node
+        return node
+
+    def unlink(self):
+        """
+        Remove this bucket from the list.
+        """
+        self.prev.next = self.next
+        if self.next is not None:
+            self.next.prev = self.prev
 
 
-class LFUCache(BaseCaching):
+class LFUCache(ReadThroughMixin, BulkMixin, ExpiryMixin, BaseCaching):
     """
     LFUCache class implements a caching system with LFU eviction policy.
 
     Args:
         BaseCaching (class): Base class with cache system interface.
     """
-    def __init__(self):
+    def __init__(self, storage=None, capacity=None, max_bytes=None,
+                 weigher=None, default_ttl=None, decay_every=None):
         """
         Initialize the cache.
 
+        Args:
+            storage (SharedOrderedDict, optional): Mapping to keep the items
+            in, shared with other processes. The use counts and recency then
+            live in the shared segment too, and the coldest entry is found
+            by scanning it.
+            capacity (int, optional): The maximum number of items, at most
+            what `storage` holds. Defaults to the capacity of `storage`, or
+            `MAX_ITEMS`.
+            max_bytes (int, optional): The maximum total weight of the items.
+            weigher (callable, optional): Weight of a `(key, item)` pair.
+            Defaults to `sys.getsizeof` of the item.
+            default_ttl (float, optional): Seconds an item lives when put
+            without a `ttl`. Defaults to never expiring.
+            decay_every (int, optional): Halve every frequency after this
+            many `put`/`get` calls, so keys that were hot long ago cannot
+            pin the cache forever. Aging walks the whole cache, so it stays
+            O(1) amortized when this is at least the capacity.
+
         Attributes:
-            cache_data (OrderedDict): Dictionary to store the cache items.
-            frequency (defaultdict): Dictionary to store the frequency
-            count of items.
-            lru (defaultdict): Dictionary to store the order of insertion for
-            LRU policy within the same frequency count.
-            lru_counter (int): Counter to maintain the order of insertion.
+            cache_data (dict): Dictionary to store the cache items.
+            nodes (dict): The frequency bucket of every key.
+            head (FrequencyNode): Sentinel before the lowest frequency
+            bucket.
+            budget (CacheBudget): The size limits of the cache.
         """
         super().__init__()
-        self.cache_data = OrderedDict()
-        self.frequency = defaultdict(int)
-        self.lru = defaultdict(OrderedDict)
-        self.lru_counter = 0
+        assert decay_every is None or decay_every > 0
+        self.cache_data = {} if storage is None else storage
+        self.shared = storage is not None
+        self.nodes = {}
+        self.head = FrequencyNode(0)
+        self.decay_every = decay_every
+        self.operations = 0
+        self.budget = CacheBudget(capacity, max_bytes, weigher, storage,
+                                  default=self.MAX_ITEMS)
+        self._init_expiry(default_ttl, shared=storage is not None)
+
+    def frequency(self, key):
+        """
+        Get the number of uses counted for a key.
+
+        Args:
+            key (str): The key.
+
+        Returns:
+            int: The frequency, or 0 if the key is not cached.
+        """
+        node = self.nodes.get(key)
+        return node.freq if node is not None else 0
+
+    def _tick(self):
+        """
+        Count an operation and age the frequencies when it is time to.
+        """
+        if self.decay_every is None or self.shared:
+            return
+        self.operations += 1
+        if self.operations >= self.decay_every:
+            self.operations = 0
+            self.decay()
+
+    def decay(self):
+        """
+        Halve every frequency, merging the buckets that end up equal.
 
-    def put(self, key, item):
+        Keys from a hotter bucket go after the keys they are merged with,
+        as if used more recently.
         """
-        Add an item to the cache. If the cache exceeds its maximum size,
-        remove the least frequently used item, and if there's a tie,
+        node = self.head.next
+        while node is not None:
+            node.freq = max(node.freq // 2, 1)
+            previous = node.prev
+            if previous is not self.head and previous.freq == node.freq:
+                for key in node.keys:
+                    previous.keys[key] = None
+                    self.nodes[key] = previous
+                node.unlink()
+            node = node.next
+
+    def _increment(self, key):
+        """
+        Move a key to the bucket of the next frequency in O(1).
+        """
+        node = self.nodes[key]
+        target = node.next
+        if target is None or target.freq != node.freq + 1:
+            target = node.insert_after(node.freq + 1)
+        target.keys[key] = None
+        self.nodes[key] = target
+        del node.keys[key]
+        if not node.keys:
+            node.unlink()
+
+    def _evict(self):
+        """
+        Discard the least recently used key of the lowest frequency.
+
+        Returns:
+            str: The key of the discarded item.
+        """
+        if self.shared:
+            lru_key = self.cache_data.coldest()
+        else:
+            lru_key = next(iter(self.head.next.keys))
+        self._remove(lru_key)
+        print(f"DISCARD: {lru_key}")
+        return lru_key
+
+    def _remove(self, key):
+        """
+        Remove an item without reporting it as discarded.
+
+        Args:
+            key (str): The key of the item.
+        """
+        del self.cache_data[key]
+        self.budget.release(key)
+        self.timers.cancel(key)
+        if self.shared:
+            return
+        node = self.nodes.pop(key)
+        del node.keys[key]
+        if not node.keys:
+            node.unlink()
+
+    def _touch(self, key):
+        """
+        Count a use of a cached key.
+
+        Args:
+            key (str): The key of the item.
+        """
+        if self.shared:
+            self.cache_data.touch(key)
+            return
+        self._tick()
+        self._increment(key)
+
+    def _insert(self, key, item, prepared):
+        """
+        Store a new key in the bucket of frequency 1.
+
+        Args:
+            key (str): The key of the item.
+            item (any): The item.
+            prepared (None): Unused.
+        """
+        self._tick()
+        self.cache_data[key] = item
+        if self.shared:
+            return
+        node = self.head.next
+        if node is None or node.freq != 1:
+            node = self.head.insert_after(1)
+        node.keys[key] = None
+        self.nodes[key] = node
+
+    def put(self, key, item, ttl=None):
+        """
+        Add an item to the cache. If the cache would exceed its budget,
+        remove the least frequently used items, and if there's a tie,
         remove the least recently used item within the same frequency.
 
         Args:
             key (str): The key under which the item should be stored.
             item (any): The item to be stored in the cache.
+            ttl (float, optional): Seconds until the item expires. Defaults
+            to `default_ttl`.
 
         Returns:
             None
         """
-        if key is None or item is None:
-            return
+        self._check_ttl(ttl)
+        with locked(self.cache_data):
+            self._sweep(key)
+            if key is None or item is None:
+                return
 
-        if key in self.cache_data:
-            self.cache_data[key] = item
-            self.get(key)
-            return
+            weight = self.budget.weigh(key, item)
+            if not self.budget.admits(weight):
+                if key in self.cache_data:
+                    self._remove(key)
+                return
 
-        if len(self.cache_data) >= BaseCaching.MAX_ITEMS:
-            min_freq = min(self.frequency.values())
-            lru_key = next(iter(self.lru[min_freq]))
-            self.cache_data.pop(lru_key)
-            self.frequency.pop(lru_key)
-            self.lru[min_freq].pop(lru_key)
-            if not self.lru[min_freq]:
-                self.lru.pop(min_freq)
-            print(f"DISCARD: {lru_key}")
+            if key in self.cache_data:
+                self.cache_data[key] = item
+                self._touch(key)
+            else:
+                self._make_room(1, weight)
+                self._insert(key, item, None)
 
-        self.cache_data[key] = item
-        self.frequency[key] = 1
-        self.lru[1][key] = self.lru_counter
-        self.lru_counter += 1
+            self.budget.charge(key, weight)
+            while self.budget.exceeded(len(self.cache_data)):
+                self._evict()
+            self._expire_after(key, ttl)
 
     def get(self, key):
         """
@@ -80,17 +283,10 @@ class LFUCache(BaseCaching):
             any: The value associated with the key,
             or None if the key is not found.
         """
-        if key is None or key not in self.cache_data:
-            return None
-
-        value = self.cache_data[key]
-
-        freq = self.frequency[key]
-        self.frequency[key] += 1
-        self.lru[freq].pop(key)
-        if not self.lru[freq]:
-            self.lru.pop(freq)
-        self.lru[freq + 1][key] = self.lru_counter
-        self.lru_counter += 1
+        with locked(self.cache_data):
+            self._sweep(key)
+            if key is None or key not in self.cache_data:
+                return None
 
-        return value
+            self._touch(key)
+            return self.cache_data[key]
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+This module implements thread-safe versions of the caching policies using
+lock striping.
+
+A StripedCache splits its capacity over a number of segments. Each segment is
+an ordinary cache running the same policy, guarded by its own lock, and every
+key always maps to the same segment. Threads working on keys of different
+segments never wait on each other, and each segment still applies its policy
+exactly, so concurrent `move_to_end`/`popitem` calls can no longer corrupt it.
+Eviction is per segment: the policy holds within a segment, approximately
+across the whole cache.
+
+AsyncCache exposes any thread-safe cache to coroutines.
+"""
+
+import asyncio
+import threading
+from base_caching import BaseCaching
+from read_through import ReadThroughMixin
+
+FIFOCache = __import__('1-fifo_cache').FIFOCache
+LIFOCache = __import__('2-lifo_cache').LIFOCache
+LRUCache = __import__('3-lru_cache').LRUCache
+MRUCache = __import__('4-mru_cache').MRUCache
+LFUCache = __import__('100-lfu_cache').LFUCache
+
+
+class StripedCache(ReadThroughMixin, BaseCaching):
+    """
+    StripedCache class implements a thread-safe cache out of segments that
+    each run the same eviction policy.
+
+    Args:
+        BaseCaching (class): Base class with cache system interface.
+    """
+    THREAD_SAFE = True
+
+    def __init__(self, policy, segments=16, capacity=None, max_bytes=None,
+                 weigher=None, **options):
+        """
+        Initialize the segments.
+
+        BaseCaching.__init__ is not called: the items live in the segments,
+        and `cache_data` is a view over them.
+
+        Args:
+            policy (type): The cache class every segment is built from.
+            segments (int): The number of segments, capped at the capacity.
+            capacity (int, optional): The maximum number of items over all
+            segments. Defaults to `MAX_ITEMS`.
+            max_bytes (int, optional): The maximum total weight of the items
+            over all segments.
+            weigher (callable, optional): Weight of a `(key, item)` pair.
+            **options: Other arguments of the policy, e.g. `default_ttl`.
+
+        Attributes:
+            segments (list): The segment caches.
+            locks (list): The lock of every segment.
+        """
+        capacity = capacity if capacity is not None else self.MAX_ITEMS
+        count = max(min(segments, capacity), 1)
+        per_bytes = None if max_bytes is None else -(-max_bytes // count)
+        self.segments = [
+            policy(capacity=capacity // count + (i < capacity % count),
+                   max_bytes=per_bytes, weigher=weigher, **options)
+            for i in range(count)]
+        self.locks = [threading.Lock() for _ in range(count)]
+
+    @property
+    def cache_data(self):
+        """
+        Snapshot of the items of every segment.
+
+        Returns:
+            dict: The cached items.
+        """
+        data = {}
+        for segment, lock in zip(self.segments, self.locks):
+            with lock:
+                data.update(segment.cache_data)
+        return data
+
+    def _segment(self, key):
+        """
+        Index of the segment that owns a key.
+        """
+        return hash(key) % len(self.segments)
+
+    def put(self, key, item, ttl=None):
+        """
+        Add an item to the segment that owns its key, which evicts according
+        to its policy.
+
+        Args:
+            key (str): The key under which the item should be stored.
+            item (any): The item to be stored in the cache.
+            ttl (float, optional): Seconds until the item expires. Defaults
+            to the `default_ttl` option of the policy.
+
+        Returns:
+            None
+        """
+        if key is None or item is None:
+            return
+        index = self._segment(key)
+        with self.locks[index]:
+            self.segments[index].put(key, item, ttl)
+
+    def get(self, key):
+        """
+        Retrieve an item from the segment that owns its key.
+
+        Args:
+            key (str): The key of the item to be retrieved.
+
+        Returns:
+            any: The value associated with the key, or None if the key is not
+            found.
+        """
+        if key is None:
+            return None
+        index = self._segment(key)
+        with self.locks[index]:
+            return self.segments[index].get(key)
+
+    def _split(self, keys):
+        """
+        Group keys by the index of the segment that owns them.
+        """
+        groups = {}
+        for key in keys:
+            if key is not None:
+                groups.setdefault(self._segment(key), []).append(key)
+        return groups
+
+    def get_many(self, keys):
+        """
+        Retrieve the items of several keys, taking the lock of each segment
+        involved once.
+
+        Args:
+            keys (iterable): The keys of the items to be retrieved.
+
+        Returns:
+            dict: The cached items by key, in the order asked for. Keys that
+            are not found are left out.
+        """
+        keys = list(keys)
+        found = {}
+        for index, group in self._split(keys).items():
+            with self.locks[index]:
+                found.update(self.segments[index].get_many(group))
+        return {key: found[key] for key in keys if key in found}
+
+    def put_many(self, mapping, ttl=None):
+        """
+        Add several items, each segment taking its share in one batch.
+
+        Args:
+            mapping (dict): The items to be stored, by key.
+            ttl (float, optional): Seconds until the items expire. Defaults
+            to the `default_ttl` option of the policy.
+
+        Returns:
+            None
+        """
+        for index, group in self._split(mapping).items():
+            with self.locks[index]:
+                self.segments[index].put_many(
+                    {key: mapping[key] for key in group}, ttl)
+
+
+class ConcurrentFIFOCache(StripedCache):
+    """
+    ConcurrentFIFOCache is a thread-safe FIFOCache.
+    """
+
+    def __init__(self, segments=16, **options):
+        """
+        Initialize the segments; see StripedCache.
+        """
+        super().__init__(FIFOCache, segments, **options)
+
+
+class ConcurrentLIFOCache(StripedCache):
+    """
+    ConcurrentLIFOCache is a thread-safe LIFOCache.
+    """
+
+    def __init__(self, segments=16, **options):
+        """
+        Initialize the segments; see StripedCache.
+        """
+        super().__init__(LIFOCache, segments, **options)
+
+
+class ConcurrentLRUCache(StripedCache):
+    """
+    ConcurrentLRUCache is a thread-safe LRUCache.
+    """
+
+    def __init__(self, segments=16, **options):
+        """
+        Initialize the segments; see StripedCache.
+        """
+        super().__init__(LRUCache, segments, **options)
+
+
+class ConcurrentMRUCache(StripedCache):
+    """
+    ConcurrentMRUCache is a thread-safe MRUCache.
+    """
+
+    def __init__(self, segments=16, **options):
+        """
+        Initialize the segments; see StripedCache.
+        """
+        super().__init__(MRUCache, segments, **options)
+
+
+class ConcurrentLFUCache(StripedCache):
+    """
+    ConcurrentLFUCache is a thread-safe LFUCache.
+    """
+
+    def __init__(self, segments=16, **options):
+        """
+        Initialize the segments; see StripedCache.
+        """
+        super().__init__(LFUCache, segments, **options)
+
+
+class AsyncCache:
+    """
+    AsyncCache exposes a thread-safe cache to coroutines.
+
+    Cache operations do not await, so by default they run inline and a
+    coroutine never sees a half-applied `put`. With an executor they run on
+    its threads instead, for storage whose lock can block the event loop,
+    such as a SharedOrderedDict.
+    """
+
+    def __init__(self, cache, executor=None):
+        """
+        Wrap a cache.
+
+        Args:
+            cache (StripedCache): The thread-safe cache.
+            executor (concurrent.futures.Executor, optional): Where to run
+            the cache operations. Defaults to running them inline.
+        """
+        self.cache = cache
+        self.executor = executor
+
+    async def put(self, key, item):
+        """
+        Add an item to the cache.
+
+        Args:
+            key (str): The key under which the item should be stored.
+            item (any): The item to be stored in the cache.
+
+        Returns:
+            None
+        """
+        if self.executor is None:
+            return self.cache.put(key, item)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.cache.put,
+                                          key, item)
+
+    async def get(self, key):
+        """
+        Retrieve an item from the cache.
+
+        Args:
+            key (str): The key of the item to be retrieved.
+
+        Returns:
+            any: The value associated with the key, or None if the key is not
+            found.
+        """
+        if self.executor is None:
+            return self.cache.get(key)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.cache.get, key)
+
+    async def put_many(self, mapping):
+        """
+        Add several items to the cache.
+
+        Args:
+            mapping (dict): The items to be stored, by key.
+
+        Returns:
+            None
+        """
+        if self.executor is None:
+            return self.cache.put_many(mapping)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.cache.put_many,
+                                          mapping)
+
+    async def get_many(self, keys):
+        """
+        Retrieve the items of several keys.
+
+        Args:
+            keys (iterable): The keys of the items to be retrieved.
+
+        Returns:
+            dict: The cached items by key. Keys that are not found are left
+            out.
+        """
+        if self.executor is None:
+            return self.cache.get_many(keys)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.cache.get_many,
+                                          list(keys))
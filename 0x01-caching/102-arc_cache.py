@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+ARCCache module implements a caching system using the Adaptive Replacement
+Cache (ARC) algorithm of Megiddo and Modha.
+
+Items seen once live in T1, items seen again in T2, both in LRU order. The
+keys last evicted from each are remembered in the ghost lists B1 and B2.
+A miss on a ghost key shows which list was evicted too eagerly and moves
+the target size `p` of T1 towards it, so the cache adapts between recency
+and frequency, and a one-off scan only ever churns T1.
+"""
+
+from collections import OrderedDict
+from base_caching import BaseCaching
+from bulk_ops import BulkMixin
+from cache_budget import CacheBudget
+from read_through import ReadThroughMixin
+from timing_wheel import ExpiryMixin
+
+
+class ARCCache(ReadThroughMixin, BulkMixin, ExpiryMixin, BaseCaching):
+    """
+    ARCCache class implements a caching system with ARC eviction policy.
+
+    Args:
+        BaseCaching (class): Base class with cache system interface.
+    """
+    def __init__(self, capacity=None, max_bytes=None, weigher=None,
+                 default_ttl=None):
+        """
+        Initialize the cache.
+
+        Args:
+            capacity (int, optional): The maximum number of items. Defaults
+            to `MAX_ITEMS`.
+            max_bytes (int, optional): The maximum total weight of the items.
+            weigher (callable, optional): Weight of a `(key, item)` pair.
+            Defaults to `sys.getsizeof` of the item.
+            default_ttl (float, optional): Seconds an item lives when put
+            without a `ttl`. Defaults to never expiring.
+
+        Attributes:
+            cache_data (dict): Dictionary to store the cache items.
+            t1 (OrderedDict): Keys seen once, least recently used first.
+            t2 (OrderedDict): Keys seen more than once, least recently used
+            first.
+            b1 (OrderedDict): Ghost keys evicted from T1.
+            b2 (OrderedDict): Ghost keys evicted from T2.
+            p (float): The target size of T1.
+            budget (CacheBudget): The size limits of the cache.
+        """
+        super().__init__()
+        self.budget = CacheBudget(
+            capacity if capacity is not None else self.MAX_ITEMS,
+            max_bytes, weigher)
+        self._init_expiry(default_ttl)
+        self.t1 = OrderedDict()
+        self.t2 = OrderedDict()
+        self.b1 = OrderedDict()
+        self.b2 = OrderedDict()
+        self.p = 0
+
+    def _evict(self, in_b2=False):
+        """
+        Discard the LRU item of T1 or T2, remembering it as a ghost.
+
+        Args:
+            in_b2 (bool): Whether the key being inserted was in B2.
+
+        Returns:
+            str: The key of the discarded item.
+        """
+        t1 = len(self.t1)
+        if self.t1 and (t1 > self.p or (in_b2 and t1 == self.p) or
+                        not self.t2):
+            key, _ = self.t1.popitem(last=False)
+            self.b1[key] = None
+        else:
+            key, _ = self.t2.popitem(last=False)
+            self.b2[key] = None
+        del self.cache_data[key]
+        self.budget.release(key)
+        self.timers.cancel(key)
+        print(f"DISCARD: {key}")
+        return key
+
+    def _remove(self, key):
+        """
+        Remove an item without reporting it as discarded.
+
+        Args:
+            key (str): The key of the item.
+        """
+        self.t1.pop(key, None)
+        self.t2.pop(key, None)
+        del self.cache_data[key]
+        self.budget.release(key)
+        self.timers.cancel(key)
+
+    def _settle(self):
+        """
+        Trim the ghost lists, keeping |T1| + |B1| within the capacity and all
+        four lists within twice the capacity.
+        """
+        capacity = self.budget.capacity
+        while self.b1 and len(self.t1) + len(self.b1) > capacity:
+            self.b1.popitem(last=False)
+        while self.b2 and len(self.t1) + len(self.t2) + len(self.b1) + \
+                len(self.b2) > 2 * capacity:
+            self.b2.popitem(last=False)
+
+    def _touch(self, key):
+        """
+        Move a cached key to the most recently used end of T2.
+
+        Args:
+            key (str): The key of the item.
+        """
+        if key in self.t1:
+            del self.t1[key]
+            self.t2[key] = None
+        else:
+            self.t2.move_to_end(key)
+
+    def _prepare(self, key):
+        """
+        Adapt the target size of T1 if a new key is a ghost, and forget the
+        ghost.
+
+        Args:
+            key (str): The key about to be inserted.
+
+        Returns:
+            bool: Whether the key was a ghost.
+        """
+        capacity = self.budget.capacity
+        if key in self.b1:
+            self.p = min(capacity,
+                         self.p + max(len(self.b2) / len(self.b1), 1))
+            del self.b1[key]
+            return True
+        if key in self.b2:
+            self.p = max(0, self.p - max(len(self.b1) / len(self.b2), 1))
+            del self.b2[key]
+            return True
+        return False
+
+    def _insert(self, key, item, prepared):
+        """
+        Store a new key in T2 if it was a ghost, and in T1 otherwise.
+
+        Args:
+            key (str): The key of the item.
+            item (any): The item.
+            prepared (bool): Whether the key was a ghost.
+        """
+        if prepared:
+            self.t2[key] = None
+        else:
+            self.t1[key] = None
+        self.cache_data[key] = item
+
+    def put(self, key, item, ttl=None):
+        """
+        Add an item to the cache. If the cache would exceed its budget,
+        remove the least recently used items of T1 or T2, as the target
+        size of T1 dictates.
+
+        Args:
+            key (str): The key under which the item should be stored.
+            item (any): The item to be stored in the cache.
+            ttl (float, optional): Seconds until the item expires. Defaults
+            to `default_ttl`.
+
+        Returns:
+            None
+        """
+        self._sweep(key)
+        if key is None or item is None:
+            return
+        weight = self.budget.weigh(key, item)
+        if not self.budget.admits(weight):
+            if key in self.cache_data:
+                self._remove(key)
+            return
+
+        if key in self.cache_data:
+            self.cache_data[key] = item
+            self._touch(key)
+        else:
+            in_b2 = key in self.b2
+            ghost = self._prepare(key)
+            while self.cache_data and self.budget.exceeded(
+                    len(self.cache_data) + 1, weight):
+                self._evict(in_b2)
+            self._insert(key, item, ghost)
+
+        self.budget.charge(key, weight)
+        while self.budget.exceeded(len(self.cache_data)):
+            self._evict()
+        self._settle()
+        self._expire_after(key, ttl)
+
+    def get(self, key):
+        """
+        Retrieve an item from the cache by key, moving it to T2.
+
+        Args:
+            key (str): The key of the item to be retrieved.
+
+        Returns:
+            any: The value associated with the key, or None if the key is not
+            found.
+        """
+        self._sweep(key)
+        if key is None or key not in self.cache_data:
+            return None
+        self._touch(key)
+        return self.cache_data[key]
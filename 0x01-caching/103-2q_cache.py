@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+TwoQueueCache module implements a caching system using the full 2Q
+algorithm of Johnson and Shasha.
+
+New items enter A1in, a FIFO queue a quarter of the cache in size. Items
+pushed out of A1in are only remembered, by key, in the ghost queue A1out.
+An item put again while its key is in A1out has proven it is reused and
+enters Am, the LRU main queue. Items used once, such as the pages of a
+scan, therefore never displace the working set held in Am.
+"""
+
+from collections import OrderedDict
+from base_caching import BaseCaching
+from bulk_ops import BulkMixin
+from cache_budget import CacheBudget
+from read_through import ReadThroughMixin
+from timing_wheel import ExpiryMixin
+
+
+class TwoQueueCache(ReadThroughMixin, BulkMixin, ExpiryMixin, BaseCaching):
+    """
+    TwoQueueCache class implements a caching system with 2Q eviction policy.
+
+    Args:
+        BaseCaching (class): Base class with cache system interface.
+    """
+    def __init__(self, capacity=None, max_bytes=None, weigher=None,
+                 default_ttl=None, in_ratio=0.25, out_ratio=0.5):
+        """
+        Initialize the cache.
+
+        Args:
+            capacity (int, optional): The maximum number of items. Defaults
+            to `MAX_ITEMS`.
+            max_bytes (int, optional): The maximum total weight of the items.
+            weigher (callable, optional): Weight of a `(key, item)` pair.
+            Defaults to `sys.getsizeof` of the item.
+            default_ttl (float, optional): Seconds an item lives when put
+            without a `ttl`. Defaults to never expiring.
+            in_ratio (float): Size of A1in as a fraction of the capacity.
+            out_ratio (float): Size of A1out as a fraction of the capacity.
+
+        Attributes:
+            cache_data (dict): Dictionary to store the cache items.
+            a1in (OrderedDict): Keys seen once, first added first.
+            a1out (OrderedDict): Ghost keys pushed out of A1in.
+            am (OrderedDict): Reused keys, least recently used first.
+            budget (CacheBudget): The size limits of the cache.
+        """
+        super().__init__()
+        self.budget = CacheBudget(
+            capacity if capacity is not None else self.MAX_ITEMS,
+            max_bytes, weigher)
+        self._init_expiry(default_ttl)
+        self.a1in = OrderedDict()
+        self.a1out = OrderedDict()
+        self.am = OrderedDict()
+        self.in_size = max(int(self.budget.capacity * in_ratio), 1)
+        self.out_size = max(int(self.budget.capacity * out_ratio), 1)
+
+    def _evict(self):
+        """
+        Discard the first added item of A1in if it is over its size, and
+        otherwise the least recently used item of Am.
+
+        Returns:
+            str: The key of the discarded item.
+        """
+        if self.a1in and (len(self.a1in) > self.in_size or not self.am):
+            key, _ = self.a1in.popitem(last=False)
+            self.a1out[key] = None
+            if len(self.a1out) > self.out_size:
+                self.a1out.popitem(last=False)
+        else:
+            key, _ = self.am.popitem(last=False)
+        del self.cache_data[key]
+        self.budget.release(key)
+        self.timers.cancel(key)
+        print(f"DISCARD: {key}")
+        return key
+
+    def _remove(self, key):
+        """
+        Remove an item without reporting it as discarded.
+
+        Args:
+            key (str): The key of the item.
+        """
+        self.a1in.pop(key, None)
+        self.am.pop(key, None)
+        del self.cache_data[key]
+        self.budget.release(key)
+        self.timers.cancel(key)
+
+    def _touch(self, key):
+        """
+        Make a cached key the most recently used if it is in Am.
+
+        Args:
+            key (str): The key of the item.
+        """
+        if key in self.am:
+            self.am.move_to_end(key)
+
+    def _prepare(self, key):
+        """
+        Forget a new key's ghost in A1out, before eviction can trim it.
+
+        Args:
+            key (str): The key about to be inserted.
+
+        Returns:
+            bool: Whether the key was in A1out, i.e. is reused.
+        """
+        if key in self.a1out:
+            del self.a1out[key]
+            return True
+        return False
+
+    def _insert(self, key, item, prepared):
+        """
+        Store a new key in Am if it is reused, and in A1in otherwise.
+
+        Args:
+            key (str): The key of the item.
+            item (any): The item.
+            prepared (bool): Whether the key was in A1out.
+        """
+        if prepared:
+            self.am[key] = None
+        else:
+            self.a1in[key] = None
+        self.cache_data[key] = item
+
+    def put(self, key, item, ttl=None):
+        """
+        Add an item to the cache. If the cache would exceed its budget,
+        remove items from A1in or Am first.
+
+        Args:
+            key (str): The key under which the item should be stored.
+            item (any): The item to be stored in the cache.
+            ttl (float, optional): Seconds until the item expires. Defaults
+            to `default_ttl`.
+
+        Returns:
+            None
+        """
+        self._sweep(key)
+        if key is None or item is None:
+            return
+        weight = self.budget.weigh(key, item)
+        if not self.budget.admits(weight):
+            if key in self.cache_data:
+                self._remove(key)
+            return
+
+        if key in self.cache_data:
+            self.cache_data[key] = item
+            self._touch(key)
+        else:
+            reused = self._prepare(key)
+            self._make_room(1, weight)
+            self._insert(key, item, reused)
+
+        self.budget.charge(key, weight)
+        while self.budget.exceeded(len(self.cache_data)):
+            self._evict()
+        self._expire_after(key, ttl)
+
+    def get(self, key):
+        """
+        Retrieve an item from the cache by key. A hit in Am makes the item
+        the most recently used; a hit in A1in leaves it in place.
+
+        Args:
+            key (str): The key of the item to be retrieved.
+
+        Returns:
+            any: The value associated with the key, or None if the key is not
+            found.
+        """
+        self._sweep(key)
+        if key is None or key not in self.cache_data:
+            return None
+        self._touch(key)
+        return self.cache_data[key]
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+TinyLFUCache module implements a caching system using the W-TinyLFU
+algorithm of Einziger, Friedman and Manes.
+
+New items enter a small LRU window. An item leaving the window is only
+admitted to the main cache, a segmented LRU, if a count-min sketch of
+recent accesses says it is used more often than the item the main cache
+would evict for it. The sketch is halved periodically, so the frequencies
+it reports are recent ones: one-off scans are filtered out by the
+admission test, and keys that stop being used lose their advantage.
+"""
+
+from array import array
+from collections import OrderedDict
+from base_caching import BaseCaching
+from bulk_ops import BulkMixin
+from cache_budget import CacheBudget
+from read_through import ReadThroughMixin
+from timing_wheel import ExpiryMixin
+
+# Multipliers deriving the row hashes of the sketch from one key hash
+_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F,
+          0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+_MASK = (1 << 64) - 1
+
+
+class CountMinSketch:
+    """
+    CountMinSketch estimates how often keys were seen, in fixed memory.
+
+    Attributes:
+        width (int): The number of counters per row.
+        rows (list): One array of counters per hash function.
+        sample_size (int): The number of increments between two halvings.
+        additions (int): The increments since the last halving.
+    """
+    MAX_COUNT = 15
+
+    def __init__(self, capacity, depth=4):
+        """
+        Initialize a sketch sized for a cache.
+
+        Args:
+            capacity (int): The capacity of the cache.
+            depth (int): The number of hash functions, at most 4.
+        """
+        self.width = 1 << max((4 * capacity - 1).bit_length(), 4)
+        self.rows = [array('B', bytes(self.width)) for _ in range(depth)]
+        self.sample_size = 10 * capacity
+        self.additions = 0
+
+    def __indexes(self, key):
+        """
+        The counter of a key in every row.
+        """
+        hashed = hash(key) & _MASK
+        shift = 64 - self.width.bit_length() + 1
+        return [((hashed * seed) & _MASK) >> shift
+                for seed in _SEEDS[:len(self.rows)]]
+
+    def increment(self, key):
+        """
+        Count one access to a key, halving every counter once enough
+        accesses were counted.
+
+        Args:
+            key (hashable): The key.
+        """
+        for row, index in zip(self.rows, self.__indexes(key)):
+            if row[index] < self.MAX_COUNT:
+                row[index] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.reset()
+
+    def frequency(self, key):
+        """
+        Estimate the recent number of accesses to a key.
+
+        Args:
+            key (hashable): The key.
+
+        Returns:
+            int: The estimate, never below the true count since the last
+            halving (up to `MAX_COUNT`).
+        """
+        return min(row[index]
+                   for row, index in zip(self.rows, self.__indexes(key)))
+
+    def reset(self):
+        """
+        Halve every counter.
+        """
+        for i, row in enumerate(self.rows):
+            self.rows[i] = array('B', bytes(count >> 1 for count in row))
+        self.additions //= 2
+
+
+class TinyLFUCache(ReadThroughMixin, BulkMixin, ExpiryMixin, BaseCaching):
+    """
+    TinyLFUCache class implements a caching system with W-TinyLFU eviction
+    policy.
+
+    Args:
+        BaseCaching (class): Base class with cache system interface.
+    """
+    def __init__(self, capacity=None, max_bytes=None, weigher=None,
+                 default_ttl=None, window_ratio=0.01, protected_ratio=0.8):
+        """
+        Initialize the cache.
+
+        Args:
+            capacity (int, optional): The maximum number of items. Defaults
+            to `MAX_ITEMS`.
+            max_bytes (int, optional): The maximum total weight of the items.
+            weigher (callable, optional): Weight of a `(key, item)` pair.
+            Defaults to `sys.getsizeof` of the item.
+            default_ttl (float, optional): Seconds an item lives when put
+            without a `ttl`. Defaults to never expiring.
+            window_ratio (float): Size of the window as a fraction of the
+            capacity.
+            protected_ratio (float): Size of the protected segment as a
+            fraction of the main cache.
+
+        Attributes:
+            cache_data (dict): Dictionary to store the cache items.
+            window (OrderedDict): New keys, least recently used first.
+            probation (OrderedDict): Main keys used once since admission,
+            least recently used first.
+            protected (OrderedDict): Main keys used again, least recently
+            used first.
+            sketch (CountMinSketch): Recent access frequencies.
+            budget (CacheBudget): The size limits of the cache.
+        """
+        super().__init__()
+        self.budget = CacheBudget(
+            capacity if capacity is not None else self.MAX_ITEMS,
+            max_bytes, weigher)
+        self._init_expiry(default_ttl)
+        capacity = self.budget.capacity
+        self.window_size = max(int(capacity * window_ratio), 1)
+        self.main_size = max(capacity - self.window_size, 1)
+        self.protected_size = max(int(self.main_size * protected_ratio), 1)
+        self.window = OrderedDict()
+        self.probation = OrderedDict()
+        self.protected = OrderedDict()
+        self.sketch = CountMinSketch(capacity)
+
+    def _discard(self, key):
+        """
+        Drop an item the policy chose to evict.
+        """
+        del self.cache_data[key]
+        self.budget.release(key)
+        self.timers.cancel(key)
+        print(f"DISCARD: {key}")
+
+    def _evict(self):
+        """
+        Discard the item the main cache would give up first, or the oldest
+        window item if the main cache is empty.
+
+        Returns:
+            str: The key of the discarded item.
+        """
+        for segment in (self.probation, self.protected, self.window):
+            if segment:
+                key, _ = segment.popitem(last=False)
+                self._discard(key)
+                return key
+
+    def _remove(self, key):
+        """
+        Remove an item without reporting it as discarded.
+
+        Args:
+            key (str): The key of the item.
+        """
+        self.window.pop(key, None)
+        self.probation.pop(key, None)
+        self.protected.pop(key, None)
+        del self.cache_data[key]
+        self.budget.release(key)
+        self.timers.cancel(key)
+
+    def _touch(self, key):
+        """
+        Count a use of a cached key. A use in probation promotes the key to
+        the protected segment, whose least recently used key is demoted if
+        it overflows.
+
+        Args:
+            key (str): The key of the item.
+        """
+        self.sketch.increment(key)
+        if key in self.window:
+            self.window.move_to_end(key)
+        elif key in self.protected:
+            self.protected.move_to_end(key)
+        else:
+            del self.probation[key]
+            self.protected[key] = None
+            if len(self.protected) > self.protected_size:
+                demoted, _ = self.protected.popitem(last=False)
+                self.probation[demoted] = None
+
+    def _miss(self, key):
+        """
+        Count a lookup of a key that is not cached.
+
+        Args:
+            key (str): The key.
+        """
+        self.sketch.increment(key)
+
+    def _insert(self, key, item, prepared):
+        """
+        Count a new key and store it in the window.
+
+        Args:
+            key (str): The key of the item.
+            item (any): The item.
+            prepared (None): Unused.
+        """
+        self.sketch.increment(key)
+        self.window[key] = None
+        self.cache_data[key] = item
+
+    def _make_room(self, count, weight):
+        """
+        Evict until `weight` more fits the byte budget. The item count is
+        enforced when the window overflows, by the admission test.
+
+        Args:
+            count (int): The number of items about to be stored.
+            weight (int): Their total weight.
+        """
+        while self.cache_data and self.budget.exceeded(
+                len(self.cache_data), weight):
+            self._evict()
+
+    def _settle(self):
+        """
+        Move the window's overflow to the main cache, letting each
+        candidate in only if it is used more often than the victim.
+        """
+        while len(self.window) > self.window_size:
+            candidate, _ = self.window.popitem(last=False)
+            if len(self.probation) + len(self.protected) < self.main_size:
+                self.probation[candidate] = None
+                continue
+            main = self.probation if self.probation else self.protected
+            victim = next(iter(main))
+            if self.sketch.frequency(candidate) > \
+                    self.sketch.frequency(victim):
+                del main[victim]
+                self._discard(victim)
+                self.probation[candidate] = None
+            else:
+                self._discard(candidate)
+
+    def put(self, key, item, ttl=None):
+        """
+        Add an item to the cache window. If the window overflows, its oldest
+        item competes with the main cache's victim on frequency.
+
+        Args:
+            key (str): The key under which the item should be stored.
+            item (any): The item to be stored in the cache.
+            ttl (float, optional): Seconds until the item expires. Defaults
+            to `default_ttl`.
+
+        Returns:
+            None
+        """
+        self._sweep(key)
+        if key is None or item is None:
+            return
+        weight = self.budget.weigh(key, item)
+        if not self.budget.admits(weight):
+            if key in self.cache_data:
+                self._remove(key)
+            return
+
+        if key in self.cache_data:
+            self.cache_data[key] = item
+            self._touch(key)
+        else:
+            self._make_room(1, weight)
+            self._insert(key, item, None)
+            self._settle()
+
+        self.budget.charge(key, weight)
+        while self.budget.exceeded(len(self.cache_data)):
+            self._evict()
+        self._expire_after(key, ttl)
+
+    def get(self, key):
+        """
+        Retrieve an item from the cache by key and count the access. A hit
+        in probation promotes the item to the protected segment.
+
+        Args:
+            key (str): The key of the item to be retrieved.
+
+        Returns:
+            any: The value associated with the key, or None if the key is not
+            found.
+        """
+        self._sweep(key)
+        if key is None:
+            return None
+        if key not in self.cache_data:
+            self._miss(key)
+            return None
+        self._touch(key)
+        return self.cache_data[key]
@@ -4,34 +4,98 @@
 
 from collections import OrderedDict
 from base_caching import BaseCaching
+from bulk_ops import BulkMixin
+from cache_budget import CacheBudget
+from read_through import ReadThroughMixin
+from shared_storage import locked
+from timing_wheel import ExpiryMixin
 
 
-class MRUCache(BaseCaching):
+class MRUCache(ReadThroughMixin, BulkMixin, ExpiryMixin, BaseCaching):
     """_summary_
 
     Args:
         BaseCaching (_type_): _description_
     """
-    def __init__(self):
+    def __init__(self, storage=None, capacity=None, max_bytes=None,
+                 weigher=None, default_ttl=None):
         super().__init__()
-        self.cache_data = OrderedDict()
+        self.cache_data = OrderedDict() if storage is None else storage
+        self.budget = CacheBudget(capacity, max_bytes, weigher, storage,
+                                  default=self.MAX_ITEMS)
+        self._init_expiry(default_ttl, shared=storage is not None)
 
-    def put(self, key, item):
+    def put(self, key, item, ttl=None):
         """_summary_
 
         Args:
             key (_type_): _description_
             item (_type_): _description_
+            ttl (float, optional): Seconds until the item expires.
         """
-        if key is None or item is None:
-            return
-        if key in self.cache_data:
-            self.cache_data.move_to_end(key)
-        elif len(self.cache_data) >= BaseCaching.MAX_ITEMS:
-            discard = self.cache_data.popitem()
-            print(f"DISCARD: {discard[0]}")
+        self._check_ttl(ttl)
+        with locked(self.cache_data):
+            self._sweep(key)
+            if key is None or item is None:
+                return
+            weight = self.budget.weigh(key, item)
+            if not self.budget.admits(weight):
+                if key in self.cache_data:
+                    self._remove(key)
+                return
+            if key in self.cache_data:
+                self.cache_data.move_to_end(key)
+            else:
+                while self.cache_data and self.budget.exceeded(
+                        len(self.cache_data) + 1, weight):
+                    self._evict()
+
+            self.cache_data[key] = item
+            self.budget.charge(key, weight)
+            while self.budget.exceeded(len(self.cache_data)):
+                self._evict()
+            self._expire_after(key, ttl)
+
+    def put_many(self, mapping, ttl=None):
+        """Add several items at once, put in order one by one, since each
+        new key is the most recently used when the next one needs room
+
+        Args:
+            mapping (dict): The items to be stored, by key.
+            ttl (float, optional): Seconds until the items expire. Defaults
+            to `default_ttl`.
+        """
+        self._put_each(mapping, ttl)
+
+    def _evict(self):
+        """Discard the most recently used item
+
+        Returns:
+            str: The key of the discarded item.
+        """
+        key, _ = self.cache_data.popitem()
+        self.budget.release(key)
+        self.timers.cancel(key)
+        print(f"DISCARD: {key}")
+        return key
 
-        self.cache_data[key] = item
+    def _remove(self, key):
+        """Remove an item without reporting it as discarded
+
+        Args:
+            key (str): The key of the item.
+        """
+        del self.cache_data[key]
+        self.budget.release(key)
+        self.timers.cancel(key)
+
+    def _touch(self, key):
+        """Make a cached key the most recently used
+
+        Args:
+            key (str): The key of the item.
+        """
+        self.cache_data.move_to_end(key)
 
     def get(self, key):
         """_summary_
@@ -42,7 +106,9 @@ class MRUCache(BaseCaching):
         Returns:
             _type_: _description_
         """
-        if key not in self.cache_data or key is None:
-            return None
-        self.cache_data.move_to_end(key)
-        return self.cache_data[key]
+        with locked(self.cache_data):
+            self._sweep(key)
+            if key not in self.cache_data or key is None:
+                return None
+            self.cache_data.move_to_end(key)
+            return self.cache_data[key]
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+This module implements bulk operations for the caching policies.
+
+`get_many(keys)` and `put_many(mapping)` look up or store a whole batch of
+keys under one lock acquisition. Expired entries are swept once per batch,
+and `put_many` makes room for all of its new keys before inserting them and
+evicts once at the end, instead of once per key.
+"""
+
+from shared_storage import locked
+
+
+class BulkMixin:
+    """
+    BulkMixin adds `get_many` and `put_many` to a cache class that has
+    `cache_data`, `budget`, `_evict()` and the ExpiryMixin methods.
+
+    A policy adapts the batch to its bookkeeping by overriding the hooks:
+    `_touch` for a hit, `_update` for a put of a cached key, `_miss` for a
+    lookup that missed, `_prepare` and `_insert` for a new key, `_make_room`
+    for the eviction before the new keys go in, and `_settle` for the work
+    left once they are in.
+    """
+
+    def _touch(self, key):
+        """
+        Record a hit on a cached key. Defaults to nothing.
+        """
+
+    def _update(self, key):
+        """
+        Record a put of a new item for a cached key. Defaults to `_touch`.
+        """
+        self._touch(key)
+
+    def _miss(self, key):
+        """
+        Record a lookup of a key that is not cached. Defaults to nothing.
+        """
+
+    def _prepare(self, key):
+        """
+        Look at a new key before room is made for it.
+
+        Returns:
+            any: Passed on to `_insert`. Defaults to None.
+        """
+        return None
+
+    def _insert(self, key, item, prepared):
+        """
+        Store a new key, once there is room for it.
+        """
+        self.cache_data[key] = item
+
+    def _make_room(self, count, weight):
+        """
+        Evict until `count` more items of total `weight` fit the budget.
+        """
+        while self.cache_data and self.budget.exceeded(
+                len(self.cache_data) + count, weight):
+            self._evict()
+
+    def _settle(self):
+        """
+        Finish a put once the new keys are stored. Defaults to nothing.
+        """
+
+    def _put_each(self, mapping, ttl):
+        """
+        Put several items one by one under a single lock, for a policy whose
+        next victim can be the key put just before: making room for a whole
+        batch up front would discard other keys than the same `put` calls.
+        """
+        self._check_ttl(ttl)
+        with locked(self.cache_data):
+            for key, item in mapping.items():
+                self.put(key, item, ttl)
+
+    def get_many(self, keys):
+        """
+        Retrieve the items of several keys at once.
+
+        Args:
+            keys (iterable): The keys of the items to be retrieved.
+
+        Returns:
+            dict: The cached items by key, in the order asked for. Keys that
+            are not found are left out.
+        """
+        keys = [key for key in keys if key is not None]
+        with locked(self.cache_data):
+            self._sweep_many(keys)
+            found = {}
+            for key in keys:
+                if key in self.cache_data:
+                    self._touch(key)
+                    found[key] = self.cache_data[key]
+                else:
+                    self._miss(key)
+            return found
+
+    def put_many(self, mapping, ttl=None):
+        """
+        Add several items at once. Room is made for all the new keys before
+        they are inserted, and the budget is enforced once at the end.
+
+        Args:
+            mapping (dict): The items to be stored, by key.
+            ttl (float, optional): Seconds until the items expire. Defaults
+            to `default_ttl`.
+
+        Returns:
+            None
+        """
+        self._check_ttl(ttl)
+        with locked(self.cache_data):
+            self._sweep_many(mapping)
+            placed = []
+            fresh = []
+            weight = 0
+            for key, item in mapping.items():
+                if key is None or item is None:
+                    continue
+                size = self.budget.weigh(key, item)
+                if not self.budget.admits(size):
+                    if key in self.cache_data:
+                        self._remove(key)
+                    continue
+                placed.append(key)
+                if key in self.cache_data:
+                    self.cache_data[key] = item
+                    self._update(key)
+                    self.budget.charge(key, size)
+                else:
+                    fresh.append((key, item, size, self._prepare(key)))
+                    weight += size
+
+            self._make_room(len(fresh), weight)
+            for key, item, size, prepared in fresh:
+                self._insert(key, item, prepared)
+                self.budget.charge(key, size)
+            self._settle()
+            while self.budget.exceeded(len(self.cache_data)):
+                self._evict()
+            for key in placed:
+                self._expire_after(key, ttl)
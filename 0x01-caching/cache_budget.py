@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+This module implements the size budget of a cache: a maximum number of items
+and, optionally, a maximum total weight, such as the bytes the items take.
+
+A policy asks the budget whether it is exceeded and evicts until it is not,
+so a cache of large values and a cache of small values can both be held to
+their real memory allotment.
+"""
+
+import sys
+
+
+def item_size(key, item):
+    """
+    Default weigher: the shallow size of the item in bytes.
+
+    Args:
+        key (str): The key of the item.
+        item (any): The item.
+
+    Returns:
+        int: `sys.getsizeof(item)`.
+    """
+    return sys.getsizeof(item)
+
+
+class CacheBudget:
+    """
+    CacheBudget tracks the weight of every cached item against the limits of
+    a cache.
+
+    Attributes:
+        capacity (int): The maximum number of items.
+        max_bytes (int): The maximum total weight, or None for no limit.
+        weigher (callable): Computes the weight of a `(key, item)` pair.
+        total (int): The total weight of the cached items.
+    """
+
+    def __init__(self, capacity, max_bytes=None, weigher=None,
+                 storage=None, default=None):
+        """
+        Initialize the budget.
+
+        Args:
+            capacity (int): The maximum number of items, or None for the
+            capacity of `storage`, else `default`.
+            max_bytes (int, optional): The maximum total weight.
+            weigher (callable, optional): Weight of a `(key, item)` pair.
+            Defaults to `item_size`.
+            storage (SharedOrderedDict, optional): Storage shared with other
+            processes that holds the items, where a per-process total cannot
+            be kept.
+            default (int, optional): The capacity without storage.
+
+        Raises:
+            ValueError: If a limit is not positive, if the capacity is more
+            than the storage holds, or if `max_bytes` is set for shared
+            storage.
+        """
+        limit = getattr(storage, "capacity", None)
+        if capacity is None:
+            capacity = default if limit is None else limit
+        elif limit is not None and capacity > limit:
+            raise ValueError("capacity {} exceeds the {} entries of the "
+                             "storage".format(capacity, limit))
+        if capacity is None or capacity < 1 or \
+                (max_bytes is not None and max_bytes < 1):
+            raise ValueError("cache limits must be positive")
+        if storage is not None and max_bytes is not None:
+            raise ValueError("max_bytes is not supported on shared storage")
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.weigher = weigher or item_size
+        self.total = 0
+        self.weights = {}
+
+    def weigh(self, key, item):
+        """
+        Weight of an item, or 0 when there is no weight limit.
+
+        Args:
+            key (str): The key of the item.
+            item (any): The item.
+
+        Returns:
+            int: The weight.
+        """
+        if self.max_bytes is None:
+            return 0
+        return self.weigher(key, item)
+
+    def admits(self, weight):
+        """
+        Whether an item of a given weight can be cached at all.
+
+        Args:
+            weight (int): The weight of the item.
+
+        Returns:
+            bool: False if the item alone exceeds `max_bytes`.
+        """
+        return self.max_bytes is None or weight <= self.max_bytes
+
+    def exceeded(self, count, weight=0):
+        """
+        Whether a cache would be over budget.
+
+        Args:
+            count (int): The number of items it would hold.
+            weight (int): Weight about to be added to the current total.
+
+        Returns:
+            bool: True if some items must be evicted first.
+        """
+        if count > self.capacity:
+            return True
+        return self.max_bytes is not None and \
+            self.total + weight > self.max_bytes
+
+    def charge(self, key, weight):
+        """
+        Record the weight of a cached item, replacing any previous one.
+
+        Args:
+            key (str): The key of the item.
+            weight (int): The weight of the item.
+        """
+        if self.max_bytes is None:
+            return
+        self.total += weight - self.weights.get(key, 0)
+        self.weights[key] = weight
+
+    def release(self, key):
+        """
+        Forget the weight of an item that left the cache.
+
+        Args:
+            key (str): The key of the item.
+        """
+        self.total -= self.weights.pop(key, 0)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+This module benchmarks LFUCache against the previous implementation, which
+looked for the lowest frequency with `min()` on every eviction.
+
+Each cache is filled to capacity untimed, then serves a skewed mix of `put`
+and `get` calls over twice as many keys as it can hold, so most `put` calls
+evict. The time per call is reported for both implementations.
+
+Usage:
+    ./lfu_benchmark.py --capacities 1000 10000 100000 1000000 --ops 20000
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import time
+from collections import OrderedDict, defaultdict
+from base_caching import BaseCaching
+
+LFUCache = __import__('100-lfu_cache').LFUCache
+
+
+class LegacyLFUCache(BaseCaching):
+    """
+    LegacyLFUCache is the LFUCache this module compares against, with its
+    O(n) eviction.
+    """
+    def __init__(self):
+        """
+        Initialize the cache.
+        """
+        super().__init__()
+        self.cache_data = OrderedDict()
+        self.frequency = defaultdict(int)
+        self.lru = defaultdict(OrderedDict)
+        self.lru_counter = 0
+
+    def put(self, key, item):
+        """
+        Add an item, evicting the least frequently used one if full.
+        """
+        if key is None or item is None:
+            return
+
+        if key in self.cache_data:
+            self.cache_data[key] = item
+            self.get(key)
+            return
+
+        if len(self.cache_data) >= self.MAX_ITEMS:
+            min_freq = min(self.frequency.values())
+            lru_key = next(iter(self.lru[min_freq]))
+            self.cache_data.pop(lru_key)
+            self.frequency.pop(lru_key)
+            self.lru[min_freq].pop(lru_key)
+            if not self.lru[min_freq]:
+                self.lru.pop(min_freq)
+            print(f"DISCARD: {lru_key}")
+
+        self.cache_data[key] = item
+        self.frequency[key] = 1
+        self.lru[1][key] = self.lru_counter
+        self.lru_counter += 1
+
+    def get(self, key):
+        """
+        Retrieve an item and count the use.
+        """
+        if key is None or key not in self.cache_data:
+            return None
+
+        value = self.cache_data[key]
+
+        freq = self.frequency[key]
+        self.frequency[key] += 1
+        self.lru[freq].pop(key)
+        if not self.lru[freq]:
+            self.lru.pop(freq)
+        self.lru[freq + 1][key] = self.lru_counter
+        self.lru_counter += 1
+
+        return value
+
+
+def workload(capacity, ops, seed=0):
+    """
+    Build a skewed sequence of operations over `2 * capacity` keys.
+
+    Args:
+        capacity (int): The capacity of the cache.
+        ops (int): The number of operations.
+        seed (int): The random seed.
+
+    Returns:
+        list: `(is_put, key)` pairs.
+    """
+    rng = random.Random(seed)
+    keys = 2 * capacity
+    return [(rng.random() < 0.5, int(keys * rng.random() ** 2))
+            for _ in range(ops)]
+
+
+def measure(cache_class, capacity, operations):
+    """
+    Time a cache class on a workload once it is full.
+
+    Args:
+        cache_class (type): The LFU cache class.
+        capacity (int): The capacity of the cache.
+        operations (list): The workload.
+
+    Returns:
+        float: The time per operation in microseconds.
+    """
+    sized = type(cache_class.__name__, (cache_class,),
+                 {"MAX_ITEMS": capacity})
+    cache = sized()
+    with open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull):
+        for key in range(capacity):
+            cache.put(key, key)
+        start = time.perf_counter()
+        for is_put, key in operations:
+            if is_put:
+                cache.put(key, key)
+            else:
+                cache.get(key)
+        elapsed = time.perf_counter() - start
+    return elapsed / len(operations) * 1e6
+
+
+def main():
+    """
+    Parse the command line and print the comparison.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--capacities", type=int, nargs="+",
+                        default=[10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6])
+    parser.add_argument("--ops", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("{:>10} {:>14} {:>14} {:>9}".format(
+        "capacity", "legacy us/op", "lfu us/op", "speedup"))
+    for capacity in args.capacities:
+        operations = workload(capacity, args.ops, args.seed)
+        legacy = measure(LegacyLFUCache, capacity, operations)
+        current = measure(LFUCache, capacity, operations)
+        print("{:>10} {:>14.2f} {:>14.2f} {:>8.1f}x".format(
+            capacity, legacy, current, legacy / current))
+
+
+if __name__ == "__main__":
+    main()
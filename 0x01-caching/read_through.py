@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+This module implements read-through caching for the caching policies.
+
+`get_or_load(key, loader)` returns the cached item or loads it, and makes
+concurrent misses on the same key wait for a single load instead of each
+calling the loader (single flight). Optionally, a key the loader has no item
+for is remembered for a while (negative caching), and an item older than a
+given age is still served while a fresh one is loaded in the background
+(stale-while-revalidate). `aget_or_load` does the same for coroutines.
+"""
+
+import asyncio
+import contextlib
+import threading
+import time
+from collections import OrderedDict
+
+_STATE_LOCK = threading.Lock()
+_UNLOCKED = contextlib.nullcontext()
+
+
+class Flight:
+    """
+    Flight is a load in progress that other callers can wait for.
+
+    Attributes:
+        done (threading.Event): Set once the load has finished.
+        value (any): The loaded item.
+        error (Exception): The error raised by the loader, if any.
+    """
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        """
+        Initialize an unfinished load.
+        """
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ReadThroughState:
+    """
+    ReadThroughState holds the loads in progress and the bookkeeping of a
+    cache.
+
+    Attributes:
+        lock (threading.Lock): Guards the attributes below.
+        cache_lock (threading.Lock): Held around `get` and `put` on a cache
+        that has no lock of its own.
+        flights (dict): The load in progress of every key.
+        tasks (dict): The asyncio load task of every key.
+        misses (OrderedDict): When the negative entry of a key expires.
+        loaded_at (OrderedDict): When the item of a key was loaded.
+    """
+
+    def __init__(self):
+        """
+        Initialize empty bookkeeping.
+        """
+        self.lock = threading.Lock()
+        self.cache_lock = threading.Lock()
+        self.flights = {}
+        self.tasks = {}
+        self.misses = OrderedDict()
+        self.loaded_at = OrderedDict()
+
+
+class ReadThroughMixin:
+    """
+    ReadThroughMixin adds `get_or_load` and `aget_or_load` to a cache class
+    that has `get` and `put`.
+
+    On a cache without a lock of its own, the `get` and `put` calls made by
+    `get_or_load` and `aget_or_load` hold a lock of the cache's read-through
+    bookkeeping, so concurrent read-through calls cannot corrupt the policy;
+    plain `get` and `put` calls from other threads still need the concurrent
+    variants. `get_or_load` revalidates stale items on a thread of its own,
+    so it only takes `stale_after` on a thread-safe cache.
+
+    Attributes:
+        MAX_TRACKED (int): How many negative entries and load times to keep.
+        THREAD_SAFE (bool): Whether `get` and `put` take a lock of their own.
+    """
+    MAX_TRACKED = 4096
+    THREAD_SAFE = False
+
+    def _thread_safe(self):
+        """
+        Whether `put` may be called from a thread of its own: the cache is
+        locked, or keeps its items in a storage with a lock.
+        """
+        storage = self.__dict__.get("cache_data")
+        return self.THREAD_SAFE or getattr(storage, "lock", None) is not None
+
+    def _guard(self, state):
+        """
+        Get the lock to hold around `get` and `put`: none on a thread-safe
+        cache, else the one shared by the read-through calls.
+        """
+        return _UNLOCKED if self._thread_safe() else state.cache_lock
+
+    def _read_through(self):
+        """
+        Get the read-through bookkeeping, creating it on first use.
+        """
+        state = self.__dict__.get("_read_through_state")
+        if state is None:
+            with _STATE_LOCK:
+                state = self.__dict__.setdefault("_read_through_state",
+                                                 ReadThroughState())
+        return state
+
+    def _remember(self, entries, key, value):
+        """
+        Record a negative entry or load time, dropping the oldest ones.
+        """
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.MAX_TRACKED:
+            entries.popitem(last=False)
+
+    def _negative(self, state, key, now):
+        """
+        Whether a key is negatively cached. Call with `state.lock` held.
+        """
+        expires = state.misses.get(key)
+        if expires is None:
+            return False
+        if now < expires:
+            return True
+        del state.misses[key]
+        return False
+
+    def _stale(self, state, key, stale_after, now):
+        """
+        Whether a cached item should be revalidated.
+        """
+        if stale_after is None:
+            return False
+        with state.lock:
+            loaded_at = state.loaded_at.get(key)
+        return loaded_at is not None and now - loaded_at >= stale_after
+
+    def _store(self, state, key, value, negative_ttl):
+        """
+        Cache a loaded item, or remember that there was none.
+        """
+        now = time.monotonic()
+        if value is None:
+            if negative_ttl is not None:
+                with state.lock:
+                    self._remember(state.misses, key, now + negative_ttl)
+            return
+        with self._guard(state):
+            self.put(key, value)
+        with state.lock:
+            state.misses.pop(key, None)
+            self._remember(state.loaded_at, key, now)
+
+    def _load(self, state, key, loader, negative_ttl, flight):
+        """
+        Run the loader for the callers waiting on a flight.
+        """
+        try:
+            flight.value = loader(key)
+            self._store(state, key, flight.value, negative_ttl)
+        except Exception as error:
+            flight.error = error
+        finally:
+            with state.lock:
+                if state.flights.get(key) is flight:
+                    del state.flights[key]
+            flight.done.set()
+
+    def get_or_load(self, key, loader, negative_ttl=None, stale_after=None):
+        """
+        Retrieve an item from the cache, loading it on a miss.
+
+        Args:
+            key (str): The key of the item.
+            loader (callable): Called with the key to load its item; returns
+            None if there is no item.
+            negative_ttl (float, optional): Seconds to remember that the
+            loader returned None, answering None without calling it again.
+            stale_after (float, optional): Age in seconds after which a hit
+            is still returned but reloaded in the background. Only
+            supported on a thread-safe cache, e.g. a StripedCache.
+
+        Returns:
+            any: The item, or None if the loader has none.
+
+        Raises:
+            ValueError: If `stale_after` is given for a cache without a lock.
+            Exception: Whatever the loader raised, in every waiting caller.
+        """
+        if stale_after is not None and not self._thread_safe():
+            raise ValueError("stale_after needs a thread-safe cache, "
+                             "such as a StripedCache")
+        if key is None:
+            return None
+        state = self._read_through()
+        guard = self._guard(state)
+        now = time.monotonic()
+        with guard:
+            value = self.get(key)
+        if value is not None:
+            if self._stale(state, key, stale_after, now):
+                with state.lock:
+                    start = key not in state.flights
+                    if start:
+                        flight = state.flights[key] = Flight()
+                if start:
+                    threading.Thread(
+                        target=self._load, daemon=True,
+                        args=(state, key, loader, negative_ttl, flight)
+                    ).start()
+            return value
+
+        with state.lock:
+            if self._negative(state, key, now):
+                return None
+            flight = state.flights.get(key)
+            leader = flight is None
+            if leader:
+                with guard:
+                    value = self.get(key)
+                if value is not None:
+                    return value
+                flight = state.flights[key] = Flight()
+        if leader:
+            self._load(state, key, loader, negative_ttl, flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    async def _aload(self, state, key, loader, negative_ttl):
+        """
+        Run an async loader and cache its result.
+        """
+        value = await loader(key)
+        self._store(state, key, value, negative_ttl)
+        return value
+
+    def _atask(self, state, key, loader, negative_ttl):
+        """
+        Get the load task of a key, starting one if there is none.
+        """
+        task = state.tasks.get(key)
+        if task is not None:
+            return task
+        task = asyncio.get_running_loop().create_task(
+            self._aload(state, key, loader, negative_ttl))
+        state.tasks[key] = task
+
+        def finished(done):
+            if state.tasks.get(key) is done:
+                del state.tasks[key]
+            if not done.cancelled():
+                done.exception()
+
+        task.add_done_callback(finished)
+        return task
+
+    async def aget_or_load(self, key, loader, negative_ttl=None,
+                           stale_after=None):
+        """
+        Retrieve an item from the cache, awaiting an async loader on a miss.
+
+        Concurrent coroutines missing the same key await one load; a
+        cancelled caller does not cancel it for the others.
+
+        Args:
+            key (str): The key of the item.
+            loader (callable): Async function called with the key to load
+            its item; returns None if there is no item.
+            negative_ttl (float, optional): Seconds to remember that the
+            loader returned None.
+            stale_after (float, optional): Age in seconds after which a hit
+            is still returned but reloaded in the background.
+
+        Returns:
+            any: The item, or None if the loader has none.
+        """
+        if key is None:
+            return None
+        state = self._read_through()
+        guard = self._guard(state)
+        now = time.monotonic()
+        with guard:
+            value = self.get(key)
+        if value is not None:
+            if self._stale(state, key, stale_after, now):
+                self._atask(state, key, loader, negative_ttl)
+            return value
+        with state.lock:
+            if self._negative(state, key, now):
+                return None
+        return await asyncio.shield(
+            self._atask(state, key, loader, negative_ttl))
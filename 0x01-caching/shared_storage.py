@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+This module implements an ordered mapping kept in shared memory, so that the
+caching policies of several worker processes on one host can share a single
+cache.
+
+The segment holds a fixed-size hash table and a fixed number of slabs, one
+per entry, each large enough for the pickled key and value. Entries are also
+linked in a doubly linked list that keeps their order, so the mapping offers
+the `OrderedDict` operations the policies rely on (`popitem(last)` and
+`move_to_end`). Every operation takes a lock that is shared by threads
+(`threading.RLock`) and by processes (`fcntl.flock` on a lock file). A
+storage created before a fork can be used by every child: each process opens
+the lock file again on its first lock.
+
+Example:
+    storage = SharedOrderedDict("pages", capacity=1024)  # in every worker
+    cache = LRUCache(storage=storage)  # holds up to 1024 items
+
+A policy on a storage defaults to the capacity of the storage, and may not
+be given a larger one.
+"""
+
+import fcntl
+import os
+import pickle
+import struct
+import tempfile
+import threading
+from collections.abc import MutableMapping
+from contextlib import contextmanager, nullcontext
+from hashlib import blake2b
+from multiprocessing import resource_tracker, shared_memory
+
+MAGIC = b"SHODICT1"
+# magic, capacity, slab_size, buckets, count, head, tail, free
+HEADER = struct.Struct("<8sIIIIiii")
+HEADER_SIZE = 64
+BUCKET = struct.Struct("<i")
+# hash, next in bucket, previous in order, next in order, key length,
+# value length, counter
+SLOT = struct.Struct("<QiiiIIQ")
+NIL = -1
+# Guards opening the lock file of a storage in a new process
+_OPEN_LOCK = threading.Lock()
+
+
+def _key_bytes(key):
+    """
+    Serialize a key and hash it the same way in every process.
+
+    Args:
+        key (hashable): The key.
+
+    Returns:
+        tuple: The pickled key and its 64-bit hash.
+    """
+    data = pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)
+    digest = blake2b(data, digest_size=8).digest()
+    return data, int.from_bytes(digest, "little")
+
+
+def locked(mapping):
+    """
+    Get the lock of a cache storage, if it has one.
+
+    Args:
+        mapping (Mapping): The `cache_data` of a caching policy.
+
+    Returns:
+        context manager: The lock of a `SharedOrderedDict`, or a no-op
+        context for a plain dictionary.
+    """
+    lock = getattr(mapping, "lock", None)
+    return lock() if lock is not None else nullcontext()
+
+
+class SharedOrderedDict(MutableMapping):
+    """
+    SharedOrderedDict is an ordered mapping stored in a named shared memory
+    segment. Keys and values must be picklable, and keys must pickle to the
+    same bytes in every process (str, int, tuples of those, ...).
+
+    Attributes:
+        name (str): The name of the shared memory segment.
+        capacity (int): The maximum number of entries.
+        slab_size (int): The maximum size of a pickled key and value.
+    """
+
+    def __init__(self, name, capacity=1024, slab_size=4096):
+        """
+        Attach to the named segment, creating it if it does not exist yet.
+
+        Args:
+            name (str): The name of the segment, shared by every process.
+            capacity (int): The maximum number of entries, when creating.
+            slab_size (int): The maximum size in bytes of a pickled key and
+                value, when creating.
+        """
+        self.name = name
+        self.__lock_path = os.path.join(tempfile.gettempdir(),
+                                        name + ".lock")
+        self.__pid = None
+        self.__lock_fd = None
+        with self.lock():
+            try:
+                self.__shm = shared_memory.SharedMemory(name)
+                created = False
+            except FileNotFoundError:
+                buckets = 2 * capacity
+                size = (HEADER_SIZE + BUCKET.size * buckets +
+                        (SLOT.size + slab_size) * capacity)
+                self.__shm = shared_memory.SharedMemory(name, True, size)
+                created = True
+            # The segment outlives any one process; see unlink()
+            resource_tracker.unregister(self.__shm._name, "shared_memory")
+            self.__buf = self.__shm.buf
+            if created:
+                self.__format(capacity, slab_size, buckets)
+            magic, self.capacity, self.slab_size, self.__buckets = \
+                HEADER.unpack_from(self.__buf, 0)[:4]
+            if magic != MAGIC:
+                raise ValueError("not a shared cache segment: " + name)
+        self.__stride = SLOT.size + self.slab_size
+        self.__slots = HEADER_SIZE + BUCKET.size * self.__buckets
+
+    def __format(self, capacity, slab_size, buckets):
+        """
+        Initialize a new segment: empty buckets, every slot free.
+        """
+        HEADER.pack_into(self.__buf, 0, MAGIC, capacity, slab_size, buckets,
+                         0, NIL, NIL, 0 if capacity else NIL)
+        self.__buf[HEADER_SIZE:HEADER_SIZE + BUCKET.size * buckets] = \
+            b"\xff" * (BUCKET.size * buckets)
+        stride = SLOT.size + slab_size
+        slots = HEADER_SIZE + BUCKET.size * buckets
+        for slot in range(capacity):
+            following = slot + 1 if slot + 1 < capacity else NIL
+            SLOT.pack_into(self.__buf, slots + slot * stride,
+                           0, NIL, NIL, following, 0, 0, 0)
+
+    def __open_lock(self):
+        """
+        Open the lock file in this process, if not done yet.
+
+        A flock belongs to the open file description, which a forked child
+        shares with its parent, so a child that locked the inherited
+        descriptor would not exclude its parent or siblings. Each process
+        therefore opens the file itself, with a thread lock of its own.
+        """
+        with _OPEN_LOCK:
+            if self.__pid == os.getpid():
+                return
+            if self.__lock_fd is not None:
+                # Closing our copy leaves the parent's lock untouched
+                os.close(self.__lock_fd)
+            self.__lock_fd = os.open(self.__lock_path,
+                                     os.O_RDWR | os.O_CREAT, 0o600)
+            self.__thread_lock = threading.RLock()
+            self.__depth = 0
+            self.__pid = os.getpid()
+
+    @contextmanager
+    def lock(self):
+        """
+        Hold the lock of the mapping, across threads and processes.
+
+        The lock is reentrant, so a caching policy can hold it for a whole
+        `put` or `get` while each operation takes it again.
+        """
+        if self.__pid != os.getpid():
+            self.__open_lock()
+        with self.__thread_lock:
+            if self.__depth == 0:
+                fcntl.flock(self.__lock_fd, fcntl.LOCK_EX)
+            self.__depth += 1
+            try:
+                yield
+            finally:
+                self.__depth -= 1
+                if self.__depth == 0:
+                    fcntl.flock(self.__lock_fd, fcntl.LOCK_UN)
+
+    def __header(self):
+        """
+        Read the count, head, tail and free list fields of the header.
+        """
+        return list(HEADER.unpack_from(self.__buf, 0)[4:])
+
+    def __set_header(self, count, head, tail, free):
+        """
+        Write the count, head, tail and free list fields of the header.
+        """
+        struct.pack_into("<Iiii", self.__buf, HEADER.size - 16,
+                         count, head, tail, free)
+
+    def __bucket(self, hashed):
+        """
+        Offset of the bucket of a hash.
+        """
+        return HEADER_SIZE + BUCKET.size * (hashed % self.__buckets)
+
+    def __slot(self, slot):
+        """
+        Offset of a slot.
+        """
+        return self.__slots + slot * self.__stride
+
+    def __read_slot(self, slot):
+        """
+        Read the fields of a slot as a list.
+        """
+        return list(SLOT.unpack_from(self.__buf, self.__slot(slot)))
+
+    def __write_slot(self, slot, fields):
+        """
+        Write the fields of a slot.
+        """
+        SLOT.pack_into(self.__buf, self.__slot(slot), *fields)
+
+    def __find(self, data, hashed):
+        """
+        Find the slot of a key.
+
+        Returns:
+            tuple: The slot (or NIL) and the previous slot in its bucket
+            (or NIL).
+        """
+        previous = NIL
+        slot = BUCKET.unpack_from(self.__buf, self.__bucket(hashed))[0]
+        while slot != NIL:
+            fields = self.__read_slot(slot)
+            if fields[0] == hashed and fields[4] == len(data):
+                start = self.__slot(slot) + SLOT.size
+                if self.__buf[start:start + len(data)] == data:
+                    return slot, previous
+            previous, slot = slot, fields[1]
+        return NIL, previous
+
+    def __value(self, slot, fields):
+        """
+        Unpickle the value of a slot.
+        """
+        start = self.__slot(slot) + SLOT.size + fields[4]
+        return pickle.loads(self.__buf[start:start + fields[5]])
+
+    def __key(self, slot, fields):
+        """
+        Unpickle the key of a slot.
+        """
+        start = self.__slot(slot) + SLOT.size
+        return pickle.loads(self.__buf[start:start + fields[4]])
+
+    def __unlink_order(self, slot, fields, header):
+        """
+        Take a slot out of the order list.
+        """
+        previous, following = fields[2], fields[3]
+        if previous == NIL:
+            header[1] = following
+        else:
+            neighbour = self.__read_slot(previous)
+            neighbour[3] = following
+            self.__write_slot(previous, neighbour)
+        if following == NIL:
+            header[2] = previous
+        else:
+            neighbour = self.__read_slot(following)
+            neighbour[2] = previous
+            self.__write_slot(following, neighbour)
+
+    def __link_order(self, slot, fields, header, last):
+        """
+        Put a slot at one end of the order list.
+        """
+        if last:
+            fields[2], fields[3] = header[2], NIL
+            if header[2] == NIL:
+                header[1] = slot
+            else:
+                neighbour = self.__read_slot(header[2])
+                neighbour[3] = slot
+                self.__write_slot(header[2], neighbour)
+            header[2] = slot
+        else:
+            fields[2], fields[3] = NIL, header[1]
+            if header[1] == NIL:
+                header[2] = slot
+            else:
+                neighbour = self.__read_slot(header[1])
+                neighbour[2] = slot
+                self.__write_slot(header[1], neighbour)
+            header[1] = slot
+
+    def __remove(self, slot, previous, header):
+        """
+        Free a slot: unlink it from its bucket and the order list.
+        """
+        fields = self.__read_slot(slot)
+        if previous == NIL:
+            BUCKET.pack_into(self.__buf, self.__bucket(fields[0]), fields[1])
+        else:
+            neighbour = self.__read_slot(previous)
+            neighbour[1] = fields[1]
+            self.__write_slot(previous, neighbour)
+        self.__unlink_order(slot, fields, header)
+        self.__write_slot(slot, [0, NIL, NIL, header[3], 0, 0, 0])
+        header[0] -= 1
+        header[3] = slot
+
+    def __len__(self):
+        """
+        Number of entries.
+        """
+        return HEADER.unpack_from(self.__buf, 0)[4]
+
+    def __contains__(self, key):
+        """
+        Whether a key is in the mapping.
+        """
+        data, hashed = _key_bytes(key)
+        with self.lock():
+            return self.__find(data, hashed)[0] != NIL
+
+    def __getitem__(self, key):
+        """
+        Get the value of a key.
+
+        Raises:
+            KeyError: If the key is not in the mapping.
+        """
+        data, hashed = _key_bytes(key)
+        with self.lock():
+            slot = self.__find(data, hashed)[0]
+            if slot == NIL:
+                raise KeyError(key)
+            return self.__value(slot, self.__read_slot(slot))
+
+    def __setitem__(self, key, value):
+        """
+        Set the value of a key. A new key goes to the end of the order, an
+        existing key keeps its place.
+
+        Raises:
+            ValueError: If the pickled key and value exceed `slab_size`.
+            MemoryError: If the mapping already holds `capacity` entries.
+        """
+        data, hashed = _key_bytes(key)
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) + len(payload) > self.slab_size:
+            raise ValueError("entry larger than the slab size")
+        with self.lock():
+            slot = self.__find(data, hashed)[0]
+            header = self.__header()
+            if slot != NIL:
+                fields = self.__read_slot(slot)
+            else:
+                slot = header[3]
+                if slot == NIL:
+                    raise MemoryError("shared cache is full")
+                fields = self.__read_slot(slot)
+                header[3] = fields[3]
+                bucket = self.__bucket(hashed)
+                fields = [hashed, BUCKET.unpack_from(self.__buf, bucket)[0],
+                          NIL, NIL, len(data), 0, 0]
+                BUCKET.pack_into(self.__buf, bucket, slot)
+                self.__link_order(slot, fields, header, True)
+                header[0] += 1
+            fields[5] = len(payload)
+            start = self.__slot(slot) + SLOT.size
+            self.__buf[start:start + len(data)] = data
+            self.__buf[start + len(data):
+                       start + len(data) + len(payload)] = payload
+            self.__write_slot(slot, fields)
+            self.__set_header(*header)
+
+    def __delitem__(self, key):
+        """
+        Remove a key.
+
+        Raises:
+            KeyError: If the key is not in the mapping.
+        """
+        data, hashed = _key_bytes(key)
+        with self.lock():
+            slot, previous = self.__find(data, hashed)
+            if slot == NIL:
+                raise KeyError(key)
+            header = self.__header()
+            self.__remove(slot, previous, header)
+            self.__set_header(*header)
+
+    def __iter__(self):
+        """
+        Iterate over the keys in order, as of when iteration starts.
+        """
+        with self.lock():
+            keys = []
+            slot = self.__header()[1]
+            while slot != NIL:
+                fields = self.__read_slot(slot)
+                keys.append(self.__key(slot, fields))
+                slot = fields[3]
+        return iter(keys)
+
+    def pop(self, key, *default):
+        """
+        Remove a key and return its value, or `default` if it is missing.
+        """
+        with self.lock():
+            if key not in self:
+                if default:
+                    return default[0]
+                raise KeyError(key)
+            value = self[key]
+            del self[key]
+            return value
+
+    def popitem(self, last=True):
+        """
+        Remove and return the last (or first) entry in order.
+
+        Args:
+            last (bool): Whether to pop from the end rather than the start.
+
+        Returns:
+            tuple: The key and value.
+
+        Raises:
+            KeyError: If the mapping is empty.
+        """
+        with self.lock():
+            header = self.__header()
+            slot = header[2] if last else header[1]
+            if slot == NIL:
+                raise KeyError("dictionary is empty")
+            fields = self.__read_slot(slot)
+            key = self.__key(slot, fields)
+            value = self.__value(slot, fields)
+            data, hashed = _key_bytes(key)
+            self.__remove(slot, self.__find(data, hashed)[1], header)
+            self.__set_header(*header)
+            return key, value
+
+    def move_to_end(self, key, last=True):
+        """
+        Move an existing key to the end (or start) of the order.
+
+        Raises:
+            KeyError: If the key is not in the mapping.
+        """
+        data, hashed = _key_bytes(key)
+        with self.lock():
+            slot = self.__find(data, hashed)[0]
+            if slot == NIL:
+                raise KeyError(key)
+            header = self.__header()
+            fields = self.__read_slot(slot)
+            self.__unlink_order(slot, fields, header)
+            fields = self.__read_slot(slot)
+            self.__link_order(slot, fields, header, last)
+            self.__write_slot(slot, fields)
+            self.__set_header(*header)
+
+    def touch(self, key):
+        """
+        Count a use of a key and move it to the end of the order.
+
+        The counter lets a frequency-based policy keep its bookkeeping in
+        the shared segment too.
+
+        Returns:
+            int: The number of uses counted so far.
+
+        Raises:
+            KeyError: If the key is not in the mapping.
+        """
+        data, hashed = _key_bytes(key)
+        with self.lock():
+            slot = self.__find(data, hashed)[0]
+            if slot == NIL:
+                raise KeyError(key)
+            self.move_to_end(key)
+            fields = self.__read_slot(slot)
+            fields[6] += 1
+            self.__write_slot(slot, fields)
+            return fields[6]
+
+    def coldest(self):
+        """
+        Find the key with the fewest uses, the least recently moved first.
+
+        Returns:
+            hashable: The key, or None if the mapping is empty.
+        """
+        with self.lock():
+            best, best_count = NIL, None
+            slot = self.__header()[1]
+            while slot != NIL:
+                fields = self.__read_slot(slot)
+                if best_count is None or fields[6] < best_count:
+                    best, best_count = slot, fields[6]
+                slot = fields[3]
+            if best == NIL:
+                return None
+            return self.__key(best, self.__read_slot(best))
+
+    def clear(self):
+        """
+        Remove every entry.
+        """
+        with self.lock():
+            while len(self):
+                self.popitem()
+
+    def close(self):
+        """
+        Detach from the segment in this process.
+        """
+        self.__buf = None
+        self.__shm.close()
+        if self.__lock_fd is not None:
+            os.close(self.__lock_fd)
+            self.__lock_fd = None
+            self.__pid = None
+
+    def unlink(self):
+        """
+        Destroy the segment once every process has closed it.
+        """
+        resource_tracker.register(self.__shm._name, "shared_memory")
+        self.__shm.unlink()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for the scan-resistant ARC, 2Q and W-TinyLFU policies.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+ARCCache = __import__('102-arc_cache').ARCCache
+TwoQueueCache = __import__('103-2q_cache').TwoQueueCache
+tinylfu = __import__('104-tinylfu_cache')
+TinyLFUCache = tinylfu.TinyLFUCache
+CountMinSketch = tinylfu.CountMinSketch
+LRUCache = __import__('3-lru_cache').LRUCache
+
+ADAPTIVE = (ARCCache, TwoQueueCache, TinyLFUCache)
+
+
+def hot_hit_ratio(cache, capacity):
+    """
+    Reuse a working set while a scan of one-off keys streams through, and
+    return the hit ratio of the working set once the scan is under way.
+    """
+    hot = ["hot{}".format(i) for i in range(capacity // 2)]
+    hits = lookups = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(5):
+            for key in hot:
+                if cache.get(key) is None:
+                    cache.put(key, key)
+        for step in range(capacity * 30):
+            scan = "scan{}".format(step)
+            if cache.get(scan) is None:
+                cache.put(scan, scan)
+            if step % 2:
+                continue
+            key = hot[(step // 2) % len(hot)]
+            found = cache.get(key) is not None
+            if not found:
+                cache.put(key, key)
+            if step >= capacity * 10:
+                hits += found
+                lookups += 1
+            assert len(cache.cache_data) <= capacity
+    return hits / lookups
+
+
+class TestScanResistance(unittest.TestCase):
+    """
+    A scan does not flush the working set out of the adaptive policies.
+    """
+
+    def test_working_set_survives_scan(self):
+        """
+        The adaptive policies keep hitting the working set; LRU does not.
+        """
+        self.assertLess(hot_hit_ratio(LRUCache(capacity=100), 100), 0.1)
+        for policy in ADAPTIVE:
+            ratio = hot_hit_ratio(policy(capacity=100), 100)
+            self.assertGreater(ratio, 0.8, policy.__name__)
+
+
+class TestAdaptiveBasics(unittest.TestCase):
+    """
+    The adaptive policies behave as caches.
+    """
+
+    def test_get_put_and_capacity(self):
+        """
+        Puts are readable, updates replace the item, and the capacity
+        holds.
+        """
+        for policy in ADAPTIVE:
+            cache = policy(capacity=10)
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                for i in range(50):
+                    cache.put("k{}".format(i), i)
+                    self.assertEqual(cache.get("k{}".format(i)), i)
+                cache.put("k49", "new")
+            self.assertEqual(cache.get("k49"), "new", policy.__name__)
+            self.assertEqual(len(cache.cache_data), 10, policy.__name__)
+            self.assertEqual(out.getvalue().count("DISCARD"), 40)
+            self.assertIsNone(cache.get(None))
+            self.assertIsNone(cache.get("missing"))
+
+    def test_put_many_within_capacity(self):
+        """
+        A batch larger than the cache leaves it full, not overfilled.
+        """
+        for policy in ADAPTIVE:
+            cache = policy(capacity=8)
+            with contextlib.redirect_stdout(io.StringIO()):
+                cache.put_many({"k{}".format(i): i for i in range(30)})
+            self.assertEqual(len(cache.cache_data), 8, policy.__name__)
+
+
+class TestCountMinSketch(unittest.TestCase):
+    """
+    The sketch never underestimates, and forgets with time.
+    """
+
+    def test_estimates(self):
+        """
+        Estimates are at least the true counts, capped, and halved by a
+        reset.
+        """
+        sketch = CountMinSketch(64)
+        for i in range(20):
+            for _ in range(i % 8):
+                sketch.increment("k{}".format(i))
+        for i in range(20):
+            self.assertGreaterEqual(sketch.frequency("k{}".format(i)), i % 8)
+        for _ in range(40):
+            sketch.increment("hot")
+        self.assertEqual(sketch.frequency("hot"), CountMinSketch.MAX_COUNT)
+        sketch.reset()
+        self.assertEqual(sketch.frequency("hot"),
+                         CountMinSketch.MAX_COUNT // 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tests for put_many and get_many.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+POLICIES = [
+    __import__('1-fifo_cache').FIFOCache,
+    __import__('2-lifo_cache').LIFOCache,
+    __import__('3-lru_cache').LRUCache,
+    __import__('4-mru_cache').MRUCache,
+    __import__('100-lfu_cache').LFUCache,
+    __import__('102-arc_cache').ARCCache,
+    __import__('103-2q_cache').TwoQueueCache,
+    __import__('104-tinylfu_cache').TinyLFUCache,
+]
+
+
+def run(cache, batches, bulk):
+    """
+    Put the batches with `put_many`, or key by key with `put`, and return
+    what was printed.
+    """
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        for batch in batches:
+            if bulk:
+                cache.put_many(batch)
+            else:
+                for key, item in batch.items():
+                    cache.put(key, item)
+    return out.getvalue()
+
+
+class TestPutMany(unittest.TestCase):
+    """
+    A batch of new keys ends like the same puts in a row.
+    """
+
+    def check(self, batches, **options):
+        """
+        Compare put_many with sequential puts for every policy.
+        """
+        for policy in POLICIES:
+            bulk = policy(capacity=4, **options)
+            one_by_one = policy(capacity=4, **options)
+            printed = run(bulk, batches, True)
+            self.assertEqual(printed, run(one_by_one, batches, False),
+                             policy.__name__)
+            self.assertEqual(list(bulk.cache_data),
+                             list(one_by_one.cache_data), policy.__name__)
+
+    def test_into_full_cache(self):
+        """
+        New keys put into a full cache.
+        """
+        self.check([{"a": 1, "b": 2, "c": 3, "d": 4}, {"1": 5, "2": 6}])
+
+    def test_batch_larger_than_capacity(self):
+        """
+        A batch that does not fit on its own.
+        """
+        self.check([{"a": 1, "b": 2},
+                    {str(n): n for n in range(7)},
+                    {"x": 0}])
+
+    def test_lifo_and_mru_interleave_updates(self):
+        """
+        LIFO and MRU follow the order of a batch that mixes cached keys
+        with new ones.
+        """
+        for policy in POLICIES[1:4:2]:
+            bulk = policy(capacity=4)
+            one_by_one = policy(capacity=4)
+            batches = [{"a": 1, "b": 2, "c": 3, "d": 4},
+                       {"1": 5, "a": 6, "2": 7, "c": 8}]
+            self.assertEqual(run(bulk, batches, True),
+                             run(one_by_one, batches, False))
+            self.assertEqual(list(bulk.cache_data),
+                             list(one_by_one.cache_data))
+
+    def test_lifo_evicts_newest(self):
+        """
+        The review example: LIFO keeps the old keys and the last new one.
+        """
+        cache = POLICIES[1](capacity=4)
+        printed = run(cache, [{"a": 1, "b": 2, "c": 3, "d": 4},
+                              {"1": 5, "2": 6}], True)
+        self.assertEqual(printed, "DISCARD: d\nDISCARD: 1\n")
+        self.assertEqual(list(cache.cache_data), ["a", "b", "c", "2"])
+
+
+class TestGetMany(unittest.TestCase):
+    """
+    get_many returns the cached keys in the order asked for.
+    """
+
+    def test_hits_and_misses(self):
+        """
+        Missing keys are left out.
+        """
+        for policy in POLICIES:
+            cache = policy(capacity=4)
+            run(cache, [{"a": 1, "b": 2}], True)
+            self.assertEqual(cache.get_many(["b", "x", "a", None]),
+                             {"b": 2, "a": 1}, policy.__name__)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for eviction under capacity and byte budgets.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+FIFOCache = __import__('1-fifo_cache').FIFOCache
+LRUCache = __import__('3-lru_cache').LRUCache
+LFUCache = __import__('100-lfu_cache').LFUCache
+ARCCache = __import__('102-arc_cache').ARCCache
+
+
+def weigh(key, item):
+    """
+    Weigh an item by its length.
+    """
+    return len(item)
+
+
+class TestByteBudget(unittest.TestCase):
+    """
+    Items are evicted until their total weight fits `max_bytes`.
+    """
+
+    def put_all(self, cache, items):
+        """
+        Put items in order.
+
+        Returns:
+            str: What the cache printed.
+        """
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            for key, item in items:
+                cache.put(key, item)
+        return out.getvalue()
+
+    def test_heavy_item_evicts_several(self):
+        """
+        One heavy item discards as many old items as it needs room for.
+        """
+        cache = FIFOCache(capacity=10, max_bytes=10, weigher=weigh)
+        printed = self.put_all(cache, [("A", "aaa"), ("B", "bbb"),
+                                       ("C", "ccc"), ("D", "dddddd")])
+        self.assertEqual(printed, "DISCARD: A\nDISCARD: B\n")
+        self.assertEqual(list(cache.cache_data), ["C", "D"])
+        self.assertEqual(cache.budget.total, 9)
+
+    def test_lru_keeps_recent_items(self):
+        """
+        The least recently used items go first.
+        """
+        cache = LRUCache(capacity=10, max_bytes=6, weigher=weigh)
+        self.put_all(cache, [("A", "aa"), ("B", "bb"), ("C", "cc")])
+        cache.get("A")
+        printed = self.put_all(cache, [("D", "dd")])
+        self.assertEqual(printed, "DISCARD: B\n")
+        self.assertEqual(sorted(cache.cache_data), ["A", "C", "D"])
+
+    def test_item_over_budget_not_cached(self):
+        """
+        An item heavier than the whole budget is not cached and discards
+        nothing, and replaces an older item under the same key.
+        """
+        cache = LRUCache(capacity=10, max_bytes=4, weigher=weigh)
+        printed = self.put_all(cache, [("A", "aa"), ("B", "bb"),
+                                       ("B", "bbbbb")])
+        self.assertEqual(printed, "")
+        self.assertEqual(list(cache.cache_data), ["A"])
+        self.assertEqual(cache.budget.total, 2)
+
+    def test_update_recharges_weight(self):
+        """
+        Putting a key again replaces its weight instead of adding to it.
+        """
+        cache = LFUCache(capacity=10, max_bytes=8, weigher=weigh)
+        self.put_all(cache, [("A", "aaaa"), ("A", "aa"), ("B", "bbbbbb")])
+        self.assertEqual(sorted(cache.cache_data), ["A", "B"])
+        self.assertEqual(cache.budget.total, 8)
+
+
+class TestCapacity(unittest.TestCase):
+    """
+    Per-instance capacities replace MAX_ITEMS.
+    """
+
+    def test_capacity(self):
+        """
+        Every policy holds at most its capacity.
+        """
+        for policy in (FIFOCache, LRUCache, LFUCache, ARCCache):
+            cache = policy(capacity=3)
+            with contextlib.redirect_stdout(io.StringIO()):
+                for i in range(10):
+                    cache.put(i, i)
+            self.assertEqual(len(cache.cache_data), 3, policy.__name__)
+
+    def test_positional_capacity(self):
+        """
+        The capacity follows the storage argument for LFUCache too.
+        """
+        cache = LFUCache(None, 2)
+        self.assertEqual(cache.budget.capacity, 2)
+        self.assertIsNone(cache.decay_every)
+
+    def test_invalid_limits(self):
+        """
+        Limits must be positive.
+        """
+        with self.assertRaises(ValueError):
+            LRUCache(capacity=0)
+        with self.assertRaises(ValueError):
+            FIFOCache(max_bytes=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
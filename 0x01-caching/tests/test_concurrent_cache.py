@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for the lock-striped and asyncio cache variants.
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+concurrent = __import__('101-concurrent_cache')
+StripedCache = concurrent.StripedCache
+AsyncCache = concurrent.AsyncCache
+VARIANTS = (concurrent.ConcurrentFIFOCache, concurrent.ConcurrentLIFOCache,
+            concurrent.ConcurrentLRUCache, concurrent.ConcurrentMRUCache,
+            concurrent.ConcurrentLFUCache)
+LRUCache = __import__('3-lru_cache').LRUCache
+
+
+class TestStripedCache(unittest.TestCase):
+    """
+    A StripedCache splits its capacity and survives concurrent use.
+    """
+
+    def test_capacity_split(self):
+        """
+        Segment capacities add up to the capacity, capped in number by it.
+        """
+        cache = StripedCache(LRUCache, segments=4, capacity=10)
+        self.assertEqual([s.budget.capacity for s in cache.segments],
+                         [3, 3, 2, 2])
+        self.assertEqual(len(StripedCache(LRUCache, 16, 3).segments), 3)
+
+    def test_threads(self):
+        """
+        Threads hammering every variant raise nothing and never overfill
+        it.
+        """
+        for variant in VARIANTS:
+            cache = variant(segments=4, capacity=40)
+            errors = []
+
+            def worker(seed):
+                rng = random.Random(seed)
+                try:
+                    for _ in range(2000):
+                        key = "k{}".format(rng.randrange(100))
+                        if rng.random() < 0.5:
+                            cache.put(key, key)
+                        else:
+                            value = cache.get(key)
+                            assert value in (None, key)
+                except Exception as e:
+                    errors.append(e)
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                threads = [threading.Thread(target=worker, args=(seed,))
+                           for seed in range(8)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            self.assertEqual(errors, [], variant.__name__)
+            self.assertLessEqual(len(cache.cache_data), 40)
+
+    def test_batches(self):
+        """
+        Batches are split over the segments and answered in order.
+        """
+        cache = concurrent.ConcurrentLRUCache(segments=4, capacity=100)
+        cache.put_many({"k{}".format(i): i for i in range(20)})
+        keys = ["k7", "missing", "k3", None, "k19"]
+        self.assertEqual(list(cache.get_many(keys).items()),
+                         [("k7", 7), ("k3", 3), ("k19", 19)])
+        self.assertEqual(len(cache.cache_data), 20)
+
+
+class TestAsyncCache(unittest.TestCase):
+    """
+    AsyncCache serves coroutines, inline or through an executor.
+    """
+
+    def test_inline_and_executor(self):
+        """
+        Both modes store and return the same items.
+        """
+        async def main(cache):
+            await asyncio.gather(*(cache.put("k{}".format(i), i)
+                                   for i in range(10)))
+            await cache.put_many({"a": 1, "b": 2})
+            return (await cache.get("k4"), await cache.get("nope"),
+                    await cache.get_many(iter(["b", "k9", "c"])))
+
+        with ThreadPoolExecutor(2) as executor:
+            for wrapped in (
+                    AsyncCache(concurrent.ConcurrentLRUCache(capacity=64)),
+                    AsyncCache(concurrent.ConcurrentLRUCache(capacity=64),
+                               executor)):
+                self.assertEqual(asyncio.run(main(wrapped)),
+                                 (4, None, {"b": 2, "k9": 9}))
+
+
+if __name__ == "__main__":
+    unittest.main()
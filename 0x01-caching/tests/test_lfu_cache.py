@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests for LFUCache eviction and frequency decay.
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+LFUCache = __import__('100-lfu_cache').LFUCache
+
+
+class TestLFUEviction(unittest.TestCase):
+    """
+    The least frequently used key goes first, the least recent on a tie.
+    """
+
+    def test_matches_reference(self):
+        """
+        Random puts and gets discard what a brute-force LFU would.
+        """
+        rng = random.Random(0)
+        cache = LFUCache(capacity=5)
+        uses, last, clock = {}, {}, 0
+        out = io.StringIO()
+        expected = []
+        with contextlib.redirect_stdout(out):
+            for _ in range(2000):
+                key = "k{}".format(rng.randrange(12))
+                clock += 1
+                if rng.random() < 0.5:
+                    cache.get(key)
+                    if key in uses:
+                        uses[key] += 1
+                        last[key] = clock
+                    continue
+                cache.put(key, clock)
+                if key in uses:
+                    uses[key] += 1
+                elif len(uses) == 5:
+                    victim = min(uses, key=lambda k: (uses[k], last[k]))
+                    expected.append("DISCARD: {}\n".format(victim))
+                    del uses[victim], last[victim]
+                    uses[key] = 1
+                else:
+                    uses[key] = 1
+                last[key] = clock
+        self.assertEqual(out.getvalue(), "".join(expected))
+        self.assertEqual(sorted(cache.cache_data), sorted(uses))
+        for key, count in uses.items():
+            self.assertEqual(cache.frequency(key), count)
+
+    def test_frequency_of_missing_key(self):
+        """
+        A key that is not cached has frequency 0.
+        """
+        self.assertEqual(LFUCache().frequency("nope"), 0)
+
+
+class TestLFUDecay(unittest.TestCase):
+    """
+    Aging lets new keys outlive keys that were hot long ago.
+    """
+
+    def test_decay_halves_and_merges(self):
+        """
+        Frequencies are halved, and equal buckets merged hotter-last.
+        """
+        cache = LFUCache(capacity=3)
+        cache.put("A", 1)
+        cache.put("B", 2)
+        cache.put("C", 3)
+        for _ in range(3):
+            cache.get("A")
+        cache.get("B")
+        cache.get("B")
+        cache.decay()
+        self.assertEqual([cache.frequency(k) for k in "ABC"], [2, 1, 1])
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            cache.put("D", 4)
+        # C and B both have 1 now; C was in the colder bucket, so it goes
+        self.assertEqual(out.getvalue(), "DISCARD: C\n")
+
+    def test_decay_every(self):
+        """
+        With `decay_every`, a key hot in the past is eventually evicted.
+        """
+        cache = LFUCache(capacity=2, decay_every=4)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            cache.put("old", 0)
+            for _ in range(20):
+                cache.get("old")
+            for i in range(10):
+                cache.put("new", i)
+                cache.get("new")
+            cache.put("other", 0)
+        self.assertEqual(out.getvalue(), "DISCARD: old\n")
+        self.assertEqual(sorted(cache.cache_data), ["new", "other"])
+
+
+if __name__ == "__main__":
+    unittest.main()
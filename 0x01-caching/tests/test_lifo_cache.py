@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for LIFOCache eviction after a key is put again.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from shared_storage import SharedOrderedDict  # noqa: E402
+
+LIFOCache = __import__('2-lifo_cache').LIFOCache
+
+
+class TestLIFOUpdate(unittest.TestCase):
+    """
+    A key put again is the last added, so it is the next one discarded.
+    """
+
+    def fill_and_update(self, cache, put_many=False):
+        """
+        Fill a cache of 4, put "A" again, then put a fifth key.
+
+        Returns:
+            str: What the cache printed.
+        """
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            for key in "ABCD":
+                cache.put(key, key)
+            if put_many:
+                cache.put_many({"A": "a"})
+            else:
+                cache.put("A", "a")
+            cache.put("E", "E")
+        return out.getvalue()
+
+    def check(self, cache, put_many=False):
+        """
+        The update of "A" makes it the key discarded by the put of "E".
+        """
+        printed = self.fill_and_update(cache, put_many)
+        self.assertEqual(printed, "DISCARD: A\n")
+        self.assertEqual(sorted(cache.cache_data), ["B", "C", "D", "E"])
+
+    def test_put(self):
+        """
+        An update with `put` moves the key to the end.
+        """
+        self.check(LIFOCache(capacity=4))
+
+    def test_put_many(self):
+        """
+        An update with `put_many` moves the key to the end.
+        """
+        self.check(LIFOCache(capacity=4), put_many=True)
+
+    def test_shared_storage(self):
+        """
+        An update moves the key to the end of a shared storage too.
+        """
+        storage = SharedOrderedDict("test_lifo_%d" % os.getpid(),
+                                    capacity=4, slab_size=64)
+        try:
+            self.check(LIFOCache(storage=storage))
+        finally:
+            storage.close()
+            storage.unlink()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Tests for single-flight get_or_load.
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+LRUCache = __import__('3-lru_cache').LRUCache
+ConcurrentLRUCache = __import__('101-concurrent_cache').ConcurrentLRUCache
+
+THREADS = 16
+
+
+def race(call):
+    """
+    Run a call from many threads at once and return the results, or the
+    exceptions raised.
+    """
+    barrier = threading.Barrier(THREADS)
+    results = [None] * THREADS
+
+    def worker(slot):
+        barrier.wait()
+        try:
+            results[slot] = call(slot)
+        except Exception as e:
+            results[slot] = e
+
+    threads = [threading.Thread(target=worker, args=(slot,))
+               for slot in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestGetOrLoad(unittest.TestCase):
+    """
+    Concurrent misses on a key share one load.
+    """
+
+    def setUp(self):
+        """
+        Count the loader calls.
+        """
+        self.calls = []
+
+    def loader(self, key):
+        """
+        A slow loader.
+        """
+        self.calls.append(key)
+        time.sleep(0.05)
+        return key.upper()
+
+    def test_single_flight(self):
+        """
+        The loader runs once and every caller gets its value.
+        """
+        cache = LRUCache(capacity=8)
+        results = race(lambda _: cache.get_or_load("a", self.loader))
+        self.assertEqual(results, ["A"] * THREADS)
+        self.assertEqual(self.calls, ["a"])
+        self.assertEqual(cache.get("a"), "A")
+
+    def test_error_shared_not_cached(self):
+        """
+        A failing load raises in every waiter, and the next call retries.
+        """
+        cache = LRUCache(capacity=8)
+
+        def failing(key):
+            self.calls.append(key)
+            time.sleep(0.05)
+            raise OSError("backend down")
+
+        results = race(lambda _: cache.get_or_load("a", failing))
+        self.assertEqual(len(self.calls), 1)
+        for result in results:
+            self.assertIsInstance(result, OSError)
+        self.assertEqual(cache.get_or_load("a", self.loader), "A")
+
+    def test_many_keys_plain_cache(self):
+        """
+        Loads of different keys on a cache without its own lock do not
+        corrupt it.
+        """
+        cache = LRUCache(capacity=4)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = race(lambda slot: cache.get_or_load(
+                "k{}".format(slot), lambda key: key))
+        self.assertEqual(results,
+                         ["k{}".format(slot) for slot in range(THREADS)])
+        self.assertEqual(len(cache.cache_data), 4)
+
+    def test_negative_ttl(self):
+        """
+        A missing item is remembered for `negative_ttl`.
+        """
+        cache = LRUCache(capacity=4)
+
+        def missing(key):
+            self.calls.append(key)
+
+        self.assertIsNone(cache.get_or_load("x", missing, negative_ttl=0.1))
+        self.assertIsNone(cache.get_or_load("x", missing, negative_ttl=0.1))
+        self.assertEqual(self.calls, ["x"])
+        time.sleep(0.15)
+        cache.get_or_load("x", missing, negative_ttl=0.1)
+        self.assertEqual(self.calls, ["x", "x"])
+
+    def test_stale_after(self):
+        """
+        A stale hit is returned and reloaded in the background, on a
+        thread-safe cache only.
+        """
+        with self.assertRaises(ValueError):
+            LRUCache().get_or_load("a", self.loader, stale_after=1)
+        cache = ConcurrentLRUCache(capacity=8)
+        self.assertEqual(cache.get_or_load("a", str.upper), "A")
+        time.sleep(0.02)
+        self.assertEqual(cache.get_or_load("a", lambda key: "fresh",
+                                           stale_after=0.01), "A")
+        deadline = time.monotonic() + 2
+        while cache.get("a") != "fresh" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(cache.get("a"), "fresh")
+
+
+class TestAsyncGetOrLoad(unittest.TestCase):
+    """
+    Concurrent coroutines missing a key await one load.
+    """
+
+    def test_single_flight(self):
+        """
+        The loader runs once, and a cancelled caller does not cancel it.
+        """
+        calls = []
+
+        async def loader(key):
+            calls.append(key)
+            await asyncio.sleep(0.05)
+            return key.upper()
+
+        async def main():
+            cache = LRUCache(capacity=8)
+            cancelled = asyncio.ensure_future(cache.aget_or_load("a", loader))
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            results = await asyncio.gather(
+                *(cache.aget_or_load("a", loader) for _ in range(8)))
+            return results, cache.get("a")
+
+        results, cached = asyncio.run(main())
+        self.assertEqual(results, ["A"] * 8)
+        self.assertEqual(cached, "A")
+        self.assertEqual(calls, ["a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
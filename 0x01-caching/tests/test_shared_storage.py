@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for SharedOrderedDict shared between processes.
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from shared_storage import SharedOrderedDict  # noqa: E402
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "needs os.fork")
+class TestForkedStorage(unittest.TestCase):
+    """
+    A storage created before fork and used by every child.
+    """
+
+    CAPACITY = 32
+
+    def setUp(self):
+        """
+        Create the storage in the parent.
+        """
+        self.storage = SharedOrderedDict(
+            "test_forked_%d" % os.getpid(), capacity=self.CAPACITY,
+            slab_size=128)
+
+    def tearDown(self):
+        """
+        Remove the segment.
+        """
+        self.storage.close()
+        self.storage.unlink()
+
+    def work(self, seed):
+        """
+        Run LRU-style operations on the inherited storage in a child.
+        """
+        rng = random.Random(seed)
+        for i in range(2000):
+            with self.storage.lock():
+                key = rng.randrange(2 * self.CAPACITY)
+                if key in self.storage:
+                    self.storage.move_to_end(key)
+                    continue
+                if len(self.storage) >= self.CAPACITY:
+                    self.storage.popitem(last=False)
+                self.storage[key] = "v%d" % i
+
+    def test_inherited_lock_excludes_siblings(self):
+        """
+        Children sharing an inherited storage never corrupt it.
+        """
+        pids = []
+        for seed in range(4):
+            pid = os.fork()
+            if pid == 0:
+                code = 0
+                try:
+                    self.work(seed)
+                except BaseException:
+                    code = 1
+                os._exit(code)
+            pids.append(pid)
+
+        codes = [os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1])
+                 for pid in pids]
+        self.assertEqual(codes, [0] * len(pids))
+        keys = list(self.storage)
+        self.assertEqual(len(keys), len(self.storage))
+        self.assertEqual(len(set(keys)), len(keys))
+        self.assertLessEqual(len(keys), self.CAPACITY)
+        for key in keys:
+            self.assertTrue(self.storage[key].startswith("v"))
+
+
+class TestPolicyCapacity(unittest.TestCase):
+    """
+    Policies keeping their items in a storage of fixed capacity.
+    """
+
+    def setUp(self):
+        """
+        Create a small storage.
+        """
+        self.storage = SharedOrderedDict(
+            "test_capacity_%d" % os.getpid(), capacity=8, slab_size=64)
+
+    def tearDown(self):
+        """
+        Remove the segment.
+        """
+        self.storage.close()
+        self.storage.unlink()
+
+    def test_capacity_defaults_to_storage(self):
+        """
+        A policy without a capacity fills the whole storage.
+        """
+        LRUCache = __import__('3-lru_cache').LRUCache
+        cache = LRUCache(storage=self.storage)
+        for i in range(8):
+            cache.put(i, i)
+        self.assertEqual(len(self.storage), 8)
+
+    def test_capacity_above_storage_rejected(self):
+        """
+        A policy may not hold more items than its storage.
+        """
+        FIFOCache = __import__('1-fifo_cache').FIFOCache
+        with self.assertRaises(ValueError):
+            FIFOCache(storage=self.storage, capacity=9)
+
+    def test_basic_cache_full_storage(self):
+        """
+        BasicCache discards the first added item of a full storage.
+        """
+        BasicCache = __import__('0-basic_cache').BasicCache
+        cache = BasicCache(storage=self.storage)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(9):
+                cache.put(i, i)
+        self.assertEqual(sorted(self.storage), list(range(1, 9)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Tests for the TimingWheel and cache TTLs.
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from shared_storage import SharedOrderedDict  # noqa: E402
+from timing_wheel import TimingWheel  # noqa: E402
+
+LRUCache = __import__('3-lru_cache').LRUCache
+LFUCache = __import__('100-lfu_cache').LFUCache
+BasicCache = __import__('0-basic_cache').BasicCache
+
+
+class Clock:
+    """
+    Clock that only moves when told to.
+    """
+
+    def __init__(self, now=1000.0):
+        """
+        Start at a given time.
+        """
+        self.now = now
+
+    def __call__(self):
+        """
+        Current time.
+        """
+        return self.now
+
+
+class TestTimingWheel(unittest.TestCase):
+    """
+    Keys fall due at their deadline, however far away it is.
+    """
+
+    def test_matches_deadlines(self):
+        """
+        Every key expires on the first advance at or after its deadline.
+        """
+        clock = Clock()
+        wheel = TimingWheel(resolution=1.0, slots=4, levels=2, clock=clock)
+        rng = random.Random(0)
+        deadlines = {}
+        for key in range(200):
+            delay = rng.choice([0.5, 3, 17, 40, 500])
+            wheel.schedule(key, delay)
+            deadlines[key] = clock.now + delay
+        expired = {}
+        while clock.now < 1600:
+            clock.now += rng.choice([0.25, 1, 7, 30])
+            for key in wheel.advance():
+                expired[key] = clock.now
+        self.assertEqual(sorted(expired), sorted(deadlines))
+        for key, when in expired.items():
+            self.assertGreaterEqual(when, deadlines[key])
+            self.assertLess(when - deadlines[key], 31)
+        self.assertEqual(len(wheel), 0)
+
+    def test_cancel(self):
+        """
+        A cancelled key never falls due.
+        """
+        clock = Clock()
+        wheel = TimingWheel(clock=clock)
+        wheel.schedule("a", 5)
+        wheel.schedule("b", 5)
+        wheel.cancel("a")
+        clock.now += 10
+        self.assertEqual(wheel.advance(), ["b"])
+
+    def test_expired_between_ticks(self):
+        """
+        `expired` sees a passed deadline before the wheel reaches it.
+        """
+        clock = Clock()
+        wheel = TimingWheel(resolution=10.0, clock=clock)
+        wheel.schedule("a", 1)
+        clock.now += 2
+        self.assertTrue(wheel.expired("a"))
+        self.assertFalse(wheel.expired("b"))
+
+
+class TestCacheTTL(unittest.TestCase):
+    """
+    Expired entries leave the cache silently.
+    """
+
+    def cache(self, policy, **options):
+        """
+        Build a cache whose wheel runs on a fake clock.
+        """
+        cache = policy(**options)
+        self.clock = Clock()
+        cache.timers = TimingWheel(clock=self.clock)
+        return cache
+
+    def test_ttl_expires(self):
+        """
+        An entry is gone once its TTL has passed, without a DISCARD.
+        """
+        for policy in (LRUCache, LFUCache, BasicCache):
+            cache = self.cache(policy)
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                cache.put("a", 1, ttl=5)
+                cache.put("b", 2)
+                self.clock.now += 6
+                self.assertIsNone(cache.get("a"))
+                self.assertEqual(cache.get("b"), 2)
+            self.assertEqual(out.getvalue(), "", policy.__name__)
+            self.assertNotIn("a", cache.cache_data)
+
+    def test_default_ttl_and_reset(self):
+        """
+        `default_ttl` applies to puts without a TTL.
+        """
+        cache = self.cache(LRUCache, default_ttl=5)
+        cache.put("a", 1)
+        cache.put("b", 2, ttl=50)
+        self.clock.now += 6
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), 2)
+
+    def test_expired_entries_make_room(self):
+        """
+        Expired entries are dropped before the policy evicts a live one.
+        """
+        cache = self.cache(LRUCache, capacity=2)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            cache.put("a", 1, ttl=5)
+            cache.put("b", 2)
+            self.clock.now += 6
+            cache.put("c", 3)
+        self.assertEqual(out.getvalue(), "")
+        self.assertEqual(sorted(cache.cache_data), ["b", "c"])
+
+
+class TestSharedStorageTTL(unittest.TestCase):
+    """
+    TTLs are refused on shared storage before anything is written.
+    """
+
+    def setUp(self):
+        """
+        Create a small storage.
+        """
+        self.storage = SharedOrderedDict(
+            "test_ttl_%d" % os.getpid(), capacity=8, slab_size=64)
+
+    def tearDown(self):
+        """
+        Remove the segment.
+        """
+        self.storage.close()
+        self.storage.unlink()
+
+    def test_put_with_ttl_writes_nothing(self):
+        """
+        `put` with a TTL raises and leaves the storage untouched.
+        """
+        for policy in (BasicCache, LRUCache, LFUCache):
+            cache = policy(storage=self.storage)
+            with self.assertRaises(ValueError):
+                cache.put("a", 1, ttl=5)
+            self.assertNotIn("a", self.storage, policy.__name__)
+
+    def test_put_many_with_ttl_writes_nothing(self):
+        """
+        `put_many` with a TTL raises and leaves the storage untouched.
+        """
+        for policy in (BasicCache, LRUCache):
+            cache = policy(storage=self.storage)
+            with self.assertRaises(ValueError):
+                cache.put_many({"a": 1, "b": 2}, ttl=5)
+            self.assertEqual(len(self.storage), 0, policy.__name__)
+
+    def test_default_ttl_refused(self):
+        """
+        A default TTL is refused when the cache is built.
+        """
+        with self.assertRaises(ValueError):
+            LRUCache(storage=self.storage, default_ttl=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
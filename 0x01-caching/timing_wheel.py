@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+This module implements entry expiry for the caching policies.
+
+A TimingWheel is a hierarchical timer wheel: each level is a ring of slots,
+a slot of level `n` spanning `slots ** n` ticks. A deadline is filed in the
+lowest level whose ring reaches it and moves down a level each time the
+wheel turns past the start of its slot, until it falls due in level 0.
+Scheduling, cancelling and expiring a key are O(1). Advancing the wheel
+jumps straight to the next tick that has a slot to empty, so its cost
+follows the number of expiries and cascades, not the time spent idle, and
+a cache never scans for dead entries.
+
+ExpiryMixin gives a cache per-entry and default TTLs on top of a wheel.
+"""
+
+import math
+import time
+
+
+class TimingWheel:
+    """
+    TimingWheel tracks the deadline of every key.
+
+    Attributes:
+        resolution (float): The length of a tick in seconds.
+        slots (int): The number of slots of every level.
+        levels (int): The number of levels.
+        clock (callable): Returns the current time in seconds.
+        tick (int): The last tick the wheel was advanced to.
+        deadlines (dict): The deadline of every key.
+    """
+
+    def __init__(self, resolution=1.0, slots=64, levels=4,
+                 clock=time.monotonic):
+        """
+        Initialize an empty wheel.
+
+        Args:
+            resolution (float): The length of a tick in seconds.
+            slots (int): The number of slots of every level.
+            levels (int): The number of levels; deadlines further than
+            `slots ** levels` ticks away wait in the last level, and are
+            filed again when their slot comes up.
+            clock (callable): Returns the current time in seconds.
+        """
+        assert resolution > 0 and slots > 1 and levels > 0
+        self.resolution = resolution
+        self.slots = slots
+        self.levels = levels
+        self.clock = clock
+        self.tick = math.floor(clock() / resolution)
+        self.deadlines = {}
+        self.wheels = [[set() for _ in range(slots)] for _ in range(levels)]
+        self.where = {}
+
+    def __len__(self):
+        """
+        Number of scheduled keys.
+        """
+        return len(self.deadlines)
+
+    def __place(self, key, earliest):
+        """
+        File a key in the slot its deadline falls in, or in the slot of the
+        `earliest` tick still to be processed if that is later.
+        """
+        due = math.ceil(self.deadlines[key] / self.resolution)
+        due = max(due, earliest)
+        delta = due - self.tick
+        for level in range(self.levels):
+            if delta < self.slots ** (level + 1):
+                break
+        else:
+            due = self.tick + self.slots ** self.levels - 1
+        slot = (due // self.slots ** level) % self.slots
+        self.wheels[level][slot].add(key)
+        self.where[key] = (level, slot)
+
+    def schedule(self, key, delay):
+        """
+        Set a key to expire after a delay, replacing any previous deadline.
+
+        Args:
+            key (hashable): The key.
+            delay (float): Seconds until the key expires.
+        """
+        self.cancel(key)
+        now = self.clock()
+        if not self.deadlines:
+            self.tick = math.floor(now / self.resolution)
+        self.deadlines[key] = now + delay
+        self.__place(key, self.tick + 1)
+
+    def cancel(self, key):
+        """
+        Forget the deadline of a key, if it has one.
+
+        Args:
+            key (hashable): The key.
+        """
+        where = self.where.pop(key, None)
+        if where is not None:
+            self.wheels[where[0]][where[1]].discard(key)
+            del self.deadlines[key]
+
+    def expired(self, key):
+        """
+        Whether the deadline of a key has passed, even if the wheel has not
+        been advanced that far yet.
+
+        Args:
+            key (hashable): The key.
+
+        Returns:
+            bool: True if the key has expired.
+        """
+        deadline = self.deadlines.get(key)
+        return deadline is not None and deadline <= self.clock()
+
+    def __pop_slot(self, level, slot):
+        """
+        Empty a slot and return its keys.
+        """
+        keys = self.wheels[level][slot]
+        self.wheels[level][slot] = set()
+        for key in keys:
+            del self.where[key]
+        return keys
+
+    def __next_event(self, limit):
+        """
+        The next tick at which a slot of some level is emptied, or `limit`
+        if none is before it. Empty slots are passed over.
+        """
+        best = limit
+        for level in range(self.levels):
+            span = self.slots ** level
+            boundary = (self.tick // span + 1) * span
+            wheel = self.wheels[level]
+            for _ in range(self.slots):
+                if boundary >= best:
+                    break
+                if wheel[(boundary // span) % self.slots]:
+                    best = boundary
+                    break
+                boundary += span
+        return best
+
+    def advance(self):
+        """
+        Turn the wheel up to the current time.
+
+        Returns:
+            list: The keys that expired, now unscheduled.
+        """
+        now = self.clock()
+        target = math.floor(now / self.resolution)
+        due = []
+        if not self.deadlines or \
+                target - self.tick >= self.slots ** self.levels:
+            # Empty, or idle for a whole turn: refile everything at once
+            for key, deadline in list(self.deadlines.items()):
+                self.cancel(key)
+                if deadline <= now:
+                    due.append(key)
+                else:
+                    self.deadlines[key] = deadline
+            self.tick = target
+            for key in self.deadlines:
+                self.__place(key, self.tick + 1)
+            return due
+
+        while self.tick < target:
+            self.tick = self.__next_event(target)
+            for level in range(self.levels - 1, 0, -1):
+                span = self.slots ** level
+                if self.tick % span == 0:
+                    slot = (self.tick // span) % self.slots
+                    for key in self.__pop_slot(level, slot):
+                        self.__place(key, self.tick)
+            for key in self.__pop_slot(0, self.tick % self.slots):
+                if math.ceil(self.deadlines[key] / self.resolution) > \
+                        self.tick:
+                    # Filed early: its deadline was beyond every level
+                    self.__place(key, self.tick + 1)
+                    continue
+                del self.deadlines[key]
+                due.append(key)
+        return due
+
+
+class ExpiryMixin:
+    """
+    ExpiryMixin adds TTLs to a cache class that has `cache_data` and a
+    `_remove(key)` hook.
+
+    Expired entries are dropped without a DISCARD, on the `put` or `get`
+    that finds them due, and never count against the capacity when the
+    policy chooses what to evict.
+    """
+
+    def _init_expiry(self, default_ttl=None, shared=False, **wheel):
+        """
+        Set up expiry. Call from `__init__`.
+
+        Args:
+            default_ttl (float, optional): Seconds an entry lives when `put`
+            gets no `ttl`. Defaults to living until evicted.
+            shared (bool): Whether the items are in storage shared with
+            other processes, whose timers this process cannot see.
+            **wheel: Arguments of the TimingWheel, e.g. `resolution`.
+
+        Raises:
+            ValueError: If a TTL is given for shared storage.
+        """
+        if shared and default_ttl is not None:
+            raise ValueError("TTLs are not supported on shared storage")
+        self.default_ttl = default_ttl
+        self.shared_expiry = shared
+        self.timers = TimingWheel(**wheel)
+
+    def _sweep(self, key=None):
+        """
+        Remove the entries whose deadline the wheel has reached, and `key`
+        if its deadline has passed in between ticks.
+
+        Args:
+            key (hashable, optional): The key about to be used.
+        """
+        if not self.timers:
+            return
+        for due in self.timers.advance():
+            if due in self.cache_data:
+                self._remove(due)
+        if key is not None and self.timers.expired(key) and \
+                key in self.cache_data:
+            self._remove(key)
+
+    def _sweep_many(self, keys):
+        """
+        Like `_sweep`, for a batch of keys about to be used: the wheel is
+        advanced once for the whole batch.
+
+        Args:
+            keys (iterable): The keys about to be used.
+        """
+        self._sweep()
+        if not self.timers:
+            return
+        for key in keys:
+            if self.timers.expired(key) and key in self.cache_data:
+                self._remove(key)
+
+    def _check_ttl(self, ttl):
+        """
+        Refuse a TTL the cache cannot honour. Call at the top of `put` and
+        `put_many`, before anything is written.
+
+        Raises:
+            ValueError: If a TTL is given for shared storage.
+        """
+        if ttl is not None and self.shared_expiry:
+            raise ValueError("TTLs are not supported on shared storage")
+
+    def _expire_after(self, key, ttl):
+        """
+        Set the deadline of an entry just put, from `ttl` or `default_ttl`.
+
+        An entry put without any TTL loses the deadline it had. The TTL must
+        have passed `_check_ttl`.
+        """
+        ttl = ttl if ttl is not None else self.default_ttl
+        if ttl is None or key not in self.cache_data:
+            self.timers.cancel(key)
+        else:
+            self.timers.schedule(key, ttl)
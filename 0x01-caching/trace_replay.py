@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+This module replays access traces through every caching policy and compares
+their hit rates.
+
+Each access is a `get`, followed on a miss by a `put` of the key, as a
+read-through cache would do. The synthetic traces cover a skewed (Zipf)
+workload, the same workload interrupted by one-off sequential scans like a
+pagination export, a loop slightly larger than the cache, and a working set
+that shifts halfway through. A recorded trace can be replayed with
+`--trace`, one key per line.
+
+Usage:
+    ./trace_replay.py --capacity 1000 --length 200000
+    ./trace_replay.py --capacity 500 --trace requests.log
+"""
+
+import argparse
+import contextlib
+import itertools
+import os
+import random
+
+POLICIES = {
+    "FIFO": __import__('1-fifo_cache').FIFOCache,
+    "LIFO": __import__('2-lifo_cache').LIFOCache,
+    "LRU": __import__('3-lru_cache').LRUCache,
+    "MRU": __import__('4-mru_cache').MRUCache,
+    "LFU": __import__('100-lfu_cache').LFUCache,
+    "ARC": __import__('102-arc_cache').ARCCache,
+    "2Q": __import__('103-2q_cache').TwoQueueCache,
+    "W-TinyLFU": __import__('104-tinylfu_cache').TinyLFUCache,
+}
+
+
+def zipf(keys, length, rng, skew=0.9, offset=0):
+    """
+    Draw keys with Zipf-distributed popularity.
+
+    Args:
+        keys (int): The number of distinct keys.
+        length (int): The number of accesses.
+        rng (random.Random): The random generator.
+        skew (float): The Zipf exponent.
+        offset (int): Added to every key, to draw from another key space.
+
+    Returns:
+        list: The accessed keys.
+    """
+    weights = list(itertools.accumulate(
+        1 / rank ** skew for rank in range(1, keys + 1)))
+    return [offset + key for key in
+            rng.choices(range(keys), cum_weights=weights, k=length)]
+
+
+def synthetic_traces(capacity, length, seed=0):
+    """
+    Build the synthetic traces.
+
+    Args:
+        capacity (int): The capacity of the caches.
+        length (int): The number of accesses of each trace.
+        seed (int): The random seed.
+
+    Returns:
+        dict: The accessed keys of every trace, by name.
+    """
+    rng = random.Random(seed)
+    keys = 10 * capacity
+
+    scanned = []
+    hot = zipf(keys, length, rng)
+    scan = itertools.count(keys)
+    period = max(length // 10, 1)
+    for start in range(0, length, period):
+        scanned.extend(hot[start:start + period])
+        scanned.extend(next(scan) for _ in range(2 * capacity))
+
+    half = length // 2
+    return {
+        "zipf": zipf(keys, length, rng),
+        "zipf+scan": scanned[:length],
+        "loop": [i % (capacity + capacity // 2) for i in range(length)],
+        "shift": zipf(keys, half, rng) +
+        zipf(keys, length - half, rng, offset=keys),
+    }
+
+
+def hit_rate(policy, capacity, trace):
+    """
+    Replay a trace through a new cache.
+
+    Args:
+        policy (type): The cache class.
+        capacity (int): The capacity of the cache.
+        trace (list): The accessed keys.
+
+    Returns:
+        float: The fraction of accesses that hit.
+    """
+    cache = policy(capacity=capacity)
+    hits = 0
+    with open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull):
+        for key in trace:
+            if cache.get(key) is None:
+                cache.put(key, True)
+            else:
+                hits += 1
+    return hits / len(trace) if trace else 0.0
+
+
+def main():
+    """
+    Parse the command line and print the hit rate of every policy on every
+    trace.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--capacity", type=int, default=1000)
+    parser.add_argument("--length", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace", help="file with one key per line")
+    parser.add_argument("--policies", nargs="+", choices=list(POLICIES),
+                        default=list(POLICIES))
+    args = parser.parse_args()
+
+    if args.trace:
+        with open(args.trace) as f:
+            traces = {os.path.basename(args.trace):
+                      [line.strip() for line in f if line.strip()]}
+    else:
+        traces = synthetic_traces(args.capacity, args.length, args.seed)
+
+    print("{:<12}".format("policy") +
+          "".join("{:>11}".format(name) for name in traces))
+    for name in args.policies:
+        rates = [hit_rate(POLICIES[name], args.capacity, trace)
+                 for trace in traces.values()]
+        print("{:<12}".format(name) +
+              "".join("{:>11.2%}".format(rate) for rate in rates))
+
+
+if __name__ == "__main__":
+    main()